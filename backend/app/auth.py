@@ -1,29 +1,50 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from .database import get_db
-from .models.user import User
-from .models.restaurant import Restaurant
-from .models.delivery_partner import DeliveryPartner
-from .models.admin import Admin
+from .cache import LRUCache
+from .config import TOKEN_CACHE_SIZE
+from .passwords import PasswordPoolBusy, make_context, password_pool
 
 SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_context()
 security = HTTPBearer()
 
+# Verified token payloads keyed by token digest; each entry expires with its token
+token_cache = LRUCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    # Returns (valid, new_hash); new_hash is set when the stored hash should be replaced
+    try:
+        return await password_pool.verify_and_update(plain_password, hashed_password)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry"
+        )
+
+async def get_password_hash_async(password):
+    try:
+        return await password_pool.hash(password)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many registrations in progress, please retry"
+        )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -35,14 +56,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def decode_token(token: str):
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    
+    # Only successfully verified tokens are cached
+    exp = payload.get("exp")
+    if exp is not None and exp > time.time():
+        token_cache.set(key, payload, ttl=exp - time.time())
+    return payload
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return authenticate_token(credentials.credentials)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    token = credentials.credentials
+def authenticate_token(token: str):
     payload = decode_token(token)
     
     if payload is None:
@@ -63,11 +96,17 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     return {"id": int(user_id), "role": role}
 
 def require_role(allowed_roles: list):
+    # Routes asking for the same roles share one checker, so FastAPI's
+    # per-request dependency cache resolves it only once
+    return _role_checker(tuple(allowed_roles))
+
+@lru_cache(maxsize=None)
+def _role_checker(allowed_roles: tuple):
     def role_checker(current_user: dict = Depends(get_current_user)):
         if current_user["role"] not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access denied. Required roles: {allowed_roles}"
+                detail=f"Access denied. Required roles: {list(allowed_roles)}"
             )
         return current_user
     return role_checker
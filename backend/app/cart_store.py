@@ -0,0 +1,129 @@
+import threading
+from abc import ABC, abstractmethod
+from sqlalchemy import delete, insert, select, update
+from .config import CART_BACKEND
+from .database import engine
+from .models.cart import CartEntry
+from .write_queue import write_queue
+
+class CartStore(ABC):
+    # Carts map dish_id -> quantity. Dish details are joined in by the caller so
+    # backends stay small and never hold stale prices.
+
+    @abstractmethod
+    def get(self, user_id: int) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, user_id: int, dish_id: int, quantity: int):
+        # Adjusts the line by `quantity` and drops it once it reaches zero.
+        # Returns the new quantity (0 if removed), or None when a non-positive
+        # quantity is added for a dish that is not in the cart.
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove(self, user_id: int, dish_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self, user_id: int):
+        raise NotImplementedError
+
+class InMemoryCartStore(CartStore):
+    # Per-process only; meant for tests and single-worker development
+    def __init__(self):
+        self._carts = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> dict:
+        with self._lock:
+            return dict(self._carts.get(user_id, {}))
+
+    def add(self, user_id: int, dish_id: int, quantity: int):
+        with self._lock:
+            cart = self._carts.setdefault(user_id, {})
+            if dish_id not in cart:
+                if quantity <= 0:
+                    return None
+                cart[dish_id] = quantity
+                return quantity
+            new_qty = cart[dish_id] + quantity
+            if new_qty <= 0:
+                del cart[dish_id]
+                return 0
+            cart[dish_id] = new_qty
+            return new_qty
+
+    def remove(self, user_id: int, dish_id: int) -> bool:
+        with self._lock:
+            cart = self._carts.get(user_id, {})
+            return cart.pop(dish_id, None) is not None
+
+    def clear(self, user_id: int):
+        with self._lock:
+            self._carts.pop(user_id, None)
+
+class SQLiteCartStore(CartStore):
+    # Shared by every worker process through the application database. Writes go
+    # through `writer` (see app/write_queue.py) so they are group-committed with
+    # other requests' writes; with writer=None each write is its own transaction.
+    def __init__(self, bind=engine, writer=write_queue):
+        self.bind = bind
+        self.writer = writer
+        self.table = CartEntry.__table__
+
+    def _write(self, fn, *args):
+        if self.writer is not None:
+            return self.writer.run(fn, *args)
+        with self.bind.begin() as conn:
+            return fn(conn, *args)
+
+    def get(self, user_id: int) -> dict:
+        stmt = select(self.table.c.dish_id, self.table.c.quantity).where(self.table.c.user_id == user_id)
+        with self.bind.connect() as conn:
+            return {dish_id: quantity for dish_id, quantity in conn.execute(stmt)}
+
+    def add(self, user_id: int, dish_id: int, quantity: int):
+        return self._write(self._add, user_id, dish_id, quantity)
+
+    def _add(self, conn, user_id: int, dish_id: int, quantity: int):
+        t = self.table
+        key = (t.c.user_id == user_id) & (t.c.dish_id == dish_id)
+        new_qty = conn.execute(
+            update(t).where(key).values(quantity=t.c.quantity + quantity).returning(t.c.quantity)
+        ).scalar()
+        if new_qty is None:
+            if quantity <= 0:
+                return None
+            conn.execute(insert(t).values(user_id=user_id, dish_id=dish_id, quantity=quantity))
+            return quantity
+        if new_qty <= 0:
+            conn.execute(delete(t).where(key))
+            return 0
+        return new_qty
+
+    def remove(self, user_id: int, dish_id: int) -> bool:
+        return self._write(self._remove, user_id, dish_id)
+
+    def _remove(self, conn, user_id: int, dish_id: int) -> bool:
+        t = self.table
+        result = conn.execute(delete(t).where((t.c.user_id == user_id) & (t.c.dish_id == dish_id)))
+        return result.rowcount > 0
+
+    def clear(self, user_id: int):
+        self._write(self._clear, user_id)
+
+    def _clear(self, conn, user_id: int):
+        conn.execute(delete(self.table).where(self.table.c.user_id == user_id))
+
+CART_BACKENDS = {
+    "sqlite": SQLiteCartStore,
+    "memory": InMemoryCartStore,
+}
+
+def create_cart_store(backend: str = CART_BACKEND) -> CartStore:
+    if backend not in CART_BACKENDS:
+        raise ValueError(f"Unknown cart backend '{backend}'. Choose from: {', '.join(CART_BACKENDS)}")
+    return CART_BACKENDS[backend]()
+
+cart_store = create_cart_store()
@@ -0,0 +1,88 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Customer menu cache (see app/cache.py)
+MENU_CACHE_SIZE = int(os.getenv("MENU_CACHE_SIZE", "1024"))
+MENU_CACHE_TTL_SECONDS = float(os.getenv("MENU_CACHE_TTL_SECONDS", "300"))
+
+# Cart backend: "sqlite" (shared across workers) or "memory" (single process, tests)
+CART_BACKEND = os.getenv("CART_BACKEND", "sqlite")
+
+# Offer index: seconds between full reloads from the database (see app/offers.py)
+OFFER_INDEX_REFRESH_SECONDS = float(os.getenv("OFFER_INDEX_REFRESH_SECONDS", "60"))
+
+# Fee snapshot: seconds before a worker re-reads fees changed by other workers (see app/fees.py)
+FEE_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("FEE_SNAPSHOT_REFRESH_SECONDS", "30"))
+
+# Delivery dispatch (see app/dispatch.py)
+DISPATCH_POLICY = os.getenv("DISPATCH_POLICY", "least_loaded")
+# Max concurrent orders per partner; 0 means no cap
+DISPATCH_MAX_ACTIVE_ORDERS = int(os.getenv("DISPATCH_MAX_ACTIVE_ORDERS", "0"))
+DISPATCH_REFRESH_SECONDS = float(os.getenv("DISPATCH_REFRESH_SECONDS", "30"))
+
+# Verified JWT cache entries (see app/auth.py); 0 disables the cache
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Password hashing (see app/passwords.py). Changing BCRYPT_ROUNDS rehashes each
+# account's password the next time it logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64"))
+
+# Order event stream: events buffered per subscriber before the oldest are dropped
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "100"))
+ORDER_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("ORDER_EVENTS_KEEPALIVE_SECONDS", "15"))
+
+# Database (see app/database.py). DB_PROFILE "production" enables WAL, tuned
+# pragmas and a read-only pool for GET routes; "basic" is a plain engine.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./food_delivery.db")
+DB_PROFILE = os.getenv("DB_PROFILE", "production")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Group-commit writer (see app/write_queue.py): most units per transaction, how
+# long the writer waits for more units before committing, and how many units
+# may queue before requests get 503. With no linger, batches still form from
+# whatever queued up during the previous commit.
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+WRITE_BATCH_LINGER_MS = float(os.getenv("WRITE_BATCH_LINGER_MS", "0"))
+WRITE_QUEUE_MAX = int(os.getenv("WRITE_QUEUE_MAX", "1000"))
+
+# Pin-code proximity (see app/pin_codes.py): centroid coordinates per pin code,
+# and how many nearby pin codes within what distance a "nearby" browse may span
+PIN_CODES_FILE = os.getenv("PIN_CODES_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "pin_codes.csv"))
+NEARBY_MAX_PIN_CODES = int(os.getenv("NEARBY_MAX_PIN_CODES", "10"))
+NEARBY_MAX_DISTANCE_KM = float(os.getenv("NEARBY_MAX_DISTANCE_KM", "10"))
+
+# Bulk menu import (see app/menu_io.py): rows validated and written per
+# transaction, and the most rows one upload may contain
+MENU_IMPORT_CHUNK_SIZE = int(os.getenv("MENU_IMPORT_CHUNK_SIZE", "500"))
+MENU_IMPORT_MAX_ROWS = int(os.getenv("MENU_IMPORT_MAX_ROWS", "5000"))
+
+# Dish search (see app/search.py): 0 ranks every match; N ranks only the newest
+# N matches, for flat latency on huge catalogues at some cost in relevance
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "0"))
+
+# Order export (see app/order_export.py): orders fetched from the cursor, and
+# item lookups batched, per chunk of the stream
+ORDER_EXPORT_BATCH_SIZE = int(os.getenv("ORDER_EXPORT_BATCH_SIZE", "1000"))
+
+# Streaming exports (see app/exports.py): how many order and menu exports may
+# run at once, each holding one connection of their own pool; more get 503
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+# Request metrics (see app/metrics.py): latency histogram bucket bounds in
+# seconds, comma separated
+METRICS_LATENCY_BUCKETS = [float(b) for b in os.getenv("METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10").split(",")]
+
+# Request profiler (see app/profiling.py): share of requests profiled without
+# the X-Profile header (0 profiles only on request), sampling interval, captures
+# kept for /api/v1/admin/profiles, and the longest a capture samples for
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_CAPTURES = int(os.getenv("PROFILE_MAX_CAPTURES", "50"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
@@ -1,20 +1,103 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from .config import DATABASE_URL, DB_PROFILE, DB_READ_POOL_SIZE, EXPORT_MAX_CONCURRENT, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
 
-DATABASE_URL = "sqlite:///./food_delivery.db"
+DB_PROFILES = ("basic", "production")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# Requests with these methods get a session on the read-only pool
+READ_METHODS = ("GET", "HEAD")
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url not in ("sqlite://", "sqlite:///")
+
+def _sqlite_pragmas(read_only: bool) -> list:
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL is stored in the database file, so setting it from the writer is enough
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+def _apply_pragmas(engine, pragmas: list):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def create_engines(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    # Returns (write_engine, read_engine). With WAL, readers work from a snapshot
+    # and never wait for the writer, so reads get their own pool of query_only
+    # connections. Other profiles and databases share one engine for both.
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}', expected one of {', '.join(DB_PROFILES)}")
+
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    write_engine = create_engine(url, connect_args=connect_args)
+    if profile == "basic" or not _is_file_sqlite(url):
+        return write_engine, write_engine
+
+    read_engine = create_engine(url, connect_args=connect_args, pool_size=DB_READ_POOL_SIZE, max_overflow=0)
+    _apply_pragmas(write_engine, _sqlite_pragmas(read_only=False))
+    _apply_pragmas(read_engine, _sqlite_pragmas(read_only=True))
+    return write_engine, read_engine
+
+def create_export_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    # Streaming exports hold a connection for their whole run, so they read from
+    # their own query_only pool, one connection per export slot (see
+    # app/exports.py), and can never take the GET routes' connections. Returns
+    # None where create_engines shares one engine for everything.
+    if profile == "basic" or not _is_file_sqlite(url):
+        return None
+    export_engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=EXPORT_MAX_CONCURRENT, max_overflow=0)
+    _apply_pragmas(export_engine, _sqlite_pragmas(read_only=True))
+    return export_engine
+
+def create_batch_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    # Single connection for the group-commit writer (see app/write_queue.py).
+    # pysqlite's implicit transactions are switched off so each batch opens with
+    # BEGIN IMMEDIATE and the per-unit SAVEPOINTs nest inside it as written.
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=1, max_overflow=0)
+    connect_args = {"check_same_thread": False}
+    if not _is_file_sqlite(url):
+        return create_engine(url, connect_args=connect_args)
+
+    batch_engine = create_engine(url, connect_args=connect_args, pool_size=1, max_overflow=0)
+    if profile == "production":
+        _apply_pragmas(batch_engine, _sqlite_pragmas(read_only=False))
+
+    @event.listens_for(batch_engine, "connect")
+    def disable_implicit_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(batch_engine, "begin")
+    def begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return batch_engine
+
+engine, read_engine = create_engines()
+export_engine = create_export_engine() or read_engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+ExportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=export_engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request):
+    db = ReadSessionLocal() if request.method in READ_METHODS else SessionLocal()
     try:
         yield db
     finally:
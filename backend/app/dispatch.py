@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .config import DISPATCH_MAX_ACTIVE_ORDERS, DISPATCH_POLICY, DISPATCH_REFRESH_SECONDS
+from .models.delivery_partner import DeliveryPartner
+from .models.order import Order
+
+# Orders in these states no longer occupy a delivery partner
+FINISHED_STATUSES = ('delivered', 'cancelled')
+
+def released_partner(order: Order, previous_status: str) -> Optional[int]:
+    # The partner to release after a guarded status change, if the change took
+    # the order out of an active status; None otherwise, so a partner is never
+    # released twice for one order
+    if order.status in FINISHED_STATUSES and previous_status not in FINISHED_STATUSES:
+        return order.delivery_partner_id
+    return None
+
+class PartnerState:
+    __slots__ = ("partner_id", "pin_code", "available", "active_orders", "version")
+
+    def __init__(self, partner_id: int, pin_code: str, available: bool, active_orders: int = 0):
+        self.partner_id = partner_id
+        self.pin_code = pin_code
+        self.available = available
+        self.active_orders = active_orders
+        self.version = 0
+
+class LeastLoadedPolicy:
+    # Fewest active orders wins; ties go to the lowest partner id
+    orders_by_load = True
+
+    def score(self, partner: PartnerState):
+        return (partner.active_orders, partner.partner_id)
+
+class FirstAvailablePolicy:
+    # Previous behaviour: always the first available partner, regardless of load
+    orders_by_load = False
+
+    def score(self, partner: PartnerState):
+        return (partner.partner_id,)
+
+DISPATCH_POLICIES = {
+    "least_loaded": LeastLoadedPolicy,
+    "first_available": FirstAvailablePolicy,
+}
+
+class DispatchIndex:
+    # Available partners per pin code in a min-heap ordered by the policy score.
+    # Heap entries are never updated in place: a state change bumps the partner's
+    # version and pushes a fresh entry, and stale entries are dropped when they
+    # surface at the top. Picking and updating are both O(log n).
+
+    def __init__(self, policy=None, max_active_orders: int = DISPATCH_MAX_ACTIVE_ORDERS, refresh_seconds: float = DISPATCH_REFRESH_SECONDS):
+        self.policy = policy or DISPATCH_POLICIES[DISPATCH_POLICY]()
+        self.max_active_orders = max_active_orders
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._partners = {}
+        self._heaps = {}
+        self._counter = itertools.count()
+
+    def _push(self, partner: PartnerState):
+        partner.version += 1
+        if partner.available:
+            entry = (self.policy.score(partner), next(self._counter), partner.partner_id, partner.version)
+            heapq.heappush(self._heaps.setdefault(partner.pin_code, []), entry)
+
+    def load_rows(self, rows):
+        # rows: (partner_id, pin_code, available, active_orders)
+        with self._lock:
+            self._partners = {}
+            self._heaps = {}
+            for partner_id, pin_code, available, active_orders in rows:
+                partner = PartnerState(partner_id, pin_code, bool(available), active_orders or 0)
+                self._partners[partner_id] = partner
+                self._push(partner)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.refresh_seconds:
+            return
+        active = (
+            db.query(Order.delivery_partner_id, func.count(Order.id).label("active_orders"))
+            .filter(Order.delivery_partner_id.isnot(None), Order.status.notin_(FINISHED_STATUSES))
+            .group_by(Order.delivery_partner_id)
+            .subquery()
+        )
+        rows = (
+            db.query(DeliveryPartner.id, DeliveryPartner.pin_code, DeliveryPartner.availability, active.c.active_orders)
+            .outerjoin(active, active.c.delivery_partner_id == DeliveryPartner.id)
+            .all()
+        )
+        self.load_rows(rows)
+
+    def assign(self, pin_code: str) -> Optional[int]:
+        with self._lock:
+            heap = self._heaps.get(pin_code)
+            # Partners at the cap are set aside while looking further down the
+            # heap, and go back in afterwards
+            capped = []
+            try:
+                while heap:
+                    _, _, partner_id, version = heap[0]
+                    partner = self._partners.get(partner_id)
+                    if partner is None or partner.version != version or not partner.available:
+                        heapq.heappop(heap)
+                        continue
+                    if self.max_active_orders and partner.active_orders >= self.max_active_orders:
+                        # When the score orders by load, everyone below is at the cap too
+                        if getattr(self.policy, "orders_by_load", False):
+                            return None
+                        capped.append(heapq.heappop(heap))
+                        continue
+                    heapq.heappop(heap)
+                    partner.active_orders += 1
+                    self._push(partner)
+                    return partner_id
+                return None
+            finally:
+                for entry in capped:
+                    heapq.heappush(heap, entry)
+
+    def release(self, partner_id: int):
+        with self._lock:
+            partner = self._partners.get(partner_id)
+            if partner is not None and partner.active_orders > 0:
+                partner.active_orders -= 1
+                self._push(partner)
+
+    def set_availability(self, partner_id: int, pin_code: str, available: bool):
+        with self._lock:
+            partner = self._partners.get(partner_id)
+            if partner is None:
+                if self._loaded_at is None:
+                    return
+                partner = PartnerState(partner_id, pin_code, available)
+                self._partners[partner_id] = partner
+            partner.available = available
+            partner.pin_code = pin_code
+            self._push(partner)
+
+    def stats(self) -> dict:
+        with self._lock:
+            available = [p for p in self._partners.values() if p.available]
+            return {
+                "partners": len(self._partners),
+                "available": len(available),
+                "active_orders": sum(p.active_orders for p in self._partners.values()),
+                "pin_codes": len(self._heaps)
+            }
+
+# Each worker keeps its own index; the periodic reload reconciles load counts
+# with assignments made by other workers
+dispatch_index = DispatchIndex()
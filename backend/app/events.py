@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from datetime import datetime
+from .config import ORDER_EVENTS_QUEUE_SIZE
+
+def order_event(event_type: str, order) -> dict:
+    # Build the event while the order is still loaded, i.e. before commit expires it
+    return {
+        "type": event_type,
+        "order_id": order.id,
+        "status": order.status,
+        "user_id": order.user_id,
+        "restaurant_id": order.restaurant_id,
+        "delivery_partner_id": order.delivery_partner_id,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+class Subscriber:
+    # A bounded queue owned by one connection. When the consumer falls behind,
+    # the oldest event is dropped so a slow client can never hold memory hostage;
+    # `dropped` tells it to refetch state.
+
+    def __init__(self, scope: tuple, maxsize: int):
+        self.scope = scope
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _offer(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float = None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+class OrderEventBus:
+    # In-process fan-out of order status changes to subscribers scoped by
+    # ("customer", user_id), ("restaurant", restaurant_id) or
+    # ("delivery_partner", partner_id). publish() is safe to call from the sync
+    # route threadpool; delivery hops onto each subscriber's event loop.
+
+    def __init__(self, queue_size: int = ORDER_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._published = 0
+
+    def subscribe(self, scope: tuple) -> Subscriber:
+        subscriber = Subscriber(scope, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(scope, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.scope)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.scope]
+
+    def publish(self, event: dict):
+        scopes = [("customer", event["user_id"]), ("restaurant", event["restaurant_id"])]
+        if event["delivery_partner_id"]:
+            scopes.append(("delivery_partner", event["delivery_partner_id"]))
+
+        with self._lock:
+            self._published += 1
+            targets = [s for scope in scopes for s in self._subscribers.get(scope, ())]
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber._offer, event)
+            except RuntimeError:
+                # Event loop already closed; the connection is going away
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = [s for group in self._subscribers.values() for s in group]
+            return {
+                "subscribers": len(subscribers),
+                "published": self._published,
+                "dropped": sum(s.dropped for s in subscribers)
+            }
+
+# Subscribers only see events published by the same worker process
+order_events = OrderEventBus()
@@ -0,0 +1,68 @@
+import threading
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from .config import EXPORT_MAX_CONCURRENT
+
+class ExportLimiter:
+    # Caps concurrent streaming exports (orders and menus). Each one holds a
+    # connection from the export pool (see app/database.py) until its last byte,
+    # so the pool has one connection per slot. A slot is taken before the
+    # response starts, and an export that finds none gets 503 straight away
+    # rather than waiting on the pool. The slot is given back when the body
+    # finishes or is closed, or once the response is done if the body never ran.
+
+    def __init__(self, max_concurrent: int = EXPORT_MAX_CONCURRENT):
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._active >= self.max_concurrent:
+                self._rejected += 1
+                return False
+            self._active += 1
+            return True
+
+    def _releaser(self):
+        released = [False]
+
+        def release():
+            with self._lock:
+                if not released[0]:
+                    released[0] = True
+                    self._active -= 1
+                    self._completed += 1
+        return release
+
+    def _body(self, body, release):
+        try:
+            yield from body
+        finally:
+            release()
+
+    def stream(self, body, media_type: str, filename: str) -> StreamingResponse:
+        if not self._acquire():
+            body.close()
+            raise HTTPException(status_code=503, detail="Too many exports in progress, please retry")
+        release = self._releaser()
+        return StreamingResponse(
+            self._body(body, release),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            background=BackgroundTask(release)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self._active,
+                "max_concurrent": self.max_concurrent,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+export_limiter = ExportLimiter()
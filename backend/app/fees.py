@@ -0,0 +1,126 @@
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .config import FEE_SNAPSHOT_REFRESH_SECONDS
+from .models.fee_snapshot import FeeSnapshot
+from .models.platform_fee import PlatformFee
+from .models.restaurant import Restaurant
+
+@dataclass(frozen=True)
+class Fees:
+    version: int
+    platform_fee_value: Optional[float]
+    platform_fee_is_percentage: bool
+    restaurant_rates: MappingProxyType
+
+    def platform_fees(self, total_amount: float) -> float:
+        if self.platform_fee_value is None:
+            return 0.0
+        if self.platform_fee_is_percentage:
+            return total_amount * (self.platform_fee_value / 100)
+        return self.platform_fee_value
+
+    def restaurant_fees(self, restaurant_id: int, total_amount: float) -> float:
+        rate = self.restaurant_rates.get(restaurant_id)
+        return total_amount * (rate / 100) if rate else 0.0
+
+def _active_platform_fee(db: Session):
+    return db.query(PlatformFee).filter(PlatformFee.is_active == True).order_by(PlatformFee.id).first()
+
+def record_fee_change(db: Session, reason: str, restaurant: Restaurant = None):
+    # Adds a new fee version to the caller's transaction, next to the fee change itself
+    platform_fee = _active_platform_fee(db)
+    db.add(FeeSnapshot(
+        reason=reason,
+        platform_fee_id=platform_fee.id if platform_fee else None,
+        platform_fee_value=platform_fee.fee_value if platform_fee else None,
+        platform_fee_is_percentage=platform_fee.is_percentage if platform_fee else False,
+        restaurant_id=restaurant.id if restaurant else None,
+        restaurant_fee_rate=restaurant.restaurant_fees if restaurant else None
+    ))
+
+def record_initial_snapshot(db: Session):
+    # The first version records every restaurant's rate as it stands, one row
+    # each, so orders priced before any later change can still be reproduced
+    restaurants = db.query(Restaurant).order_by(Restaurant.id).all()
+    for restaurant in restaurants or [None]:
+        record_fee_change(db, "initial", restaurant=restaurant)
+
+def fees_at_version(db: Session, version: int) -> Optional[Fees]:
+    # The fees an order priced at `version` paid, for audit: the platform fee
+    # recorded in that snapshot, and each restaurant's rate from its latest row
+    # at or before it. A restaurant whose rows all come later never changed rate
+    # before then, so its first ("initial") row holds the rate it had.
+    snapshot = db.query(FeeSnapshot).filter(FeeSnapshot.version == version).first()
+    if not snapshot:
+        return None
+    latest = (
+        db.query(FeeSnapshot.restaurant_id, func.max(FeeSnapshot.version).label("version"))
+        .filter(FeeSnapshot.restaurant_id.isnot(None), FeeSnapshot.version <= version)
+        .group_by(FeeSnapshot.restaurant_id)
+        .subquery()
+    )
+    rates = {
+        restaurant_id: float(rate or 0)
+        for restaurant_id, rate in db.query(FeeSnapshot.restaurant_id, FeeSnapshot.restaurant_fee_rate)
+        .join(latest, (latest.c.restaurant_id == FeeSnapshot.restaurant_id) & (latest.c.version == FeeSnapshot.version))
+    }
+    initial = db.query(FeeSnapshot.restaurant_id, FeeSnapshot.restaurant_fee_rate).filter(
+        FeeSnapshot.reason == "initial", FeeSnapshot.restaurant_id.isnot(None), FeeSnapshot.version > version
+    )
+    for restaurant_id, rate in initial:
+        rates.setdefault(restaurant_id, float(rate or 0))
+    return Fees(
+        version=version,
+        platform_fee_value=float(snapshot.platform_fee_value) if snapshot.platform_fee_value is not None else None,
+        platform_fee_is_percentage=bool(snapshot.platform_fee_is_percentage),
+        restaurant_rates=MappingProxyType(rates)
+    )
+
+class FeeSnapshotCache:
+    # Holds one immutable Fees object. Rebuilds swap the reference in a single
+    # assignment, so readers always see a complete snapshot.
+
+    def __init__(self, refresh_seconds: float = FEE_SNAPSHOT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _build(self, db: Session) -> Fees:
+        version = db.query(FeeSnapshot.version).order_by(FeeSnapshot.version.desc()).limit(1).scalar()
+        if version is None:
+            record_initial_snapshot(db)
+            db.commit()
+            version = db.query(FeeSnapshot.version).order_by(FeeSnapshot.version.desc()).limit(1).scalar()
+
+        platform_fee = _active_platform_fee(db)
+        rates = {
+            restaurant_id: float(rate or 0)
+            for restaurant_id, rate in db.query(Restaurant.id, Restaurant.restaurant_fees)
+        }
+        return Fees(
+            version=version,
+            platform_fee_value=float(platform_fee.fee_value) if platform_fee else None,
+            platform_fee_is_percentage=bool(platform_fee.is_percentage) if platform_fee else False,
+            restaurant_rates=MappingProxyType(rates)
+        )
+
+    def rebuild(self, db: Session) -> Fees:
+        with self._lock:
+            self._snapshot = self._build(db)
+            self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    def current(self, db: Session) -> Fees:
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            return self.rebuild(db)
+        return snapshot
+
+# Other worker processes pick up fee changes on their next periodic refresh
+fee_snapshots = FeeSnapshotCache()
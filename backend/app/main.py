@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.engine import Engine
 from .database import engine, Base
+from .metrics import MetricsMiddleware, request_metrics
+from .profiling import ProfilingMiddleware, request_profiler
+from .migrations import run_migrations
 
 # Import all models to ensure they are registered with SQLAlchemy
 from .models.user import User
@@ -12,9 +17,13 @@ from .models.complaint import Complaint
 from .models.offer import Offer
 from .models.platform_fee import PlatformFee
 from .models.admin import Admin
+from .models.cart import CartEntry
+from .models.fee_snapshot import FeeSnapshot
+from .models.revenue_rollup import RevenueRollup
 
-# Create database tables
+# Create database tables, then bring existing databases up to date
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,8 +43,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so request timing covers the other middleware too
+app.add_middleware(MetricsMiddleware)
+# Every engine, including the write queue's, which is only created on first use
+request_metrics.instrument(Engine)
+request_profiler.instrument(Engine)
+
 # Include routers
-from .routes import auth, admin, restaurant_routes, customer, delivery, support
+from .routes import auth, admin, restaurant_routes, customer, delivery, support, events
+from .passwords import password_pool
+from .write_queue import write_queue
+from .pin_codes import pin_code_index
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
@@ -43,6 +62,8 @@ app.include_router(restaurant_routes.router, prefix="/api/v1/restaurant", tags=[
 app.include_router(customer.router, prefix="/api/v1/customer", tags=["Customer"])
 app.include_router(delivery.router, prefix="/api/v1/delivery", tags=["Delivery"])
 app.include_router(support.router, prefix="/api/v1/support", tags=["Support"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["Events"])
+request_profiler.instrument_routes(app)
 
 @app.get("/")
 async def root():
@@ -53,6 +74,24 @@ async def root():
         "status": "running"
     }
 
+@app.on_event("startup")
+def load_pin_codes():
+    pin_code_index.load_file()
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    password_pool.shutdown()
+
+@app.on_event("shutdown")
+def shutdown_write_queue():
+    # Lets queued writes commit before the process exits
+    write_queue.shutdown()
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Async so it renders on the event loop thread, which owns the route stats
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
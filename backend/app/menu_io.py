@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+from typing import Optional
+from pydantic import BaseModel, ValidationError, confloat, constr
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from .config import MENU_IMPORT_CHUNK_SIZE, MENU_IMPORT_MAX_ROWS
+from .database import ExportSessionLocal
+from .models.dish import Dish
+
+# Bulk menu transfer. Import and export share one column set, so an exported
+# menu can be edited and uploaded again as-is.
+MENU_COLUMNS = ["name", "description", "price", "category", "photo_path", "availability"]
+FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 100
+EXPORT_CHUNK_SIZE = 500
+
+class DishRow(BaseModel):
+    name: constr(strip_whitespace=True, min_length=1, max_length=100)
+    price: confloat(gt=0)
+    description: Optional[str] = None
+    category: Optional[constr(max_length=50)] = None
+    photo_path: Optional[constr(max_length=255)] = None
+    availability: Optional[bool] = None
+
+def detect_format(requested: Optional[str], filename: Optional[str]) -> Optional[str]:
+    if requested:
+        return requested if requested in FORMATS else None
+    suffix = (filename or "").rsplit(".", 1)[-1].lower()
+    return {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}.get(suffix)
+
+def iter_records(binary_file, fmt: str):
+    # Yields (row_number, dict) one record at a time straight from the upload,
+    # so memory does not grow with the file. CSV row numbers are physical line
+    # numbers (the header is line 1); NDJSON skips blank lines.
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text_file)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(text_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"invalid JSON: {e}")
+            continue
+        yield line_number, record if isinstance(record, dict) else ValueError("each line must be a JSON object")
+
+def validate_record(record: dict) -> dict:
+    # Blank or missing optional fields are left out, so an update keeps the
+    # dish's current value and an insert takes the column default
+    values = {key: record.get(key) for key in MENU_COLUMNS}
+    values = {key: value for key, value in values.items() if value is not None and value != ""}
+    row = DishRow(**values)
+    return row.model_dump(include=set(values) | {"name", "price"})
+
+def _error_messages(error: Exception) -> list:
+    if isinstance(error, ValidationError):
+        return [f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()]
+    return [str(error)]
+
+def import_chunk(db: Session, restaurant_id: int, rows: list) -> dict:
+    # Write unit: upserts one chunk of validated rows keyed on (restaurant_id, name).
+    # Existing dishes are found with one lookup on ix_dishes_restaurant_name, then
+    # new dishes go in as one batched INSERT and the rest as one batched UPDATE.
+    # A name repeated within the chunk is merged, later values winning.
+    by_name = {}
+    for row in rows:
+        by_name.setdefault(row["name"], {}).update(row)
+    existing = dict(
+        db.query(Dish.name, Dish.id).filter(Dish.restaurant_id == restaurant_id, Dish.name.in_(list(by_name)))
+    )
+    new_rows = [{"restaurant_id": restaurant_id, "availability": True, **row} for name, row in by_name.items() if name not in existing]
+    changed_rows = [{"id": existing[name], **row} for name, row in by_name.items() if name in existing]
+    if new_rows:
+        db.execute(insert(Dish), new_rows)
+    if changed_rows:
+        db.execute(update(Dish), changed_rows)
+    return {"created": len(new_rows), "updated": len(changed_rows)}
+
+def import_menu(binary_file, fmt: str, restaurant_id: int, write, chunk_size: int = MENU_IMPORT_CHUNK_SIZE, max_rows: int = MENU_IMPORT_MAX_ROWS) -> dict:
+    # Streams the upload through validation and writes each chunk of valid rows
+    # in its own transaction via `write` (write_queue.run in the app). Invalid
+    # rows are reported with their row number and skipped; valid rows still go in.
+    report = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(row_number: int, record, messages: list):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            name = record.get("name") if isinstance(record, dict) else None
+            report["errors"].append({"row": row_number, "name": name, "errors": messages})
+        else:
+            report["errors_truncated"] = True
+
+    def flush(chunk: list):
+        if chunk:
+            counts = write(import_chunk, restaurant_id, chunk)
+            report["created"] += counts["created"]
+            report["updated"] += counts["updated"]
+
+    chunk = []
+    records = iter_records(binary_file, fmt)
+    while True:
+        try:
+            row_number, record = next(records)
+        except StopIteration:
+            break
+        except (UnicodeDecodeError, csv.Error) as e:
+            # The rest of the file cannot be read; keep what was already imported
+            fail(report["rows"] + 1, None, [f"file: {e}"])
+            break
+        report["rows"] += 1
+        if report["rows"] > max_rows:
+            report["rows"] -= 1
+            fail(row_number, None, [f"file: more than {max_rows} rows; the rest was not imported"])
+            break
+        if isinstance(record, Exception):
+            fail(row_number, None, _error_messages(record))
+            continue
+        try:
+            chunk.append(validate_record(record))
+        except ValidationError as e:
+            fail(row_number, record, _error_messages(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+    return report
+
+def _export_row(dish) -> dict:
+    row = {column: getattr(dish, column) for column in MENU_COLUMNS}
+    row["price"] = float(dish.price)
+    return row
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+def export_menu(restaurant_id: int, fmt: str):
+    # Generator for a StreamingResponse: reads the menu in id order a chunk at a
+    # time on its own export session, so memory stays flat for any menu size
+    db = ExportSessionLocal()
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(MENU_COLUMNS)
+        last_id = 0
+        while True:
+            dishes = (
+                db.query(Dish.id, *[getattr(Dish, column) for column in MENU_COLUMNS])
+                .filter(Dish.restaurant_id == restaurant_id, Dish.id > last_id)
+                .order_by(Dish.id)
+                .limit(EXPORT_CHUNK_SIZE)
+                .all()
+            )
+            if not dishes:
+                break
+            last_id = dishes[-1].id
+            if fmt == "csv":
+                for dish in dishes:
+                    writer.writerow([_csv_value(value) for value in _export_row(dish).values()])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                yield "".join(json.dumps(_export_row(dish)) + "\n" for dish in dishes)
+        if fmt == "csv" and buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
@@ -0,0 +1,194 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import event
+from .config import METRICS_LATENCY_BUCKETS
+
+# Statements per request; an N+1 route shows up as requests in the top buckets
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+PREFIX = "food_delivery"
+UNMATCHED_ROUTE = "unmatched"
+
+class _QueryTally:
+    # SQL issued on behalf of one request, or by one thread outside any request
+    __slots__ = ("statements", "seconds", "started")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.started = 0.0
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+class _RouteStats:
+    __slots__ = ("statuses", "latency", "statements", "db_seconds")
+
+    def __init__(self, latency_bounds):
+        self.statuses = {}
+        self.latency = _Histogram(latency_bounds)
+        self.statements = _Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = 0.0
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class RequestMetrics:
+    # Per-route request latency, status codes and SQL work, in Prometheus text
+    # format. Each request carries a _QueryTally in a context variable; engine
+    # hooks add every statement to the tally of the request that issued it,
+    # including work the request hands to the write queue. When the request
+    # finishes, the middleware folds its tally into the route's stats. Routes
+    # are only ever updated from the event loop thread, so the counters need no
+    # lock. Statements outside any request (batch BEGINs, startup) go to a
+    # per-thread tally, each written only by its own thread.
+
+    def __init__(self, latency_buckets=METRICS_LATENCY_BUCKETS):
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self._routes = {}
+        self._current = contextvars.ContextVar("query_tally", default=None)
+        self._thread_tally = threading.local()
+        self._background = []
+        self._engines = set()
+
+    def instrument(self, engine):
+        # An Engine instance, or the Engine class for every engine
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _tally(self) -> _QueryTally:
+        tally = self._current.get()
+        if tally is None:
+            tally = getattr(self._thread_tally, "tally", None)
+            if tally is None:
+                tally = self._thread_tally.tally = _QueryTally()
+                self._background.append(tally)
+        return tally
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        tally = self._tally()
+        tally.statements += 1
+        tally.started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        tally = self._tally()
+        tally.seconds += time.perf_counter() - tally.started
+
+    def start_request(self):
+        tally = _QueryTally()
+        return tally, self._current.set(tally)
+
+    def finish_request(self, method: str, route: str, status: int, elapsed: float, tally: _QueryTally, token):
+        self._current.reset(token)
+        stats = self._routes.get((method, route))
+        if stats is None:
+            stats = self._routes[(method, route)] = _RouteStats(self.latency_buckets)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.latency.observe(elapsed)
+        stats.statements.observe(tally.statements)
+        stats.db_seconds += tally.seconds
+
+    def _histogram_lines(self, lines: list, name: str, labels: str, histogram: _Histogram):
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {_number(histogram.total)}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def render(self) -> str:
+        # Called from the event loop thread, like finish_request, so the route
+        # stats it reads are never half updated
+        routes = sorted(self._routes.items(), key=lambda item: (item[0][1], item[0][0]))
+        lines = [
+            f"# HELP {PREFIX}_http_requests_total Requests by route template, method and status code.",
+            f"# TYPE {PREFIX}_http_requests_total counter",
+        ]
+        for (method, route), stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'{PREFIX}_http_requests_total{{method="{method}",route="{_label(route)}",status="{status}"}} {count}')
+
+        lines += [
+            f"# HELP {PREFIX}_http_request_duration_seconds Request latency by route template and method.",
+            f"# TYPE {PREFIX}_http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in routes:
+            self._histogram_lines(lines, f"{PREFIX}_http_request_duration_seconds", f'method="{method}",route="{_label(route)}"', stats.latency)
+
+        lines += [
+            f"# HELP {PREFIX}_db_statements_per_request SQL statements issued per request, by route template and method.",
+            f"# TYPE {PREFIX}_db_statements_per_request histogram",
+        ]
+        for (method, route), stats in routes:
+            self._histogram_lines(lines, f"{PREFIX}_db_statements_per_request", f'method="{method}",route="{_label(route)}"', stats.statements)
+
+        lines += [
+            f"# HELP {PREFIX}_db_seconds_total Time spent executing SQL, by route template and method.",
+            f"# TYPE {PREFIX}_db_seconds_total counter",
+        ]
+        for (method, route), stats in routes:
+            lines.append(f'{PREFIX}_db_seconds_total{{method="{method}",route="{_label(route)}"}} {_number(stats.db_seconds)}')
+
+        background = list(self._background)
+        lines += [
+            f"# HELP {PREFIX}_db_background_statements_total SQL statements issued outside any request.",
+            f"# TYPE {PREFIX}_db_background_statements_total counter",
+            f"{PREFIX}_db_background_statements_total {sum(tally.statements for tally in background)}",
+            f"# HELP {PREFIX}_db_background_seconds_total Time spent executing SQL outside any request.",
+            f"# TYPE {PREFIX}_db_background_seconds_total counter",
+            f"{PREFIX}_db_background_seconds_total {_number(sum(tally.seconds for tally in background))}",
+        ]
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    # Plain ASGI middleware rather than BaseHTTPMiddleware, which would run each
+    # request in an extra task and buffer streaming responses. Timing stops when
+    # the app returns, so streamed exports and event streams are timed to
+    # their last byte.
+
+    def __init__(self, app, metrics: RequestMetrics = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        tally, token = self.metrics.start_request()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route is only known once the router has matched the request
+            route = scope.get("route")
+            self.metrics.finish_request(scope["method"], route.path if route is not None else UNMATCHED_ROUTE, status[0], time.perf_counter() - start, tally, token)
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,134 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+# Versioned schema changes that create_all cannot make on an existing database.
+# Each migration runs once per database, in its own transaction, and is recorded
+# in schema_migrations. Append new migrations; never edit or reorder old ones.
+# Statements must be safe on a fresh database, where create_all has already
+# built the current models (hence IF NOT EXISTS and the column checks).
+
+def _add_column(conn, table: str, column: str, column_type: str):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+def _order_fee_snapshot_version(conn):
+    _add_column(conn, "orders", "fee_snapshot_version", "INTEGER")
+
+def _hot_query_indexes(conn):
+    # order_items lookups by order, and the keyset-paginated order lists
+    # (filter columns first, order_date last; SQLite appends the rowid)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_restaurant_status_date ON orders (restaurant_id, status, order_date)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_partner_status_date ON orders (delivery_partner_id, status, order_date)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_user_date ON orders (user_id, order_date)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_delivery_partners_pin_availability ON delivery_partners (pin_code, availability)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_complaints_user_date ON complaints (user_id, created_at)"))
+    conn.execute(text("ANALYZE"))
+
+def _dish_search_index(conn):
+    # FTS5 index behind /customer/search (see app/search.py). rowid is the dish
+    # id; restaurant name and pin code are copied in so one MATCH can rank across
+    # restaurant names and scope to an area. Triggers keep it in step with writes.
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS dish_search USING fts5("
+        "name, description, category, restaurant_name, pin_code, restaurant_id UNINDEXED, "
+        "prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+    ))
+    # Column weights for ORDER BY rank: dish name counts most, pin_code never
+    conn.execute(text("INSERT INTO dish_search (dish_search, rank) VALUES ('rank', 'bm25(10.0, 2.0, 4.0, 5.0, 0.0, 0.0)')"))
+    new_row = (
+        "INSERT INTO dish_search (rowid, name, description, category, restaurant_name, pin_code, restaurant_id) "
+        "SELECT new.id, new.name, coalesce(new.description, ''), coalesce(new.category, ''), r.name, r.pin_code, r.id "
+        "FROM restaurants r WHERE r.id = new.restaurant_id;"
+    )
+    conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS dishes_search_insert AFTER INSERT ON dishes BEGIN {new_row} END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS dishes_search_update AFTER UPDATE OF name, description, category, restaurant_id ON dishes BEGIN "
+        f"DELETE FROM dish_search WHERE rowid = old.id; {new_row} END"
+    ))
+    conn.execute(text("CREATE TRIGGER IF NOT EXISTS dishes_search_delete AFTER DELETE ON dishes BEGIN DELETE FROM dish_search WHERE rowid = old.id; END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS restaurants_search_update AFTER UPDATE OF name, pin_code ON restaurants BEGIN "
+        "UPDATE dish_search SET restaurant_name = new.name, pin_code = new.pin_code WHERE restaurant_id = new.id; END"
+    ))
+    conn.execute(text(
+        "INSERT INTO dish_search (rowid, name, description, category, restaurant_name, pin_code, restaurant_id) "
+        "SELECT d.id, d.name, coalesce(d.description, ''), coalesce(d.category, ''), r.name, r.pin_code, r.id "
+        "FROM dishes d JOIN restaurants r ON r.id = d.restaurant_id "
+        "WHERE d.id NOT IN (SELECT rowid FROM dish_search)"
+    ))
+
+def _complaint_queue_indexes(conn):
+    # The support queue: filtered by status, or across all statuses, newest first
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_complaints_status_date ON complaints (status, created_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_complaints_created_at ON complaints (created_at)"))
+    conn.execute(text("ANALYZE complaints"))
+
+def _dish_name_index(conn):
+    # Bulk menu import matches rows to existing dishes by (restaurant_id, name)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_dishes_restaurant_name ON dishes (restaurant_id, name)"))
+
+def _order_date_indexes(conn):
+    # The order export walks orders in order_date order, for all restaurants or one
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_order_date ON orders (order_date)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_restaurant_date ON orders (restaurant_id, order_date)"))
+    conn.execute(text("ANALYZE orders"))
+
+def _initial_restaurant_rates(conn):
+    # Databases whose first fee snapshot held only the platform fee: record the
+    # rate of every restaurant with no snapshot row yet. Any rate change would
+    # have written a row, so these rates are the ones those restaurants always
+    # had (see fees_at_version in app/fees.py). Each row carries the platform fee
+    # of the latest snapshot, like every other row.
+    if not inspect(conn).has_table("fee_snapshots"):
+        return
+    conn.execute(text(
+        "INSERT INTO fee_snapshots (reason, platform_fee_id, platform_fee_value, platform_fee_is_percentage, restaurant_id, restaurant_fee_rate) "
+        "SELECT 'initial', s.platform_fee_id, s.platform_fee_value, s.platform_fee_is_percentage, r.id, r.restaurant_fees "
+        "FROM restaurants r, (SELECT * FROM fee_snapshots ORDER BY version DESC LIMIT 1) s "
+        "WHERE NOT EXISTS (SELECT 1 FROM fee_snapshots f WHERE f.restaurant_id = r.id) "
+        "ORDER BY r.id"
+    ))
+
+MIGRATIONS = [
+    (1, "order_fee_snapshot_version", _order_fee_snapshot_version),
+    (2, "hot_query_indexes", _hot_query_indexes),
+    (3, "dish_search_index", _dish_search_index),
+    (4, "complaint_queue_indexes", _complaint_queue_indexes),
+    (5, "dish_name_index", _dish_name_index),
+    (6, "order_date_indexes", _order_date_indexes),
+    (7, "initial_restaurant_rates", _initial_restaurant_rates),
+]
+
+def _ensure_table(bind):
+    with bind.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR(100) NOT NULL, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+
+def applied_versions(bind) -> set:
+    _ensure_table(bind)
+    with bind.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+def run_migrations(bind) -> list:
+    # Returns the names of the migrations applied by this call
+    applied = applied_versions(bind)
+    ran = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with bind.begin() as conn:
+                # Recording the version first takes the write lock, so when several
+                # workers start at once only one of them applies each migration
+                conn.execute(text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"), {"version": version, "name": name})
+                migrate(conn)
+        except IntegrityError:
+            continue
+        ran.append(name)
+    return ran
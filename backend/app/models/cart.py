@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer
+from ..database import Base
+
+class CartEntry(Base):
+    __tablename__ = "cart_items"
+    # One narrow row per (user, dish); the composite key doubles as the lookup index
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    user_id = Column(Integer, primary_key=True)
+    dish_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False)
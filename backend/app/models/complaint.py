@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 class Complaint(Base):
     __tablename__ = "complaints"
+    # Kept in step with the hot_query_indexes and complaint_queue_indexes
+    # migrations (app/migrations.py)
+    __table_args__ = (
+        Index("ix_complaints_user_date", "user_id", "created_at"),
+        Index("ix_complaints_status_date", "status", "created_at"),
+        Index("ix_complaints_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 class DeliveryPartner(Base):
     __tablename__ = "delivery_partners"
+    # Kept in step with the hot_query_indexes migration (app/migrations.py)
+    __table_args__ = (
+        Index("ix_delivery_partners_pin_availability", "pin_code", "availability"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 class Dish(Base):
     __tablename__ = "dishes"
+    # Kept in step with the dish_name_index migration (app/migrations.py)
+    __table_args__ = (
+        Index("ix_dishes_restaurant_name", "restaurant_id", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False, index=True)
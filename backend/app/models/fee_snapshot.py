@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Boolean
+from sqlalchemy.sql import func
+from ..database import Base
+
+class FeeSnapshot(Base):
+    __tablename__ = "fee_snapshots"
+
+    # One row per fee configuration change; orders record the version they were priced with
+    version = Column(Integer, primary_key=True, index=True)
+    reason = Column(String(100), nullable=False)
+    platform_fee_id = Column(Integer)
+    platform_fee_value = Column(Numeric(10, 2))
+    platform_fee_is_percentage = Column(Boolean, default=False)
+    restaurant_id = Column(Integer)
+    restaurant_fee_rate = Column(Numeric(10, 2))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
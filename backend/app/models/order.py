@@ -1,9 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 class Order(Base):
     __tablename__ = "orders"
+    # Kept in step with the hot_query_indexes and order_date_indexes migrations
+    # (app/migrations.py)
+    __table_args__ = (
+        Index("ix_orders_restaurant_status_date", "restaurant_id", "status", "order_date"),
+        Index("ix_orders_partner_status_date", "delivery_partner_id", "status", "order_date"),
+        Index("ix_orders_user_date", "user_id", "order_date"),
+        Index("ix_orders_order_date", "order_date"),
+        Index("ix_orders_restaurant_date", "restaurant_id", "order_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
@@ -21,12 +30,13 @@ class Order(Base):
     delivery_pin_code = Column(String(10), nullable=False)
     order_date = Column(DateTime(timezone=True), server_default=func.now())
     delivered_at = Column(DateTime(timezone=True))
+    fee_snapshot_version = Column(Integer)
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
     dish_id = Column(Integer, ForeignKey('dishes.id'), nullable=False)
     dish_name = Column(String(100), nullable=False)
     quantity = Column(Integer, nullable=False)
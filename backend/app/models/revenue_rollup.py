@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+class RevenueRollup(Base):
+    __tablename__ = "revenue_rollups"
+    # One row per (granularity, dimension, key, bucket); the unique key is also
+    # the lookup index for a dashboard series
+    __table_args__ = (
+        UniqueConstraint("granularity", "dimension", "dimension_key", "bucket", name="uq_revenue_rollups_series"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(5), nullable=False)  # "hour" or "day"
+    dimension = Column(String(10), nullable=False)  # "all", "restaurant" or "pin_code"
+    dimension_key = Column(String(20), nullable=False)  # restaurant id, pin code, or "" for "all"
+    bucket = Column(String(16), nullable=False)  # "YYYY-MM-DD HH:00" or "YYYY-MM-DD"
+    delivered_orders = Column(Integer, nullable=False, default=0)
+    cancelled_orders = Column(Integer, nullable=False, default=0)
+    gross_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    restaurant_fees = Column(Numeric(12, 2), nullable=False, default=0)
+    platform_fees = Column(Numeric(12, 2), nullable=False, default=0)
+    delivery_charges = Column(Numeric(12, 2), nullable=False, default=0)
+    discount_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    final_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    cancelled_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
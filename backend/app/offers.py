@@ -0,0 +1,166 @@
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from .config import OFFER_INDEX_REFRESH_SECONDS
+from .models.offer import Offer
+
+@dataclass(frozen=True)
+class OfferRule:
+    id: int
+    code: str
+    description: Optional[str]
+    discount_type: str
+    discount_value: float
+    min_order_value: float
+    max_discount: Optional[float]
+    restaurant_id: Optional[int]
+    offer_type: str
+    valid_from: Optional[datetime]
+    valid_until: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, offer: Offer) -> "OfferRule":
+        return cls(
+            id=offer.id,
+            code=offer.code,
+            description=offer.description,
+            discount_type=offer.discount_type,
+            discount_value=float(offer.discount_value),
+            min_order_value=float(offer.min_order_value or 0),
+            max_discount=float(offer.max_discount) if offer.max_discount else None,
+            restaurant_id=offer.restaurant_id,
+            offer_type=offer.offer_type,
+            valid_from=offer.valid_from,
+            valid_until=offer.valid_until
+        )
+
+@dataclass(frozen=True)
+class OfferResult:
+    valid: bool
+    discount: float = 0.0
+    message: Optional[str] = None
+
+def evaluate_offer(rule: Optional[OfferRule], order_amount: float, restaurant_id: int) -> OfferResult:
+    # Single source of truth for offer eligibility and discount math
+    if rule is None:
+        return OfferResult(valid=False, message="Invalid offer code")
+
+    if rule.offer_type == "restaurant" and rule.restaurant_id != restaurant_id:
+        return OfferResult(valid=False, message="Offer not valid for this restaurant")
+
+    if order_amount < rule.min_order_value:
+        return OfferResult(valid=False, message=f"Minimum order value is {rule.min_order_value:.2f}")
+
+    if rule.discount_type == "percentage":
+        discount = order_amount * (rule.discount_value / 100)
+        if rule.max_discount:
+            discount = min(discount, rule.max_discount)
+    else:
+        discount = rule.discount_value
+
+    return OfferResult(valid=True, discount=discount)
+
+def rank_offers(rules: list, order_amount: float, restaurant_id: int) -> list:
+    # Evaluates every candidate against the same cart in one pass. Eligible offers
+    # come first, largest discount first; ineligible ones follow with the reason.
+    results = [(rule, evaluate_offer(rule, order_amount, restaurant_id)) for rule in rules]
+    results.sort(key=lambda pair: (not pair[1].valid, -pair[1].discount, pair[0].code))
+    return results
+
+class OfferIndex:
+    # Active offers held in memory, keyed by code and by restaurant. Offers that
+    # have not started yet wait in a start heap; live offers with an end date sit
+    # in an expiry heap, so enforcing validity windows only touches heap tops.
+    # Timestamps are naive UTC, matching what SQLite stores.
+
+    def __init__(self, refresh_seconds: float = OFFER_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._reset()
+
+    def _reset(self):
+        self._by_code = {}
+        self._platform = {}
+        self._by_restaurant = {}
+        self._starts = []
+        self._expiries = []
+
+    def _index(self, rule: OfferRule, now: datetime):
+        if rule.valid_until and rule.valid_until <= now:
+            return
+        if rule.valid_from and rule.valid_from > now:
+            heapq.heappush(self._starts, (rule.valid_from, rule.id, rule))
+            return
+        self._by_code[rule.code] = rule
+        if rule.offer_type == "restaurant":
+            self._by_restaurant.setdefault(rule.restaurant_id, {})[rule.code] = rule
+        else:
+            self._platform[rule.code] = rule
+        if rule.valid_until:
+            heapq.heappush(self._expiries, (rule.valid_until, rule.id, rule))
+
+    def _unindex(self, rule: OfferRule):
+        if self._by_code.get(rule.code) is rule:
+            del self._by_code[rule.code]
+        self._platform.pop(rule.code, None)
+        restaurant_offers = self._by_restaurant.get(rule.restaurant_id)
+        if restaurant_offers is not None:
+            restaurant_offers.pop(rule.code, None)
+
+    def _advance(self, now: datetime):
+        while self._expiries and self._expiries[0][0] <= now:
+            _, _, rule = heapq.heappop(self._expiries)
+            self._unindex(rule)
+        while self._starts and self._starts[0][0] <= now:
+            _, _, rule = heapq.heappop(self._starts)
+            self._index(rule, now)
+
+    def _ensure_loaded(self, db: Session):
+        stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+        if stale:
+            now = datetime.utcnow()
+            self._reset()
+            for offer in db.query(Offer).filter(Offer.is_active == True).all():
+                self._index(OfferRule.from_model(offer), now)
+            self._loaded_at = time.monotonic()
+        else:
+            self._advance(datetime.utcnow())
+
+    def get(self, db: Session, code: str) -> Optional[OfferRule]:
+        with self._lock:
+            self._ensure_loaded(db)
+            return self._by_code.get(code)
+
+    def applicable(self, db: Session, restaurant_id: int) -> list:
+        # Every live platform offer plus the given restaurant's own offers
+        with self._lock:
+            self._ensure_loaded(db)
+            return list(self._platform.values()) + list(self._by_restaurant.get(restaurant_id, {}).values())
+
+    def add(self, offer: Offer):
+        # Write-through for offers created in this process
+        if not offer.is_active:
+            return
+        with self._lock:
+            if self._loaded_at is not None:
+                self._index(OfferRule.from_model(offer), datetime.utcnow())
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._by_code),
+                "scheduled": len(self._starts),
+                "expiring": len(self._expiries)
+            }
+
+# Other worker processes pick up new offers on their next periodic refresh
+offer_index = OfferIndex()
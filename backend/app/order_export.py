@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from typing import Optional
+from sqlalchemy import Float, String, literal, select, type_coerce
+from .config import ORDER_EXPORT_BATCH_SIZE
+from .database import ExportSessionLocal
+from .models.order import Order, OrderItem
+
+# Order export for finance reconciliation. CSV has one line per order item, with
+# the order's columns repeated (an order without items gets one line with blank
+# item columns); NDJSON has one order per line with its items nested.
+FORMATS = ("csv", "ndjson")
+ORDER_COLUMNS = [
+    "id", "order_date", "delivered_at", "status", "restaurant_id", "user_id", "delivery_partner_id",
+    "delivery_pin_code", "payment_mode", "total_amount", "restaurant_fees", "platform_fees",
+    "delivery_charges", "discount_amount", "final_amount", "fee_snapshot_version"
+]
+ITEM_COLUMNS = ["dish_id", "dish_name", "quantity", "price"]
+CSV_COLUMNS = ["order_id" if c == "id" else c for c in ORDER_COLUMNS] + [f"item_{c}" for c in ITEM_COLUMNS]
+AMOUNT_COLUMNS = {"total_amount", "restaurant_fees", "platform_fees", "delivery_charges", "discount_amount", "final_amount", "price"}
+TIME_COLUMNS = {"order_date", "delivered_at"}
+
+def _selected(model, columns: list) -> list:
+    # Amounts are read as floats, skipping the Decimal round trip Numeric does
+    return [type_coerce(getattr(model, c), Float) if c in AMOUNT_COLUMNS else getattr(model, c) for c in columns]
+
+def _values(row, columns: list) -> dict:
+    # Rows are read by position; looking each column up by name was most of
+    # the export's CPU time
+    values = dict(zip(columns, row))
+    for column in TIME_COLUMNS.intersection(columns):
+        if values[column] is not None:
+            values[column] = values[column].isoformat()
+    return values
+
+def _time_literal(value):
+    # order_date is stored as naive UTC text ("YYYY-MM-DD HH:MM:SS"); a bound
+    # datetime would carry microseconds and miss rows exactly on the boundary
+    return literal(value.strftime("%Y-%m-%d %H:%M:%S"), String)
+
+def orders_query(start=None, end=None, restaurant_id: Optional[int] = None, status: Optional[str] = None):
+    # Walks ix_orders_order_date, or ix_orders_restaurant_date for one
+    # restaurant, so rows come back in index order with no sort step and the
+    # first batch is ready as soon as it is read. start is inclusive, end exclusive.
+    query = select(*_selected(Order, ORDER_COLUMNS))
+    if restaurant_id is not None:
+        query = query.where(Order.restaurant_id == restaurant_id)
+    if status:
+        query = query.where(Order.status == status)
+    if start is not None:
+        query = query.where(Order.order_date >= _time_literal(start))
+    if end is not None:
+        query = query.where(Order.order_date < _time_literal(end))
+    return query.order_by(Order.order_date, Order.id)
+
+def _items_by_order(conn, order_ids: list) -> dict:
+    items = {}
+    rows = conn.execute(
+        select(OrderItem.order_id, *_selected(OrderItem, ITEM_COLUMNS))
+        .where(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.order_id, OrderItem.id)
+    ).all()
+    for row in rows:
+        items.setdefault(row[0], []).append(_values(row[1:], ITEM_COLUMNS))
+    return items
+
+def _drain(buffer: io.StringIO) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+def _csv_lines(writer, buffer, orders: list, items: dict) -> str:
+    blank_item = [""] * len(ITEM_COLUMNS)
+    for order in orders:
+        order_values = ["" if v is None else v for v in order.values()]
+        for item in items.get(order["id"]) or [None]:
+            writer.writerow(order_values + (blank_item if item is None else ["" if v is None else v for v in item.values()]))
+    return _drain(buffer)
+
+def export_orders(fmt: str, start=None, end=None, restaurant_id: Optional[int] = None, status: Optional[str] = None, batch_size: int = ORDER_EXPORT_BATCH_SIZE):
+    # Generator for a StreamingResponse. The orders query runs once, on its own
+    # export session's connection, with yield_per, so rows are pulled from the
+    # cursor a batch at a time; each batch's items come from one IN lookup on
+    # order_items. Memory is bounded by the batch size, and the whole export
+    # reads one snapshot.
+    db = ExportSessionLocal()
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(CSV_COLUMNS)
+            yield _drain(buffer)
+        conn = db.connection()
+        result = conn.execute(orders_query(start, end, restaurant_id, status).execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            orders = [_values(row, ORDER_COLUMNS) for row in batch]
+            items = _items_by_order(conn, [order["id"] for order in orders])
+            if fmt == "csv":
+                yield _csv_lines(writer, buffer, orders, items)
+            else:
+                yield "".join(json.dumps({**order, "items": items.get(order["id"], [])}) + "\n" for order in orders)
+    finally:
+        db.close()
@@ -0,0 +1,84 @@
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import DateTime, String, and_, literal, or_, type_coerce
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(sort_value, row_id: int, with_sort_value: bool = True) -> str:
+    # The sort value is encoded explicitly, so a NULL one survives the round trip
+    raw = json.dumps([sort_value, row_id]) if with_sort_value else str(row_id)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str, with_sort_value: bool = True):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        if not with_sort_value:
+            return None, int(raw)
+        sort_value, row_id = json.loads(raw)
+        if sort_value is not None and not isinstance(sort_value, str):
+            raise ValueError(sort_value)
+        return (None if sort_value is None else literal(sort_value, String)), int(row_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after(sort_column, id_column, sort_value, row_id: int, descending: bool):
+    # Rows after (sort_value, row_id) in the page order. SQLite sorts NULLs
+    # first, so they open an ascending list and close a descending one.
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < row_id)
+        return or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < row_id),
+            sort_column.is_(None)
+        )
+    if sort_value is None:
+        return or_(and_(sort_column.is_(None), id_column > row_id), sort_column.isnot(None))
+    return or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > row_id)
+    )
+
+def paginate(query, id_column, limit: int, cursor: str = None, sort_column=None, descending: bool = True, key=None):
+    # Keyset pagination over (sort_column, id_column). `key` maps a result row to
+    # its (sort_value, id) pair and is only needed when the query returns tuples.
+    # SQLite compares timestamps as text, and the same whole second can be stored
+    # as "...:SS" (CURRENT_TIMESTAMP defaults) or "...:SS.000000" (Python
+    # datetimes), so the cursor keeps the boundary row's stored text rather than
+    # a re-formatted datetime; it is selected alongside the page.
+    stored_text = sort_column is not None and isinstance(sort_column.type, DateTime)
+    single_entity = len(query.column_descriptions) == 1
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, with_sort_value=sort_column is not None)
+        if sort_column is None:
+            query = query.filter(id_column < row_id if descending else id_column > row_id)
+        else:
+            query = query.filter(_after(sort_column, id_column, sort_value, row_id, descending))
+
+    order_columns = [id_column] if sort_column is None else [sort_column, id_column]
+    if descending:
+        order_columns = [column.desc() for column in order_columns]
+    if stored_text:
+        query = query.add_columns(type_coerce(sort_column, String).label("cursor_sort_value"))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(*order_columns).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if key is not None:
+            sort_value, row_id = key(last)
+        else:
+            entity = last[0] if stored_text else last
+            sort_value = getattr(entity, sort_column.key) if sort_column is not None else None
+            row_id = getattr(entity, id_column.key)
+        if stored_text:
+            sort_value = last[-1]
+        next_cursor = encode_cursor(sort_value, row_id, with_sort_value=sort_column is not None)
+
+    if stored_text:
+        rows = [row[0] if single_entity else tuple(row)[:-1] for row in rows]
+    return rows, next_cursor
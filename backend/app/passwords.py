@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from .config import BCRYPT_ROUNDS, PASSWORD_POOL_MAX_QUEUE, PASSWORD_POOL_WORKERS
+
+def make_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # Pinning min and max to the configured cost makes verify_and_update return a
+    # fresh hash whenever a stored hash was made with a different cost
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+_worker_contexts = {}
+
+def _worker_context(rounds: int) -> CryptContext:
+    context = _worker_contexts.get(rounds)
+    if context is None:
+        context = _worker_contexts[rounds] = make_context(rounds)
+    return context
+
+def _hash_in_worker(password: str, rounds: int) -> str:
+    return _worker_context(rounds).hash(password)
+
+def _verify_in_worker(password: str, password_hash: str, rounds: int):
+    return _worker_context(rounds).verify_and_update(password, password_hash)
+
+class PasswordPoolBusy(Exception):
+    pass
+
+class PasswordPool:
+    # bcrypt runs in its own worker processes so a login storm cannot tie up the
+    # threadpool that every sync route shares. At most `max_queue` jobs may wait
+    # beyond the running ones; anything past that is rejected right away.
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, max_queue: int = PASSWORD_POOL_MAX_QUEUE, rounds: int = BCRYPT_ROUNDS):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started on first use so scripts that import the app never spawn workers.
+        # By then the process runs the write queue, profiler and threadpool
+        # threads, and a forked child could inherit a lock one of them holds, so
+        # workers are spawned fresh instead.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordPoolBusy()
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._busy_seconds += time.perf_counter() - start
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_in_worker, password, self.rounds)
+
+    async def verify_and_update(self, password: str, password_hash: str):
+        # Returns (valid, new_hash); new_hash is set when the cost factor changed
+        return await self._run(_verify_in_worker, password, password_hash, self.rounds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.workers),
+                "max_queue": self.max_queue,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_ms": self._busy_seconds * 1000 / self._completed if self._completed else 0.0
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_pool = PasswordPool()
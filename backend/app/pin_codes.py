@@ -0,0 +1,92 @@
+import csv
+import math
+import os
+import threading
+import time
+from .config import NEARBY_MAX_DISTANCE_KM, NEARBY_MAX_PIN_CODES, PIN_CODES_FILE
+
+EARTH_RADIUS_KM = 6371.0
+
+def distance_km(a: tuple, b: tuple) -> float:
+    # Great-circle (haversine) distance between two (latitude, longitude) points
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+class PinCodeIndex:
+    # Nearest pin codes for every known pin code, precomputed from the centroid
+    # coordinates in PIN_CODES_FILE. Each pin code keeps up to max_neighbours
+    # others within max_distance_km, closest first, so a lookup is a dict hit.
+    # Pin codes missing from the file only match themselves.
+
+    def __init__(self, max_neighbours: int = NEARBY_MAX_PIN_CODES, max_distance_km: float = NEARBY_MAX_DISTANCE_KM):
+        self.max_neighbours = max_neighbours
+        self.max_distance_km = max_distance_km
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._source = None
+        self._build_ms = 0.0
+        self._neighbours = {}
+
+    def load_points(self, points: dict, source: str = None):
+        # points: {pin_code: (latitude, longitude)}
+        start = time.perf_counter()
+        # Bucket points into grid cells about max_distance_km tall, so each pin
+        # code is only compared against the cells that can be in range
+        cell_deg = self.max_distance_km / 111.0
+        grid = {}
+        for pin_code, point in points.items():
+            grid.setdefault((math.floor(point[0] / cell_deg), math.floor(point[1] / cell_deg)), []).append(pin_code)
+
+        neighbours = {}
+        for pin_code, point in points.items():
+            row, col = math.floor(point[0] / cell_deg), math.floor(point[1] / cell_deg)
+            # A degree of longitude shrinks towards the poles
+            col_span = math.ceil(1 / max(math.cos(math.radians(point[0])), 0.01))
+            in_range = []
+            for r in (row - 1, row, row + 1):
+                for c in range(col - col_span, col + col_span + 1):
+                    for other in grid.get((r, c), ()):
+                        if other == pin_code:
+                            continue
+                        distance = distance_km(point, points[other])
+                        if distance <= self.max_distance_km:
+                            in_range.append((distance, other))
+            in_range.sort()
+            neighbours[pin_code] = [(other, round(distance, 2)) for distance, other in in_range[:self.max_neighbours]]
+
+        with self._lock:
+            self._neighbours = neighbours
+            self._source = source
+            self._loaded = True
+            self._build_ms = (time.perf_counter() - start) * 1000
+
+    def load_file(self, path: str = PIN_CODES_FILE):
+        # CSV with pin_code, latitude and longitude columns; other columns are ignored
+        points = {}
+        if os.path.exists(path):
+            with open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    points[row["pin_code"].strip()] = (float(row["latitude"]), float(row["longitude"]))
+        self.load_points(points, source=path)
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.load_file()
+
+    def nearest(self, pin_code: str, count: int) -> list:
+        # The pin code itself at distance 0, then up to count - 1 nearest others
+        return [(pin_code, 0.0)] + self._neighbours.get(pin_code, [])[:max(count - 1, 0)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "source": self._source,
+                "pin_codes": len(self._neighbours),
+                "avg_neighbours": round(sum(len(n) for n in self._neighbours.values()) / len(self._neighbours), 1) if self._neighbours else 0,
+                "build_ms": round(self._build_ms, 2)
+            }
+
+# Read-only after startup, so every worker builds its own copy once
+pin_code_index = PinCodeIndex()
@@ -0,0 +1,294 @@
+import asyncio
+import contextvars
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from functools import wraps
+from sqlalchemy import event
+from .auth import decode_token
+from .config import PROFILE_INTERVAL_MS, PROFILE_MAX_CAPTURES, PROFILE_MAX_SECONDS, PROFILE_SAMPLE_RATE
+
+# Requests carrying an admin JWT in this header are always profiled
+PROFILE_HEADER = b"x-profile"
+# Distinct SQL statements kept per capture; the rest are counted together
+MAX_SQL_STATEMENTS = 200
+OTHER_SQL = "(other statements)"
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+class Capture:
+    __slots__ = (
+        "id", "trigger", "method", "path", "route", "status", "started_at", "start", "duration",
+        "loop_thread", "frame", "threads", "stacks", "samples", "truncated", "sql", "sql_started"
+    )
+
+    def __init__(self, capture_id: int, trigger: str, method: str, path: str, frame):
+        self.id = capture_id
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = None
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration = None
+        self.loop_thread = threading.get_ident()
+        self.frame = frame
+        # Other threads doing this request's work: ident -> (label, anchor frame)
+        self.threads = {}
+        self.stacks = {}
+        self.samples = 0
+        self.truncated = False
+        self.sql = {}
+        self.sql_started = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "samples": self.samples,
+            "truncated": self.truncated,
+            "sql_statements": sum(count for count, _ in self.sql.values()),
+            "sql_ms": round(sum(seconds for _, seconds in self.sql.values()) * 1000, 3)
+        }
+
+    def detail(self) -> dict:
+        sql = sorted(self.sql.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            **self.summary(),
+            "sql": [{"statement": statement, "count": count, "ms": round(seconds * 1000, 3)} for statement, (count, seconds) in sql]
+        }
+
+    def collapsed(self) -> str:
+        # One "frame;frame;frame count" line per distinct stack, root first, as
+        # read by flamegraph.pl, speedscope and inferno
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+class SamplingProfiler:
+    # Statistical profiler for single requests. A request is captured when it
+    # carries an admin token in X-Profile, or is picked at `sample_rate`. While
+    # any capture is running, a sampler thread wakes every `interval_ms` and
+    # reads every thread's stack with sys._current_frames(), keeping the stacks
+    # that belong to a capture: the event loop thread while it runs the
+    # request's coroutines (the middleware's frame is on the stack), and worker
+    # threads while they run its endpoint or write units (anchored through
+    # run_anchored). Stacks are wall-clock samples, so time blocked in SQLite
+    # shows up too. The SQL a capture issues is recorded through engine hooks.
+    # Finished captures go to a ring buffer of `max_captures`; sampling stops
+    # after `max_seconds`, so event streams cannot grow without bound.
+
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, interval_ms: float = PROFILE_INTERVAL_MS, max_captures: int = PROFILE_MAX_CAPTURES, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self._current = contextvars.ContextVar("profile_capture", default=None)
+        self._ids = itertools.count(1)
+        self._active = set()
+        self._captures = deque(maxlen=max(1, max_captures))
+        self._labels = {}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._engines = set()
+
+    def instrument(self, engine):
+        # An Engine instance, or the Engine class for every engine
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def instrument_routes(self, app):
+        # Sync endpoints run on worker threads; anchoring them lets the sampler
+        # tell which worker is busy with a captured request
+        for route in app.routes:
+            dependant = getattr(route, "dependant", None)
+            if dependant is not None and not asyncio.iscoroutinefunction(dependant.call):
+                dependant.call = self._anchored_endpoint(dependant.call)
+
+    def _anchored_endpoint(self, endpoint):
+        @wraps(endpoint)
+        def run(*args, **kwargs):
+            return self.run_anchored("worker", endpoint, *args, **kwargs)
+        return run
+
+    def run_anchored(self, label: str, fn, *args, **kwargs):
+        capture = self._current.get()
+        if capture is None:
+            return fn(*args, **kwargs)
+        ident = threading.get_ident()
+        capture.threads[ident] = (label, sys._getframe())
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            capture.threads.pop(ident, None)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        capture = self._current.get()
+        if capture is not None:
+            capture.sql_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        capture = self._current.get()
+        if capture is None:
+            return
+        elapsed = time.perf_counter() - capture.sql_started
+        entry = capture.sql.get(statement)
+        if entry is None:
+            if len(capture.sql) >= MAX_SQL_STATEMENTS:
+                statement = OTHER_SQL
+            entry = capture.sql.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run_sampler, name="profiler", daemon=True)
+                    self._thread.start()
+
+    def should_capture(self, scope):
+        # Returns the trigger ("header" or "sampled"), or None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                payload = decode_token(value.decode("latin-1"))
+                if payload is not None and payload.get("role") == "admin":
+                    return "header"
+                break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def start_capture(self, trigger: str, scope, frame):
+        self._ensure_started()
+        capture = Capture(next(self._ids), trigger, scope["method"], scope["path"], frame)
+        token = self._current.set(capture)
+        self._active.add(capture)
+        self._wake.set()
+        return capture, token
+
+    def finish_capture(self, capture: Capture, token, status: int, route):
+        self._current.reset(token)
+        self._active.discard(capture)
+        capture.duration = time.perf_counter() - capture.start
+        capture.status = status
+        capture.route = route.path if route is not None else None
+        capture.frame = None
+        self._captures.append(capture)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(_BACKEND_DIR):
+                filename = filename[len(_BACKEND_DIR):]
+            elif "site-packages" + os.sep in filename:
+                filename = filename.split("site-packages" + os.sep, 1)[1]
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+        return label
+
+    def _stack(self, frame, anchor):
+        # Frames below `anchor`, root first, or None if anchor is not on the stack
+        codes = []
+        while frame is not None and frame is not anchor:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        if frame is None:
+            return None
+        return ";".join(self._label(code) for code in reversed(codes))
+
+    def _record(self, capture: Capture, label: str, stack):
+        if stack:
+            key = f"{label};{stack}"
+            capture.stacks[key] = capture.stacks.get(key, 0) + 1
+            capture.samples += 1
+
+    def _sample(self, captures: list):
+        frames = sys._current_frames()
+        now = time.perf_counter()
+        for capture in captures:
+            if capture.duration is not None:
+                continue
+            if now - capture.start > self.max_seconds:
+                capture.truncated = True
+                continue
+            anchor = capture.frame
+            if anchor is not None:
+                self._record(capture, "event_loop", self._stack(frames.get(capture.loop_thread), anchor))
+            for ident, (label, anchor) in list(capture.threads.items()):
+                self._record(capture, label, self._stack(frames.get(ident), anchor))
+
+    def _run_sampler(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            captures = list(self._active)
+            if not captures:
+                self._wake.clear()
+                # A capture may have started between the check and the clear
+                if self._active:
+                    self._wake.set()
+                continue
+            self._sample(captures)
+
+    def captures(self) -> list:
+        return [capture.summary() for capture in reversed(list(self._captures))]
+
+    def get(self, capture_id: int):
+        for capture in list(self._captures):
+            if capture.id == capture_id:
+                return capture
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "active": len(self._active),
+            "retained": len(self._captures),
+            "max_captures": self._captures.maxlen
+        }
+
+class ProfilingMiddleware:
+    def __init__(self, app, profiler: SamplingProfiler = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self.profiler.should_capture(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        # This coroutine's frame is on the event loop thread's stack whenever
+        # the request's own code is running there
+        capture, token = self.profiler.start_capture(trigger, scope, sys._getframe())
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.finish_capture(capture, token, status[0], scope.get("route"))
+
+request_profiler = SamplingProfiler()
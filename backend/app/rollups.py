@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+from sqlalchemy import String, case, cast, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from .models.order import Order
+from .models.revenue_rollup import RevenueRollup
+
+# Revenue rollups behind the admin dashboard. An order is counted once, when it
+# is delivered or cancelled, in the hour and day it was placed (order_date), so
+# the incremental updates and a backfill from history always agree.
+GRANULARITIES = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d"}
+# Longest series one dashboard request may read
+MAX_BUCKETS = {"hour": 24 * 31, "day": 366}
+OUTCOMES = ("delivered", "cancelled")
+MEASURES = (
+    "delivered_orders", "cancelled_orders", "gross_amount", "restaurant_fees", "platform_fees",
+    "delivery_charges", "discount_amount", "final_amount", "cancelled_amount"
+)
+BACKFILL_CHUNK_SIZE = 5000
+
+_table = RevenueRollup.__table__
+_upsert = insert(_table)
+_upsert = _upsert.on_conflict_do_update(
+    index_elements=["granularity", "dimension", "dimension_key", "bucket"],
+    set_={**{m: _table.c[m] + _upsert.excluded[m] for m in MEASURES}, "updated_at": func.now()}
+)
+
+def _measures(order, outcome: str) -> dict:
+    # `order` is an Order or a row with the same columns
+    measures = dict.fromkeys(MEASURES, 0)
+    if outcome == "delivered":
+        measures.update(
+            delivered_orders=1,
+            gross_amount=float(order.total_amount or 0),
+            restaurant_fees=float(order.restaurant_fees or 0),
+            platform_fees=float(order.platform_fees or 0),
+            delivery_charges=float(order.delivery_charges or 0),
+            discount_amount=float(order.discount_amount or 0),
+            final_amount=float(order.final_amount or 0)
+        )
+    else:
+        measures.update(cancelled_orders=1, cancelled_amount=float(order.final_amount or 0))
+    return measures
+
+def _series_keys(order):
+    placed = order.order_date or datetime.utcnow()
+    for granularity, bucket_format in GRANULARITIES.items():
+        bucket = placed.strftime(bucket_format)
+        yield granularity, "all", "", bucket
+        yield granularity, "restaurant", str(order.restaurant_id), bucket
+        yield granularity, "pin_code", order.delivery_pin_code, bucket
+
+def _rows(totals: dict) -> list:
+    return [
+        {"granularity": granularity, "dimension": dimension, "dimension_key": key, "bucket": bucket, **measures}
+        for (granularity, dimension, key, bucket), measures in totals.items()
+    ]
+
+def record_order_outcome(db: Session, order: Order, outcome: str):
+    # Adds the order to its rollups inside the caller's transaction, next to the
+    # status change itself. Call once per order, when it is delivered or cancelled.
+    measures = _measures(order, outcome)
+    db.execute(_upsert, _rows({key: measures for key in _series_keys(order)}))
+
+def backfill(bind, chunk_size: int = BACKFILL_CHUNK_SIZE, progress=None) -> int:
+    # Rebuilds every rollup from the orders table. Orders are read in id order,
+    # chunk_size at a time, and each chunk's totals are added in a short write
+    # transaction, so memory and lock hold times stay flat however long the
+    # history is. Returns the number of orders counted.
+    with bind.begin() as conn:
+        conn.execute(_table.delete())
+
+    columns = select(
+        Order.id, Order.restaurant_id, Order.delivery_pin_code, Order.status, Order.order_date,
+        Order.total_amount, Order.restaurant_fees, Order.platform_fees, Order.delivery_charges,
+        Order.discount_amount, Order.final_amount
+    )
+    last_id, counted = 0, 0
+    while True:
+        with bind.connect() as conn:
+            orders = conn.execute(
+                columns.where(Order.id > last_id, Order.status.in_(OUTCOMES)).order_by(Order.id).limit(chunk_size)
+            ).all()
+        if not orders:
+            return counted
+
+        totals = {}
+        for order in orders:
+            measures = _measures(order, order.status)
+            for key in _series_keys(order):
+                bucket_totals = totals.setdefault(key, dict.fromkeys(MEASURES, 0))
+                for name, value in measures.items():
+                    bucket_totals[name] += value
+        with bind.begin() as conn:
+            conn.execute(_upsert, _rows(totals))
+
+        last_id = orders[-1].id
+        counted += len(orders)
+        if progress:
+            progress(counted, last_id)
+
+def _outcome_total(outcome: str, column):
+    return func.sum(case((Order.status == outcome, func.coalesce(column, 0)), else_=0))
+
+def rebuild_in_database(bind):
+    # Same totals as backfill, computed by SQLite with one GROUP BY per series
+    # instead of row by row in Python. Much faster on large histories, but each
+    # statement holds the write lock for its whole run, so it is meant for
+    # offline bulk loads such as generate_data.py.
+    measures = [
+        _outcome_total("delivered", 1), _outcome_total("cancelled", 1),
+        *[_outcome_total("delivered", getattr(Order, column)) for column in ("total_amount", "restaurant_fees", "platform_fees", "delivery_charges", "discount_amount", "final_amount")],
+        _outcome_total("cancelled", Order.final_amount)
+    ]
+    keys = {"all": literal(""), "restaurant": cast(Order.restaurant_id, String), "pin_code": Order.delivery_pin_code}
+    columns = ["granularity", "dimension", "dimension_key", "bucket", *MEASURES]
+    with bind.begin() as conn:
+        conn.execute(_table.delete())
+        for granularity, bucket_format in GRANULARITIES.items():
+            bucket = func.strftime(bucket_format, Order.order_date)
+            for dimension, key in keys.items():
+                series = (
+                    select(literal(granularity), literal(dimension), key, bucket, *measures)
+                    .where(Order.status.in_(OUTCOMES))
+                    .group_by(key, bucket)
+                )
+                conn.execute(_table.insert().from_select(columns, series))
+
+def _format(row) -> dict:
+    return {
+        "delivered_orders": row.delivered_orders,
+        "cancelled_orders": row.cancelled_orders,
+        **{m: round(float(getattr(row, m)), 2) for m in MEASURES[2:]}
+    }
+
+def revenue_series(db: Session, granularity: str, dimension: str, key: str, start: datetime, end: datetime) -> dict:
+    # One range read on uq_revenue_rollups_series; at most MAX_BUCKETS rows
+    bucket_format = GRANULARITIES[granularity]
+    rows = (
+        db.query(RevenueRollup)
+        .filter(
+            RevenueRollup.granularity == granularity,
+            RevenueRollup.dimension == dimension,
+            RevenueRollup.dimension_key == key,
+            RevenueRollup.bucket >= start.strftime(bucket_format),
+            RevenueRollup.bucket <= end.strftime(bucket_format)
+        )
+        .order_by(RevenueRollup.bucket)
+        .all()
+    )
+    totals = dict.fromkeys(MEASURES, 0)
+    buckets = []
+    for row in rows:
+        values = _format(row)
+        buckets.append({"bucket": row.bucket, **values})
+        for name, value in values.items():
+            totals[name] += value
+    totals = {name: round(value, 2) if isinstance(value, float) else value for name, value in totals.items()}
+    return {"buckets": buckets, "totals": totals}
+
+def bucket_count(granularity: str, start: datetime, end: datetime) -> int:
+    bucket_format = GRANULARITIES[granularity]
+    first = datetime.strptime(start.strftime(bucket_format), bucket_format)
+    last = datetime.strptime(end.strftime(bucket_format), bucket_format)
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    return int((last - first) / step) + 1
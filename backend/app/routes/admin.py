@@ -1,9 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 from ..database import get_db
-from ..auth import require_role, get_password_hash
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from ..cache import menu_cache
+from ..offers import offer_index
+from ..fees import fee_snapshots, record_fee_change
+from ..dispatch import dispatch_index
+from ..events import order_events
+from ..passwords import password_pool
+from ..write_queue import write_queue
+from ..pin_codes import pin_code_index
+from ..profiling import request_profiler
+from ..order_export import FORMATS as EXPORT_FORMATS, export_orders
+from ..exports import export_limiter
+from ..rollups import GRANULARITIES, MAX_BUCKETS, MEASURES, bucket_count, revenue_series
+from ..auth import require_role, get_password_hash_async, token_cache
 from ..models.restaurant import Restaurant
 from ..models.platform_fee import PlatformFee
 from ..models.offer import Offer
@@ -39,13 +55,25 @@ class OfferCreate(BaseModel):
     max_discount: Optional[float] = None
     valid_until: Optional[str] = None
 
+def _owner_email_taken(db: Session, email: str) -> bool:
+    return db.query(Restaurant).filter(Restaurant.owner_email == email).first() is not None
+
+def _save_new_restaurant(db: Session, new_restaurant: Restaurant):
+    db.add(new_restaurant)
+    db.flush()
+    record_fee_change(db, "restaurant_added", restaurant=new_restaurant)
+    db.commit()
+    db.refresh(new_restaurant)
+    fee_snapshots.rebuild(db)
+    return new_restaurant
+
+# Async so the owner's password hash is awaited on the password pool
 @router.post("/restaurants", dependencies=[Depends(require_role(["admin"]))])
-def add_restaurant(restaurant: RestaurantCreate, db: Session = Depends(get_db)):
-    existing = db.query(Restaurant).filter(Restaurant.owner_email == restaurant.owner_email).first()
-    if existing:
+async def add_restaurant(restaurant: RestaurantCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_owner_email_taken, db, restaurant.owner_email):
         raise HTTPException(status_code=400, detail="Restaurant with this email already exists")
     
-    hashed_password = get_password_hash(restaurant.owner_password)
+    hashed_password = await get_password_hash_async(restaurant.owner_password)
     
     new_restaurant = Restaurant(
         name=restaurant.name,
@@ -58,9 +86,7 @@ def add_restaurant(restaurant: RestaurantCreate, db: Session = Depends(get_db)):
         restaurant_fees=restaurant.restaurant_fees
     )
     
-    db.add(new_restaurant)
-    db.commit()
-    db.refresh(new_restaurant)
+    new_restaurant = await run_in_threadpool(_save_new_restaurant, db, new_restaurant)
     
     return {
         "id": new_restaurant.id,
@@ -70,8 +96,8 @@ def add_restaurant(restaurant: RestaurantCreate, db: Session = Depends(get_db)):
     }
 
 @router.get("/restaurants", dependencies=[Depends(require_role(["admin"]))])
-def get_all_restaurants(db: Session = Depends(get_db)):
-    restaurants = db.query(Restaurant).all()
+def get_all_restaurants(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    restaurants, next_cursor = paginate(db.query(Restaurant), Restaurant.id, limit, cursor, sort_column=Restaurant.created_at, descending=False)
     return {
         "restaurants": [
             {
@@ -85,7 +111,8 @@ def get_all_restaurants(db: Session = Depends(get_db)):
                 "owner_email": r.owner_email
             }
             for r in restaurants
-        ]
+        ],
+        "next_cursor": next_cursor
     }
 
 @router.put("/restaurants/{restaurant_id}", dependencies=[Depends(require_role(["admin"]))])
@@ -96,10 +123,15 @@ def update_restaurant(restaurant_id: int, update_data: RestaurantUpdate, db: Ses
     
     if update_data.status:
         restaurant.status = update_data.status
-    if update_data.restaurant_fees is not None:
+    fees_changed = update_data.restaurant_fees is not None
+    if fees_changed:
         restaurant.restaurant_fees = update_data.restaurant_fees
+        record_fee_change(db, "restaurant_fee_updated", restaurant=restaurant)
     
     db.commit()
+    menu_cache.invalidate(restaurant_id)
+    if fees_changed:
+        fee_snapshots.rebuild(db)
     return {"message": "Restaurant updated successfully"}
 
 @router.post("/platform-fees", dependencies=[Depends(require_role(["admin"]))])
@@ -112,14 +144,18 @@ def create_platform_fee(fee: PlatformFeeCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_fee)
+    db.flush()
+    record_fee_change(db, "platform_fee_created")
     db.commit()
     db.refresh(new_fee)
+    fee_snapshots.rebuild(db)
     
     return {"id": new_fee.id, "message": "Platform fee created successfully"}
 
 @router.get("/platform-fees", dependencies=[Depends(require_role(["admin"]))])
-def get_platform_fees(db: Session = Depends(get_db)):
-    fees = db.query(PlatformFee).filter(PlatformFee.is_active == True).all()
+def get_platform_fees(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(PlatformFee).filter(PlatformFee.is_active == True)
+    fees, next_cursor = paginate(query, PlatformFee.id, limit, cursor, sort_column=PlatformFee.created_at, descending=False)
     return {
         "fees": [
             {
@@ -130,7 +166,8 @@ def get_platform_fees(db: Session = Depends(get_db)):
                 "description": f.description
             }
             for f in fees
-        ]
+        ],
+        "next_cursor": next_cursor
     }
 
 @router.post("/offers", dependencies=[Depends(require_role(["admin"]))])
@@ -139,6 +176,16 @@ def create_platform_offer(offer: OfferCreate, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, detail="Offer code already exists")
     
+    valid_until = None
+    if offer.valid_until:
+        try:
+            valid_until = datetime.fromisoformat(offer.valid_until)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="valid_until must be an ISO 8601 timestamp")
+        # Offer windows are compared in naive UTC, as SQLite stores them
+        if valid_until.tzinfo is not None:
+            valid_until = valid_until.astimezone(timezone.utc).replace(tzinfo=None)
+    
     new_offer = Offer(
         code=offer.code,
         description=offer.description,
@@ -146,18 +193,21 @@ def create_platform_offer(offer: OfferCreate, db: Session = Depends(get_db)):
         discount_value=offer.discount_value,
         min_order_value=offer.min_order_value,
         max_discount=offer.max_discount,
-        offer_type="platform"
+        offer_type="platform",
+        valid_until=valid_until
     )
     
     db.add(new_offer)
     db.commit()
     db.refresh(new_offer)
+    offer_index.add(new_offer)
     
     return {"id": new_offer.id, "code": new_offer.code, "message": "Platform offer created successfully"}
 
 @router.get("/offers", dependencies=[Depends(require_role(["admin"]))])
-def get_platform_offers(db: Session = Depends(get_db)):
-    offers = db.query(Offer).filter(Offer.offer_type == "platform", Offer.is_active == True).all()
+def get_platform_offers(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(Offer).filter(Offer.offer_type == "platform", Offer.is_active == True)
+    offers, next_cursor = paginate(query, Offer.id, limit, cursor, descending=False)
     return {
         "offers": [
             {
@@ -169,5 +219,116 @@ def get_platform_offers(db: Session = Depends(get_db)):
                 "min_order_value": float(o.min_order_value)
             }
             for o in offers
-        ]
+        ],
+        "next_cursor": next_cursor
+    }
+
+def _parse_bucket_time(name: str, value: Optional[str]) -> Optional[datetime]:
+    # Dates or ISO 8601 timestamps; rollup buckets are naive UTC, like order_date
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO 8601 date or timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+@router.get("/revenue", dependencies=[Depends(require_role(["admin"]))])
+def get_revenue(granularity: str = "day", restaurant_id: Optional[int] = None, pin_code: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None, db: Session = Depends(get_db)):
+    # Served from revenue_rollups (app/rollups.py), never from orders
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+    if restaurant_id is not None and pin_code:
+        raise HTTPException(status_code=400, detail="Filter by restaurant_id or pin_code, not both")
+    
+    end = _parse_bucket_time("end", end) or datetime.utcnow()
+    start = _parse_bucket_time("start", start) or end - (timedelta(hours=47) if granularity == "hour" else timedelta(days=29))
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if bucket_count(granularity, start, end) > MAX_BUCKETS[granularity]:
+        raise HTTPException(status_code=400, detail=f"Range too long: at most {MAX_BUCKETS[granularity]} {granularity} buckets per request")
+    
+    if restaurant_id is not None:
+        dimension, key = "restaurant", str(restaurant_id)
+    elif pin_code:
+        dimension, key = "pin_code", pin_code
+    else:
+        dimension, key = "all", ""
+    
+    return {
+        "granularity": granularity,
+        "dimension": dimension,
+        "key": key or None,
+        "start": start.strftime(GRANULARITIES[granularity]),
+        "end": end.strftime(GRANULARITIES[granularity]),
+        **revenue_series(db, granularity, dimension, key, start, end)
     }
+
+@router.get("/revenue/summary", dependencies=[Depends(require_role(["admin"]))])
+def get_revenue_summary(db: Session = Depends(get_db)):
+    # Platform totals for the dashboard header: today, last 7 and last 30 days (UTC)
+    now = datetime.utcnow()
+    last_30_days = revenue_series(db, "day", "all", "", now - timedelta(days=29), now)["buckets"]
+    
+    def total(days: int) -> dict:
+        first_bucket = (now - timedelta(days=days - 1)).strftime(GRANULARITIES["day"])
+        buckets = [b for b in last_30_days if b["bucket"] >= first_bucket]
+        return {
+            name: round(sum(b[name] for b in buckets), 2)
+            for name in MEASURES
+        }
+    
+    return {"today": total(1), "last_7_days": total(7), "last_30_days": total(30)}
+
+@router.get("/orders/export", dependencies=[Depends(require_role(["admin"]))])
+def export_orders_file(format: str = "csv", start: Optional[str] = None, end: Optional[str] = None, restaurant_id: Optional[int] = None, status: Optional[str] = None):
+    # Streamed straight from a database cursor (app/order_export.py); end is
+    # exclusive. At most EXPORT_MAX_CONCURRENT exports run at once (app/exports.py)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    start = _parse_bucket_time("start", start)
+    end = _parse_bucket_time("end", end)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return export_limiter.stream(export_orders(format, start, end, restaurant_id, status), media_type, f"orders.{format}")
+
+@router.get("/cache-stats", dependencies=[Depends(require_role(["admin"]))])
+def get_cache_stats():
+    return {
+        "password_pool": password_pool.stats(),
+        "menu": menu_cache.stats(),
+        "tokens": token_cache.stats(),
+        "offers": offer_index.stats(),
+        "dispatch": dispatch_index.stats(),
+        "order_events": order_events.stats(),
+        "write_queue": write_queue.stats(),
+        "pin_codes": pin_code_index.stats(),
+        "profiler": request_profiler.stats(),
+        "exports": export_limiter.stats()
+    }
+
+@router.get("/profiles", dependencies=[Depends(require_role(["admin"]))])
+def list_profiles():
+    # Newest first; only the last PROFILE_MAX_CAPTURES are kept
+    return {"profiles": request_profiler.captures()}
+
+def _get_capture(capture_id: int):
+    capture = request_profiler.get(capture_id)
+    if not capture:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture
+
+@router.get("/profiles/{capture_id}", dependencies=[Depends(require_role(["admin"]))])
+def get_profile(capture_id: int):
+    return _get_capture(capture_id).detail()
+
+@router.get("/profiles/{capture_id}/collapsed", dependencies=[Depends(require_role(["admin"]))])
+def get_profile_stacks(capture_id: int):
+    return PlainTextResponse(
+        _get_capture(capture_id).collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{capture_id}.collapsed"'}
+    )
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from ..database import get_db
-from ..auth import get_password_hash, verify_password, create_access_token
+from ..auth import get_password_hash_async, verify_password_async, create_access_token
+from ..dispatch import dispatch_index
 from ..models.user import User
 from ..models.restaurant import Restaurant
 from ..models.delivery_partner import DeliveryPartner
@@ -31,16 +33,27 @@ class DeliveryPartnerRegister(BaseModel):
     phone: str
     pin_code: str
 
+# Password routes are async so bcrypt can be awaited on the password pool;
+# their database work is pushed to the threadpool like any sync route
+
+def _email_taken(db: Session, model, email_column, email: str) -> bool:
+    return db.query(model).filter(email_column == email).first() is not None
+
+def _save(db: Session, instance):
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+    return instance
+
 @router.post("/register")
-def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     if user_data.role not in ['customer', 'customer_care']:
         raise HTTPException(status_code=400, detail="Invalid role for user registration")
     
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+    if await run_in_threadpool(_email_taken, db, User, User.email, user_data.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     
     new_user = User(
         name=user_data.name,
@@ -52,9 +65,7 @@ def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
         pin_code=user_data.pin_code
     )
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await run_in_threadpool(_save, db, new_user)
     
     token = create_access_token(data={"sub": str(new_user.id), "role": new_user.role})
     
@@ -67,12 +78,11 @@ def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     }
 
 @router.post("/register/delivery-partner")
-def register_delivery_partner(partner_data: DeliveryPartnerRegister, db: Session = Depends(get_db)):
-    existing = db.query(DeliveryPartner).filter(DeliveryPartner.email == partner_data.email).first()
-    if existing:
+async def register_delivery_partner(partner_data: DeliveryPartnerRegister, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_email_taken, db, DeliveryPartner, DeliveryPartner.email, partner_data.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(partner_data.password)
+    hashed_password = await get_password_hash_async(partner_data.password)
     
     new_partner = DeliveryPartner(
         name=partner_data.name,
@@ -82,9 +92,8 @@ def register_delivery_partner(partner_data: DeliveryPartnerRegister, db: Session
         pin_code=partner_data.pin_code
     )
     
-    db.add(new_partner)
-    db.commit()
-    db.refresh(new_partner)
+    new_partner = await run_in_threadpool(_save, db, new_partner)
+    dispatch_index.set_availability(new_partner.id, new_partner.pin_code, new_partner.availability)
     
     token = create_access_token(data={"sub": str(new_partner.id), "role": "delivery_partner"})
     
@@ -96,54 +105,61 @@ def register_delivery_partner(partner_data: DeliveryPartnerRegister, db: Session
         "token": token
     }
 
-@router.post("/login")
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = None
-    user_id = None
-    
+def _find_account(db: Session, login_data: LoginRequest):
+    # Returns the account row and the name of its password hash column
     if login_data.role == "customer" or login_data.role == "customer_care":
         user = db.query(User).filter(
             User.email == login_data.email,
             User.role == login_data.role
         ).first()
-        if user:
-            user_id = user.id
-            password_hash = user.password_hash
+        return user, "password_hash"
     
     elif login_data.role == "restaurant":
         user = db.query(Restaurant).filter(Restaurant.owner_email == login_data.email).first()
-        if user:
-            user_id = user.id
-            password_hash = user.owner_password_hash
+        return user, "owner_password_hash"
     
     elif login_data.role == "delivery_partner":
         user = db.query(DeliveryPartner).filter(DeliveryPartner.email == login_data.email).first()
-        if user:
-            user_id = user.id
-            password_hash = user.password_hash
+        return user, "password_hash"
     
     elif login_data.role == "admin":
         user = db.query(Admin).filter(Admin.email == login_data.email).first()
-        if user:
-            user_id = user.id
-            password_hash = user.password_hash
+        return user, "password_hash"
     
-    else:
-        raise HTTPException(status_code=400, detail="Invalid role")
+    raise HTTPException(status_code=400, detail="Invalid role")
+
+def _update_password_hash(db: Session, user, hash_column: str, new_hash: str):
+    setattr(user, hash_column, new_hash)
+    db.commit()
+
+@router.post("/login")
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+    user, hash_column = await run_in_threadpool(_find_account, db, login_data)
     
-    if not user or not verify_password(login_data.password, password_hash):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_password_async(login_data.password, getattr(user, hash_column))
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    user_id = user.id
+    user_name = user.name if hasattr(user, 'name') else user.owner_name if hasattr(user, 'owner_name') else user.username
+    
+    if new_hash:
+        # Stored hash used a different bcrypt cost; upgrade it transparently
+        await run_in_threadpool(_update_password_hash, db, user, hash_column, new_hash)
+    
     token = create_access_token(data={"sub": str(user_id), "role": login_data.role})
     
     return {
         "token": token,
         "user": {
             "id": user_id,
-            "name": user.name if hasattr(user, 'name') else user.owner_name if hasattr(user, 'owner_name') else user.username,
+            "name": user_name,
             "email": login_data.email,
             "role": login_data.role
         }
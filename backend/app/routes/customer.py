@@ -1,23 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, func, insert
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from ..database import get_db
-from ..auth import require_role, get_current_user
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from ..cache import menu_cache
+from ..cart_store import cart_store
+from ..offers import evaluate_offer, offer_index, rank_offers
+from ..fees import fee_snapshots
+from ..dispatch import dispatch_index
+from ..events import order_event, order_events
+from ..search import search_dishes
+from ..pin_codes import pin_code_index
+from ..config import NEARBY_MAX_PIN_CODES
+from ..write_queue import write_queue
+from ..auth import require_role
 from ..models.restaurant import Restaurant
 from ..models.dish import Dish
 from ..models.order import Order, OrderItem
-from ..models.offer import Offer
 from ..models.complaint import Complaint
 from ..models.delivery_partner import DeliveryPartner
-from ..models.platform_fee import PlatformFee
 
 router = APIRouter()
 
-# In-memory cart storage (for prototype - in production use Redis or DB)
-cart_storage = {}
-
 class CartItem(BaseModel):
     dish_id: int
     quantity: int
@@ -27,6 +34,10 @@ class OfferValidation(BaseModel):
     order_amount: float
     restaurant_id: int
 
+class BestOfferRequest(BaseModel):
+    restaurant_id: int
+    items: List[CartItem]
+
 class OrderCreate(BaseModel):
     restaurant_id: int
     items: List[CartItem]
@@ -39,14 +50,51 @@ class ComplaintCreate(BaseModel):
     order_id: int
     description: str
 
+def _price_items(db: Session, restaurant_id: int, items: List[CartItem]):
+    # Loads every dish, and its restaurant's status, with one IN query and
+    # validates it against the requested restaurant
+    dish_ids = {item.dish_id for item in items}
+    rows = db.query(Dish, Restaurant.status).join(Restaurant, Restaurant.id == Dish.restaurant_id).filter(Dish.id.in_(dish_ids)).all()
+    dishes = {dish.id: (dish, restaurant_status) for dish, restaurant_status in rows}
+    
+    total_amount = 0.0
+    priced_items = []
+    
+    for item in items:
+        dish, restaurant_status = dishes.get(item.dish_id, (None, None))
+        if dish and dish.restaurant_id == restaurant_id and restaurant_status != 'active':
+            raise HTTPException(status_code=400, detail="Restaurant not available")
+        if not dish or not dish.availability:
+            raise HTTPException(status_code=400, detail=f"Dish {item.dish_id} not available")
+        if dish.restaurant_id != restaurant_id:
+            raise HTTPException(status_code=400, detail=f"Dish {item.dish_id} does not belong to this restaurant")
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail=f"Invalid quantity for dish {item.dish_id}")
+        
+        total_amount += float(dish.price) * item.quantity
+        priced_items.append({
+            "dish_id": dish.id,
+            "dish_name": dish.name,
+            "quantity": item.quantity,
+            "price": float(dish.price),
+            "photo_path": dish.photo_path
+        })
+    
+    return total_amount, priced_items
+
 @router.get("/restaurants")
-def browse_restaurants(pin_code: Optional[str] = None, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+def browse_restaurants(pin_code: Optional[str] = None, nearby: int = Query(1, ge=1, le=NEARBY_MAX_PIN_CODES), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+    if nearby > 1:
+        if not pin_code:
+            raise HTTPException(status_code=400, detail="pin_code is required to browse nearby")
+        return _browse_nearby(db, pin_code, nearby, limit, cursor)
+    
     query = db.query(Restaurant).filter(Restaurant.status == 'active')
     
     if pin_code:
         query = query.filter(Restaurant.pin_code == pin_code)
     
-    restaurants = query.all()
+    restaurants, next_cursor = paginate(query, Restaurant.id, limit, cursor, sort_column=Restaurant.created_at, descending=False)
     
     return {
         "restaurants": [
@@ -58,18 +106,56 @@ def browse_restaurants(pin_code: Optional[str] = None, current_user: dict = Depe
                 "status": r.status
             }
             for r in restaurants
-        ]
+        ],
+        "next_cursor": next_cursor
+    }
+
+def _browse_nearby(db: Session, pin_code: str, nearby: int, limit: int, cursor: Optional[str]):
+    # Restaurants in the `nearby` closest pin codes (including the customer's own),
+    # closest pin code first. One query on the pin_code index; the distance order
+    # is a CASE over the precomputed neighbours, folded into the keyset sort key.
+    pin_code_index.ensure_loaded()
+    distances = dict(pin_code_index.nearest(pin_code, nearby))
+    ranks = {code: rank for rank, code in enumerate(distances)}
+    sort_key = func.printf("%03d|%s", case(ranks, value=Restaurant.pin_code), Restaurant.created_at).label("sort_key")
+    query = db.query(Restaurant, sort_key).filter(Restaurant.status == 'active', Restaurant.pin_code.in_(list(distances)))
+    
+    rows, next_cursor = paginate(query, Restaurant.id, limit, cursor, sort_column=sort_key, descending=False, key=lambda row: (row.sort_key, row.Restaurant.id))
+    
+    return {
+        "restaurants": [
+            {
+                "id": r.id,
+                "name": r.name,
+                "address": r.address,
+                "pin_code": r.pin_code,
+                "distance_km": distances[r.pin_code],
+                "status": r.status
+            }
+            for r, _ in rows
+        ],
+        "pin_codes": [{"pin_code": code, "distance_km": distance} for code, distance in distances.items()],
+        "next_cursor": next_cursor
     }
 
+@router.get("/search")
+def search(q: str = Query(..., min_length=1, max_length=100), pin_code: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+    return {"query": q, "results": search_dishes(db, q, pin_code, limit)}
+
 @router.get("/restaurants/{restaurant_id}/menu")
 def get_restaurant_menu(restaurant_id: int, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+    cached = menu_cache.get(restaurant_id)
+    if cached is not None:
+        return cached
+    
+    generation = menu_cache.generation
     restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
     dishes = db.query(Dish).filter(Dish.restaurant_id == restaurant_id).all()
     
-    return {
+    menu = {
         "restaurant": {
             "id": restaurant.id,
             "name": restaurant.name,
@@ -88,6 +174,9 @@ def get_restaurant_menu(restaurant_id: int, current_user: dict = Depends(require
             for d in dishes
         ]
     }
+    menu_cache.set(restaurant_id, menu, generation)
+    
+    return menu
 
 @router.post("/cart")
 def add_to_cart(item: CartItem, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
@@ -97,26 +186,11 @@ def add_to_cart(item: CartItem, current_user: dict = Depends(require_role(["cust
     if not dish:
         raise HTTPException(status_code=404, detail="Dish not found")
     
-    if user_id not in cart_storage:
-        cart_storage[user_id] = {}
-    
-    if item.dish_id in cart_storage[user_id]:
-        new_qty = cart_storage[user_id][item.dish_id]["quantity"] + item.quantity
-        if new_qty <= 0:
-            del cart_storage[user_id][item.dish_id]
-            return {"message": "Item removed from cart"}
-        cart_storage[user_id][item.dish_id]["quantity"] = new_qty
-    else:
-        if item.quantity <= 0:
-            return {"message": "Invalid quantity"}
-        cart_storage[user_id][item.dish_id] = {
-            "dish_id": item.dish_id,
-            "dish_name": dish.name,
-            "price": float(dish.price),
-            "quantity": item.quantity,
-            "photo_path": dish.photo_path,
-            "restaurant_id": dish.restaurant_id
-        }
+    new_qty = cart_store.add(user_id, item.dish_id, item.quantity)
+    if new_qty is None:
+        return {"message": "Invalid quantity"}
+    if new_qty == 0:
+        return {"message": "Item removed from cart"}
     
     return {"message": "Item added to cart"}
 
@@ -124,10 +198,22 @@ def add_to_cart(item: CartItem, current_user: dict = Depends(require_role(["cust
 def get_cart(current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
     user_id = current_user["id"]
     
-    if user_id not in cart_storage or not cart_storage[user_id]:
+    quantities = cart_store.get(user_id)
+    if not quantities:
         return {"items": [], "subtotal": 0.0}
     
-    cart_items = list(cart_storage[user_id].values())
+    dishes = db.query(Dish).filter(Dish.id.in_(quantities.keys())).order_by(Dish.id).all()
+    cart_items = [
+        {
+            "dish_id": dish.id,
+            "dish_name": dish.name,
+            "price": float(dish.price),
+            "quantity": quantities[dish.id],
+            "photo_path": dish.photo_path,
+            "restaurant_id": dish.restaurant_id
+        }
+        for dish in dishes
+    ]
     subtotal = sum(item["price"] * item["quantity"] for item in cart_items)
     
     return {
@@ -139,47 +225,66 @@ def get_cart(current_user: dict = Depends(require_role(["customer"])), db: Sessi
 def remove_from_cart(dish_id: int, current_user: dict = Depends(require_role(["customer"]))):
     user_id = current_user["id"]
     
-    if user_id in cart_storage and dish_id in cart_storage[user_id]:
-        del cart_storage[user_id][dish_id]
+    if cart_store.remove(user_id, dish_id):
         return {"message": "Item removed from cart"}
     
     raise HTTPException(status_code=404, detail="Item not found in cart")
 
 @router.post("/offers/validate")
 def validate_offer(validation: OfferValidation, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
-    offer = db.query(Offer).filter(
-        Offer.code == validation.offer_code,
-        Offer.is_active == True
-    ).first()
-    
-    if not offer:
-        return {"valid": False, "message": "Invalid offer code"}
-    
-    if offer.offer_type == "restaurant" and offer.restaurant_id != validation.restaurant_id:
-        return {"valid": False, "message": "Offer not valid for this restaurant"}
-    
-    if validation.order_amount < float(offer.min_order_value):
-        return {
-            "valid": False,
-            "message": f"Minimum order value is {offer.min_order_value}"
-        }
+    offer = offer_index.get(db, validation.offer_code)
+    result = evaluate_offer(offer, validation.order_amount, validation.restaurant_id)
     
-    discount = 0.0
-    if offer.discount_type == "percentage":
-        discount = validation.order_amount * (float(offer.discount_value) / 100)
-        if offer.max_discount:
-            discount = min(discount, float(offer.max_discount))
-    else:
-        discount = float(offer.discount_value)
+    if not result.valid:
+        return {"valid": False, "message": result.message}
     
-    final_amount = validation.order_amount - discount
+    final_amount = validation.order_amount - result.discount
     
     return {
         "valid": True,
-        "discount_amount": discount,
+        "discount_amount": result.discount,
         "final_amount": final_amount
     }
 
+@router.post("/offers/best")
+def find_best_offer(cart: BestOfferRequest, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+    if not cart.items:
+        raise HTTPException(status_code=400, detail="Cart must contain at least one item")
+    
+    order_amount, _ = _price_items(db, cart.restaurant_id, cart.items)
+    ranked = rank_offers(offer_index.applicable(db, cart.restaurant_id), order_amount, cart.restaurant_id)
+    
+    offers = []
+    for rule, result in ranked:
+        offers.append({
+            "code": rule.code,
+            "description": rule.description,
+            "offer_type": rule.offer_type,
+            "valid": result.valid,
+            "discount_amount": result.discount,
+            "final_amount": order_amount - result.discount,
+            "message": result.message,
+            "is_best": False
+        })
+    if offers and offers[0]["valid"]:
+        offers[0]["is_best"] = True
+    
+    return {
+        "order_amount": order_amount,
+        "best_offer_code": offers[0]["code"] if offers and offers[0]["valid"] else None,
+        "offers": offers
+    }
+
+def _insert_order(db: Session, new_order: Order, order_items_data: list) -> dict:
+    # Write unit: order and items land in the same transaction. Flush assigns the
+    # order id, then all items are written with a single executemany insert.
+    db.add(new_order)
+    db.flush()
+    for item_data in order_items_data:
+        item_data["order_id"] = new_order.id
+    db.execute(insert(OrderItem), order_items_data)
+    return order_event("order_placed", new_order)
+
 @router.post("/orders")
 def place_order(order_data: OrderCreate, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
     user_id = current_user["id"]
@@ -187,63 +292,33 @@ def place_order(order_data: OrderCreate, current_user: dict = Depends(require_ro
     if not order_data.items:
         raise HTTPException(status_code=400, detail="Order must contain at least one item")
     
-    restaurant = db.query(Restaurant).filter(Restaurant.id == order_data.restaurant_id).first()
-    if not restaurant or restaurant.status != 'active':
-        raise HTTPException(status_code=400, detail="Restaurant not available")
+    total_amount, order_items_data = _price_items(db, order_data.restaurant_id, order_data.items)
     
-    total_amount = 0.0
-    order_items_data = []
-    
-    for item in order_data.items:
-        dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-        if not dish or not dish.availability:
-            raise HTTPException(status_code=400, detail=f"Dish {item.dish_id} not available")
-        
-        item_total = float(dish.price) * item.quantity
-        total_amount += item_total
-        
-        order_items_data.append({
-            "dish_id": dish.id,
-            "dish_name": dish.name,
-            "quantity": item.quantity,
-            "price": float(dish.price),
-            "photo_path": dish.photo_path
-        })
-    
-    restaurant_fees = total_amount * (float(restaurant.restaurant_fees) / 100) if restaurant.restaurant_fees else 0.0
-    
-    platform_fee = db.query(PlatformFee).filter(PlatformFee.is_active == True).first()
-    platform_fees = 0.0
-    if platform_fee:
-        if platform_fee.is_percentage:
-            platform_fees = total_amount * (float(platform_fee.fee_value) / 100)
-        else:
-            platform_fees = float(platform_fee.fee_value)
+    fees = fee_snapshots.current(db)
+    if order_data.restaurant_id not in fees.restaurant_rates:
+        # Restaurant added by another worker since this snapshot was built
+        fees = fee_snapshots.rebuild(db)
+    restaurant_fees = fees.restaurant_fees(order_data.restaurant_id, total_amount)
+    platform_fees = fees.platform_fees(total_amount)
     
     delivery_charges = 40.0
     discount_amount = 0.0
     
     if order_data.offer_code:
-        offer = db.query(Offer).filter(Offer.code == order_data.offer_code, Offer.is_active == True).first()
-        if offer and total_amount >= float(offer.min_order_value):
-            if offer.discount_type == "percentage":
-                discount_amount = total_amount * (float(offer.discount_value) / 100)
-                if offer.max_discount:
-                    discount_amount = min(discount_amount, float(offer.max_discount))
-            else:
-                discount_amount = float(offer.discount_value)
+        offer = offer_index.get(db, order_data.offer_code)
+        result = evaluate_offer(offer, total_amount, order_data.restaurant_id)
+        if result.valid:
+            discount_amount = result.discount
     
     final_amount = total_amount + restaurant_fees + platform_fees + delivery_charges - discount_amount
     
-    available_partner = db.query(DeliveryPartner).filter(
-        DeliveryPartner.pin_code == order_data.delivery_pin_code,
-        DeliveryPartner.availability == True
-    ).first()
+    dispatch_index.ensure_loaded(db)
+    partner_id = dispatch_index.assign(order_data.delivery_pin_code)
     
     new_order = Order(
         user_id=user_id,
         restaurant_id=order_data.restaurant_id,
-        delivery_partner_id=available_partner.id if available_partner else None,
+        delivery_partner_id=partner_id,
         total_amount=total_amount,
         restaurant_fees=restaurant_fees,
         platform_fees=platform_fees,
@@ -251,63 +326,67 @@ def place_order(order_data: OrderCreate, current_user: dict = Depends(require_ro
         discount_amount=discount_amount,
         final_amount=final_amount,
         payment_mode=order_data.payment_mode,
-        status='confirmed' if available_partner else 'pending',
+        status='confirmed' if partner_id else 'pending',
         delivery_address=order_data.delivery_address,
-        delivery_pin_code=order_data.delivery_pin_code
+        delivery_pin_code=order_data.delivery_pin_code,
+        fee_snapshot_version=fees.version
     )
     
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
-    
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            **item_data
-        )
-        db.add(order_item)
-    
-    db.commit()
+    try:
+        event = write_queue.run(_insert_order, new_order, order_items_data)
+    except Exception:
+        if partner_id:
+            dispatch_index.release(partner_id)
+        raise
+    order_events.publish(event)
     
-    if user_id in cart_storage:
-        cart_storage[user_id] = {}
+    cart_store.clear(user_id)
     
     return {
-        "order_id": new_order.id,
+        "order_id": event["order_id"],
         "final_amount": float(final_amount),
-        "status": new_order.status,
-        "delivery_partner_assigned": available_partner is not None,
+        "status": event["status"],
+        "delivery_partner_assigned": partner_id is not None,
         "message": "Order placed successfully"
     }
 
 @router.get("/orders")
-def get_order_history(current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+def get_order_history(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
     user_id = current_user["id"]
     
-    orders = db.query(Order).filter(Order.user_id == user_id).order_by(Order.order_date.desc()).all()
+    query = db.query(Order, Restaurant.name).outerjoin(Restaurant, Restaurant.id == Order.restaurant_id).filter(Order.user_id == user_id)
+    rows, next_cursor = paginate(
+        query, Order.id, limit, cursor,
+        sort_column=Order.order_date,
+        key=lambda row: (row[0].order_date, row[0].id)
+    )
+    
+    items_by_order = {}
+    if rows:
+        order_ids = [order.id for order, _ in rows]
+        items = db.query(OrderItem).filter(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id).all()
+        for item in items:
+            items_by_order.setdefault(item.order_id, []).append(item)
     
     result = []
-    for order in orders:
-        restaurant = db.query(Restaurant).filter(Restaurant.id == order.restaurant_id).first()
-        items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-        
+    for order, restaurant_name in rows:
         result.append({
             "id": order.id,
-            "restaurant_name": restaurant.name if restaurant else "Unknown",
+            "restaurant_name": restaurant_name or "Unknown",
             "items": [
                 {
                     "dish_name": item.dish_name,
                     "quantity": item.quantity,
                     "price": float(item.price)
                 }
-                for item in items
+                for item in items_by_order.get(order.id, [])
             ],
             "final_amount": float(order.final_amount),
             "status": order.status,
             "order_date": order.order_date.isoformat() if order.order_date else None
         })
     
-    return {"orders": result}
+    return {"orders": result, "next_cursor": next_cursor}
 
 @router.get("/orders/{order_id}")
 def track_order(order_id: int, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
@@ -375,10 +454,11 @@ def raise_complaint(complaint_data: ComplaintCreate, current_user: dict = Depend
     }
 
 @router.get("/complaints")
-def get_complaints(current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
+def get_complaints(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, current_user: dict = Depends(require_role(["customer"])), db: Session = Depends(get_db)):
     user_id = current_user["id"]
     
-    complaints = db.query(Complaint).filter(Complaint.user_id == user_id).order_by(Complaint.created_at.desc()).all()
+    query = db.query(Complaint).filter(Complaint.user_id == user_id)
+    complaints, next_cursor = paginate(query, Complaint.id, limit, cursor, sort_column=Complaint.created_at)
     
     return {
         "complaints": [
@@ -391,5 +471,6 @@ def get_complaints(current_user: dict = Depends(require_role(["customer"])), db:
                 "created_at": c.created_at.isoformat() if c.created_at else None
             }
             for c in complaints
-        ]
+        ],
+        "next_cursor": next_cursor
     }
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 from ..database import get_db
-from ..auth import require_role, get_current_user
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from ..dispatch import dispatch_index, released_partner
+from ..events import order_event, order_events
+from ..rollups import record_order_outcome
+from ..write_queue import write_queue
+from ..auth import require_role
 from ..models.delivery_partner import DeliveryPartner
 from ..models.order import Order, OrderItem
 from ..models.restaurant import Restaurant
@@ -16,8 +21,8 @@ class AvailabilityUpdate(BaseModel):
 class DeliveryStatusUpdate(BaseModel):
     status: str
 
-@router.put("/availability", dependencies=[Depends(require_role(["delivery_partner"]))])
-def toggle_availability(update: AvailabilityUpdate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.put("/availability")
+def toggle_availability(update: AvailabilityUpdate, current_user: dict = Depends(require_role(["delivery_partner"])), db: Session = Depends(get_db)):
     partner_id = current_user["id"]
     
     partner = db.query(DeliveryPartner).filter(DeliveryPartner.id == partner_id).first()
@@ -26,30 +31,38 @@ def toggle_availability(update: AvailabilityUpdate, current_user: dict = Depends
     
     partner.availability = update.availability
     db.commit()
+    dispatch_index.set_availability(partner.id, partner.pin_code, partner.availability)
     
     return {
         "availability": partner.availability,
         "message": f"Availability set to {'available' if update.availability else 'unavailable'}"
     }
 
-@router.get("/orders", dependencies=[Depends(require_role(["delivery_partner"]))])
-def get_assigned_orders(status: Optional[str] = None, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/orders")
+def get_assigned_orders(status: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, current_user: dict = Depends(require_role(["delivery_partner"])), db: Session = Depends(get_db)):
     partner_id = current_user["id"]
     
-    query = db.query(Order).filter(Order.delivery_partner_id == partner_id)
+    query = db.query(Order, Restaurant).outerjoin(Restaurant, Restaurant.id == Order.restaurant_id).filter(Order.delivery_partner_id == partner_id)
     
     if status:
         query = query.filter(Order.status == status)
     else:
         query = query.filter(Order.status.in_(['ready', 'picked_up']))
     
-    orders = query.order_by(Order.order_date.desc()).all()
+    rows, next_cursor = paginate(
+        query, Order.id, limit, cursor,
+        sort_column=Order.order_date,
+        key=lambda row: (row[0].order_date, row[0].id)
+    )
+    
+    items_by_order = {}
+    if rows:
+        items = db.query(OrderItem).filter(OrderItem.order_id.in_([order.id for order, _ in rows])).order_by(OrderItem.id).all()
+        for item in items:
+            items_by_order.setdefault(item.order_id, []).append(item)
     
     result = []
-    for order in orders:
-        restaurant = db.query(Restaurant).filter(Restaurant.id == order.restaurant_id).first()
-        items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-        
+    for order, restaurant in rows:
         result.append({
             "id": order.id,
             "restaurant": {
@@ -65,30 +78,49 @@ def get_assigned_orders(status: Optional[str] = None, current_user: dict = Depen
                     "dish_name": item.dish_name,
                     "quantity": item.quantity
                 }
-                for item in items
+                for item in items_by_order.get(order.id, [])
             ],
             "order_date": order.order_date.isoformat() if order.order_date else None
         })
     
-    return {"orders": result}
+    return {"orders": result, "next_cursor": next_cursor}
 
-@router.put("/orders/{order_id}/status", dependencies=[Depends(require_role(["delivery_partner"]))])
-def update_delivery_status(order_id: int, status_update: DeliveryStatusUpdate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    partner_id = current_user["id"]
-    
+def _apply_delivery_status(db: Session, partner_id: int, order_id: int, new_status: str):
+    # Write unit: returns the event and the partner to release, if any
     order = db.query(Order).filter(Order.id == order_id, Order.delivery_partner_id == partner_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found or not assigned to you")
     
-    if status_update.status not in ['picked_up', 'delivered']:
+    if new_status not in ['picked_up', 'delivered']:
         raise HTTPException(status_code=400, detail="Invalid status. Use 'picked_up' or 'delivered'")
     
-    order.status = status_update.status
+    # Checked against the row as the writer sees it, so an order the restaurant
+    # has cancelled can never be delivered and counted under both outcomes
+    valid_transitions = {
+        'ready': ['picked_up', 'delivered'],
+        'picked_up': ['delivered'],
+    }
+    previous_status = order.status
+    if new_status not in valid_transitions.get(previous_status, []):
+        raise HTTPException(status_code=400, detail=f"Cannot change from '{previous_status}' to '{new_status}'")
+    
+    order.status = new_status
     
-    if status_update.status == 'delivered':
+    if new_status == 'delivered':
         from datetime import datetime
         order.delivered_at = datetime.utcnow()
+        record_order_outcome(db, order, "delivered")
     
-    db.commit()
+    return order_event("status_changed", order), released_partner(order, previous_status)
+
+@router.put("/orders/{order_id}/status")
+def update_delivery_status(order_id: int, status_update: DeliveryStatusUpdate, current_user: dict = Depends(require_role(["delivery_partner"]))):
+    partner_id = current_user["id"]
+    
+    event, released = write_queue.run(_apply_delivery_status, partner_id, order_id, status_update.status)
+    order_events.publish(event)
+    
+    if released:
+        dispatch_index.release(released)
     
     return {"message": f"Order status updated to {status_update.status}"}
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from ..auth import authenticate_token
+from ..config import ORDER_EVENTS_KEEPALIVE_SECONDS
+from ..events import order_events
+
+router = APIRouter()
+
+# Roles that can follow orders; each is scoped to its own orders by user id
+SUBSCRIBER_ROLES = ("customer", "restaurant", "delivery_partner")
+
+def _scope_for(token: Optional[str]) -> tuple:
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    user = authenticate_token(token)
+    if user["role"] not in SUBSCRIBER_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+    return (user["role"], user["id"])
+
+def _bearer_token(request: Request, token: Optional[str]) -> Optional[str]:
+    # EventSource cannot set headers, so browsers pass the JWT as ?token=
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        return header[7:]
+    return token
+
+async def _next_message(subscriber, reported_drops: int):
+    # Returns (message, drops now reported). A keepalive is sent when idle, and a
+    # resync notice goes out first whenever events were dropped for this client.
+    if subscriber.dropped > reported_drops:
+        return {"type": "resync", "dropped": subscriber.dropped}, subscriber.dropped
+    try:
+        event = await subscriber.get(timeout=ORDER_EVENTS_KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None, reported_drops
+    return event, reported_drops
+
+@router.get("/orders")
+async def stream_order_events(request: Request, token: Optional[str] = None):
+    scope = _scope_for(_bearer_token(request, token))
+    subscriber = order_events.subscribe(scope)
+
+    async def stream():
+        reported_drops = 0
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                message, reported_drops = await _next_message(subscriber, reported_drops)
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            order_events.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _wait_closed(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+@router.websocket("/orders/ws")
+async def order_events_socket(websocket: WebSocket, token: Optional[str] = None):
+    try:
+        scope = _scope_for(token)
+    except HTTPException as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+        return
+
+    await websocket.accept()
+    subscriber = order_events.subscribe(scope)
+    # Clients only listen, so reading is just how a disconnect gets noticed
+    # without waiting for the next send to fail
+    closed = asyncio.create_task(_wait_closed(websocket))
+    reported_drops = 0
+    try:
+        while True:
+            pending = asyncio.create_task(_next_message(subscriber, reported_drops))
+            await asyncio.wait({pending, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                pending.cancel()
+                break
+            message, reported_drops = pending.result()
+            await websocket.send_json(message or {"type": "keepalive"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        order_events.unsubscribe(subscriber)
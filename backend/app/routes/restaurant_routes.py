@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from ..database import get_db
-from ..auth import require_role, get_current_user
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from ..cache import menu_cache
+from ..offers import offer_index
+from ..dispatch import dispatch_index, released_partner
+from ..events import order_event, order_events
+from ..rollups import record_order_outcome
+from ..menu_io import FORMATS, detect_format, export_menu, import_menu
+from ..exports import export_limiter
+from ..write_queue import write_queue
+from ..auth import require_role
 from ..models.dish import Dish
 from ..models.restaurant import Restaurant
 from ..models.order import Order, OrderItem
@@ -37,8 +46,8 @@ class RestaurantOfferCreate(BaseModel):
     min_order_value: float = 0.0
     max_discount: Optional[float] = None
 
-@router.post("/dishes", dependencies=[Depends(require_role(["restaurant"]))])
-def add_dish(dish: DishCreate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.post("/dishes")
+def add_dish(dish: DishCreate, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
     
     new_dish = Dish(
@@ -54,6 +63,7 @@ def add_dish(dish: DishCreate, current_user: dict = Depends(get_current_user), d
     db.add(new_dish)
     db.commit()
     db.refresh(new_dish)
+    menu_cache.invalidate(restaurant_id)
     
     return {
         "id": new_dish.id,
@@ -62,10 +72,11 @@ def add_dish(dish: DishCreate, current_user: dict = Depends(get_current_user), d
         "message": "Dish added successfully"
     }
 
-@router.get("/dishes", dependencies=[Depends(require_role(["restaurant"]))])
-def get_restaurant_dishes(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/dishes")
+def get_restaurant_dishes(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
-    dishes = db.query(Dish).filter(Dish.restaurant_id == restaurant_id).all()
+    query = db.query(Dish).filter(Dish.restaurant_id == restaurant_id)
+    dishes, next_cursor = paginate(query, Dish.id, limit, cursor, sort_column=Dish.created_at, descending=False)
     
     return {
         "dishes": [
@@ -79,11 +90,35 @@ def get_restaurant_dishes(current_user: dict = Depends(get_current_user), db: Se
                 "category": d.category
             }
             for d in dishes
-        ]
+        ],
+        "next_cursor": next_cursor
     }
 
-@router.put("/dishes/{dish_id}", dependencies=[Depends(require_role(["restaurant"]))])
-def update_dish(dish_id: int, dish_update: DishUpdate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.post("/dishes/import")
+def import_dishes(file: UploadFile = File(...), format: Optional[str] = None, current_user: dict = Depends(require_role(["restaurant"]))):
+    restaurant_id = current_user["id"]
+    
+    fmt = detect_format(format, file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail=f"Unknown format; use one of {', '.join(FORMATS)} or a .csv/.ndjson file name")
+    
+    try:
+        report = import_menu(file.file, fmt, restaurant_id, write=write_queue.run)
+    finally:
+        menu_cache.invalidate(restaurant_id)
+    
+    return report
+
+@router.get("/dishes/export")
+def export_dishes(format: str = "csv", current_user: dict = Depends(require_role(["restaurant"]))):
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return export_limiter.stream(export_menu(current_user["id"], format), media_type, f"menu.{format}")
+
+@router.put("/dishes/{dish_id}")
+def update_dish(dish_id: int, dish_update: DishUpdate, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
     
     dish = db.query(Dish).filter(Dish.id == dish_id, Dish.restaurant_id == restaurant_id).first()
@@ -102,10 +137,11 @@ def update_dish(dish_id: int, dish_update: DishUpdate, current_user: dict = Depe
         dish.availability = dish_update.availability
     
     db.commit()
+    menu_cache.invalidate(restaurant_id)
     return {"message": "Dish updated successfully"}
 
-@router.delete("/dishes/{dish_id}", dependencies=[Depends(require_role(["restaurant"]))])
-def delete_dish(dish_id: int, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.delete("/dishes/{dish_id}")
+def delete_dish(dish_id: int, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
     
     dish = db.query(Dish).filter(Dish.id == dish_id, Dish.restaurant_id == restaurant_id).first()
@@ -114,10 +150,11 @@ def delete_dish(dish_id: int, current_user: dict = Depends(get_current_user), db
     
     db.delete(dish)
     db.commit()
+    menu_cache.invalidate(restaurant_id)
     return {"message": "Dish deleted successfully"}
 
-@router.put("/status", dependencies=[Depends(require_role(["restaurant"]))])
-def update_restaurant_status(status_update: RestaurantStatusUpdate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.put("/status")
+def update_restaurant_status(status_update: RestaurantStatusUpdate, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
     
     restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
@@ -129,19 +166,24 @@ def update_restaurant_status(status_update: RestaurantStatusUpdate, current_user
     
     return {"message": f"Restaurant status updated to {status_update.status}"}
 
-@router.get("/orders", dependencies=[Depends(require_role(["restaurant"]))])
-def get_restaurant_orders(status: Optional[str] = None, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/orders")
+def get_restaurant_orders(status: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
     
     query = db.query(Order).filter(Order.restaurant_id == restaurant_id)
     if status:
         query = query.filter(Order.status == status)
     
-    orders = query.order_by(Order.order_date.desc()).all()
+    orders, next_cursor = paginate(query, Order.id, limit, cursor, sort_column=Order.order_date)
+    
+    items_by_order = {}
+    if orders:
+        items = db.query(OrderItem).filter(OrderItem.order_id.in_([order.id for order in orders])).order_by(OrderItem.id).all()
+        for item in items:
+            items_by_order.setdefault(item.order_id, []).append(item)
     
     result = []
     for order in orders:
-        items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
         result.append({
             "id": order.id,
             "user_id": order.user_id,
@@ -151,7 +193,7 @@ def get_restaurant_orders(status: Optional[str] = None, current_user: dict = Dep
                     "quantity": item.quantity,
                     "price": float(item.price)
                 }
-                for item in items
+                for item in items_by_order.get(order.id, [])
             ],
             "total_amount": float(order.total_amount),
             "final_amount": float(order.final_amount),
@@ -160,15 +202,14 @@ def get_restaurant_orders(status: Optional[str] = None, current_user: dict = Dep
             "delivery_address": order.delivery_address
         })
     
-    return {"orders": result}
+    return {"orders": result, "next_cursor": next_cursor}
 
 class OrderStatusUpdate(BaseModel):
     status: str
 
-@router.put("/orders/{order_id}/status", dependencies=[Depends(require_role(["restaurant"]))])
-def update_order_status(order_id: int, status_update: OrderStatusUpdate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    restaurant_id = current_user["id"]
-    
+def _apply_status_update(db: Session, restaurant_id: int, order_id: int, new_status: str):
+    # Write unit: the transition is checked against the row as the writer sees
+    # it. Returns the event and the partner to release, if any
     order = db.query(Order).filter(Order.id == order_id, Order.restaurant_id == restaurant_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -180,16 +221,29 @@ def update_order_status(order_id: int, status_update: OrderStatusUpdate, current
         'ready': [],
     }
     allowed = valid_transitions.get(order.status, [])
-    if status_update.status not in allowed:
-        raise HTTPException(status_code=400, detail=f"Cannot change from '{order.status}' to '{status_update.status}'")
+    if new_status not in allowed:
+        raise HTTPException(status_code=400, detail=f"Cannot change from '{order.status}' to '{new_status}'")
     
-    order.status = status_update.status
-    db.commit()
+    previous_status = order.status
+    order.status = new_status
+    if new_status == 'cancelled':
+        record_order_outcome(db, order, "cancelled")
+    return order_event("status_changed", order), released_partner(order, previous_status)
+
+@router.put("/orders/{order_id}/status")
+def update_order_status(order_id: int, status_update: OrderStatusUpdate, current_user: dict = Depends(require_role(["restaurant"]))):
+    restaurant_id = current_user["id"]
+    
+    event, released = write_queue.run(_apply_status_update, restaurant_id, order_id, status_update.status)
+    order_events.publish(event)
+    
+    if released:
+        dispatch_index.release(released)
     
     return {"message": f"Order status updated to {status_update.status}"}
 
-@router.post("/offers", dependencies=[Depends(require_role(["restaurant"]))])
-def create_restaurant_offer(offer: RestaurantOfferCreate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.post("/offers")
+def create_restaurant_offer(offer: RestaurantOfferCreate, current_user: dict = Depends(require_role(["restaurant"])), db: Session = Depends(get_db)):
     restaurant_id = current_user["id"]
     
     existing = db.query(Offer).filter(Offer.code == offer.code).first()
@@ -210,5 +264,6 @@ def create_restaurant_offer(offer: RestaurantOfferCreate, current_user: dict = D
     db.add(new_offer)
     db.commit()
     db.refresh(new_offer)
+    offer_index.add(new_offer)
     
     return {"id": new_offer.id, "code": new_offer.code, "message": "Restaurant offer created successfully"}
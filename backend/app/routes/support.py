@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import String, func, literal
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 from ..database import get_db
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 from ..auth import require_role
 from ..models.complaint import Complaint
 from ..models.order import Order, OrderItem
@@ -16,31 +18,85 @@ class ComplaintUpdate(BaseModel):
     status: str
     resolution_notes: Optional[str] = None
 
+COMPLAINT_STATUSES = ['open', 'in_progress', 'resolved', 'closed']
+
+def _parse_time(name: str, value: Optional[str], end: bool = False):
+    # Dates or ISO 8601 timestamps, compared in the text form SQLite stores
+    # created_at in (naive UTC, "YYYY-MM-DD HH:MM:SS"). The end bound is
+    # exclusive, as in the order export; a bare end date covers that whole day,
+    # so it becomes the following midnight.
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO 8601 date or timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end and _is_date(value):
+        parsed += timedelta(days=1)
+    text = parsed.strftime("%Y-%m-%d %H:%M:%S")
+    if parsed.microsecond:
+        text += f".{parsed.microsecond:06d}"
+    return literal(text, String)
+
+def _is_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
 @router.get("/complaints", dependencies=[Depends(require_role(["customer_care"]))])
-def get_all_complaints(status: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(Complaint)
+def get_all_complaints(status: Optional[str] = None, order_id: Optional[int] = None, created_from: Optional[str] = None, created_to: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    if status and status not in COMPLAINT_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    created_from = _parse_time("created_from", created_from)
+    created_to = _parse_time("created_to", created_to, end=True)
+    
+    # Customer name and email come from the same query, so a page is one query
+    # however many complaints it holds
+    query = db.query(Complaint, User.name, User.email).outerjoin(User, User.id == Complaint.user_id)
     
     if status:
         query = query.filter(Complaint.status == status)
+    if order_id is not None:
+        query = query.filter(Complaint.order_id == order_id)
+    if created_from is not None:
+        query = query.filter(Complaint.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Complaint.created_at < created_to)
     
-    complaints = query.order_by(Complaint.created_at.desc()).all()
-    
-    result = []
-    for complaint in complaints:
-        user = db.query(User).filter(User.id == complaint.user_id).first()
-        
-        result.append({
-            "id": complaint.id,
-            "order_id": complaint.order_id,
-            "user_name": user.name if user else "Unknown",
-            "user_email": user.email if user else "Unknown",
-            "description": complaint.description,
-            "status": complaint.status,
-            "resolution_notes": complaint.resolution_notes,
-            "created_at": complaint.created_at.isoformat() if complaint.created_at else None
-        })
+    rows, next_cursor = paginate(
+        query, Complaint.id, limit, cursor,
+        sort_column=Complaint.created_at,
+        key=lambda row: (row[0].created_at, row[0].id)
+    )
     
-    return {"complaints": result}
+    return {
+        "complaints": [
+            {
+                "id": complaint.id,
+                "order_id": complaint.order_id,
+                "user_name": user_name or "Unknown",
+                "user_email": user_email or "Unknown",
+                "description": complaint.description,
+                "status": complaint.status,
+                "resolution_notes": complaint.resolution_notes,
+                "created_at": complaint.created_at.isoformat() if complaint.created_at else None
+            }
+            for complaint, user_name, user_email in rows
+        ],
+        "next_cursor": next_cursor
+    }
+
+@router.get("/complaints/summary", dependencies=[Depends(require_role(["customer_care"]))])
+def get_complaint_summary(db: Session = Depends(get_db)):
+    # Counted from ix_complaints_status_date alone, without reading complaint rows
+    counts = dict.fromkeys(COMPLAINT_STATUSES, 0)
+    for status, count in db.query(Complaint.status, func.count()).group_by(Complaint.status):
+        counts[status] = count
+    return {"counts": counts, "total": sum(counts.values())}
 
 @router.put("/complaints/{complaint_id}", dependencies=[Depends(require_role(["customer_care"]))])
 def update_complaint(complaint_id: int, update: ComplaintUpdate, db: Session = Depends(get_db)):
@@ -48,7 +104,7 @@ def update_complaint(complaint_id: int, update: ComplaintUpdate, db: Session = D
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    if update.status not in ['open', 'in_progress', 'resolved', 'closed']:
+    if update.status not in COMPLAINT_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status")
     
     complaint.status = update.status
@@ -65,12 +121,17 @@ def update_complaint(complaint_id: int, update: ComplaintUpdate, db: Session = D
 
 @router.get("/orders/{order_id}", dependencies=[Depends(require_role(["customer_care"]))])
 def get_order_details(order_id: int, db: Session = Depends(get_db)):
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+    row = (
+        db.query(Order, User.name, User.email, User.phone, Restaurant.name, Restaurant.address)
+        .outerjoin(User, User.id == Order.user_id)
+        .outerjoin(Restaurant, Restaurant.id == Order.restaurant_id)
+        .filter(Order.id == order_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    user = db.query(User).filter(User.id == order.user_id).first()
-    restaurant = db.query(Restaurant).filter(Restaurant.id == order.restaurant_id).first()
+    order, user_name, user_email, user_phone, restaurant_name, restaurant_address = row
     items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
     
     return {
@@ -84,13 +145,13 @@ def get_order_details(order_id: int, db: Session = Depends(get_db)):
             "order_date": order.order_date.isoformat() if order.order_date else None
         },
         "customer": {
-            "name": user.name if user else "Unknown",
-            "email": user.email if user else "Unknown",
-            "phone": user.phone if user else "Unknown"
+            "name": user_name or "Unknown",
+            "email": user_email or "Unknown",
+            "phone": user_phone or "Unknown"
         },
         "restaurant": {
-            "name": restaurant.name if restaurant else "Unknown",
-            "address": restaurant.address if restaurant else "Unknown"
+            "name": restaurant_name or "Unknown",
+            "address": restaurant_address or "Unknown"
         },
         "items": [
             {
@@ -0,0 +1,82 @@
+import re
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .config import SEARCH_RANK_WINDOW
+
+# The index is maintained by triggers (dish_search_index migration,
+# app/migrations.py); nothing here writes to it
+SEARCH_COLUMNS = "{name description category restaurant_name}"
+MIN_PREFIX_LENGTH = 2
+MAX_TERMS = 8
+
+# Every match is scored by bm25 and ranked, so the best dishes come first however
+# old they are. Unavailable dishes and inactive restaurants are filtered out
+# before the LIMIT, so a page is only short when there are no more results.
+# Pin-code scoping is part of the MATCH, so it narrows the posting lists instead
+# of filtering afterwards.
+#
+# Scoring every match costs tens of ms for a very common word over a large
+# catalogue. SEARCH_RANK_WINDOW > 0 trades relevance for flat latency: only the
+# newest that many matches (walked in rowid order, no sort) are scored, and
+# older matches, even exact name matches, are not considered. If that leaves a
+# page short, the query is run again over every match.
+_COLUMNS = "d.id, d.name, d.description, d.category, d.price, d.photo_path, r.id, r.name, r.pin_code"
+_FILTERS = "d.availability = 1 AND r.status = 'active'"
+
+_SEARCH_SQL = text(
+    f"SELECT {_COLUMNS}, dish_search.rank FROM dish_search "
+    "JOIN dishes d ON d.id = dish_search.rowid "
+    "JOIN restaurants r ON r.id = d.restaurant_id "
+    f"WHERE dish_search MATCH :match AND {_FILTERS} "
+    "ORDER BY dish_search.rank LIMIT :limit"
+)
+
+_WINDOWED_SEARCH_SQL = text(
+    f"SELECT {_COLUMNS}, hits.rank "
+    "FROM (SELECT rowid, rank FROM dish_search WHERE dish_search MATCH :match ORDER BY rowid DESC LIMIT :window) AS hits "
+    "JOIN dishes d ON d.id = hits.rowid "
+    "JOIN restaurants r ON r.id = d.restaurant_id "
+    f"WHERE {_FILTERS} "
+    "ORDER BY hits.rank LIMIT :limit"
+)
+
+def build_match(query: str, pin_code: Optional[str] = None) -> Optional[str]:
+    # Turns free text into a safe FTS5 expression: every word must match, and the
+    # last one also matches as a prefix so results update while the user types.
+    # Returns None when there is nothing searchable.
+    terms = re.findall(r"\w+", query.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    phrases = [f'"{term}"' for term in terms[:-1]]
+    last = terms[-1]
+    phrases.append(f'"{last}"*' if len(last) >= MIN_PREFIX_LENGTH else f'"{last}"')
+    match = f"{SEARCH_COLUMNS} : ({' AND '.join(phrases)})"
+    if pin_code:
+        pin_terms = re.findall(r"\w+", pin_code)
+        if pin_terms:
+            match += f' AND pin_code : "{" ".join(pin_terms)}"'
+    return match
+
+def search_dishes(db: Session, query: str, pin_code: Optional[str] = None, limit: int = 20, rank_window: int = SEARCH_RANK_WINDOW) -> list:
+    match = build_match(query, pin_code)
+    if match is None:
+        return []
+    rows = None
+    if rank_window > 0:
+        rows = db.execute(_WINDOWED_SEARCH_SQL, {"match": match, "window": rank_window, "limit": limit}).all()
+    if rows is None or len(rows) < limit:
+        rows = db.execute(_SEARCH_SQL, {"match": match, "limit": limit}).all()
+    return [
+        {
+            "dish_id": dish_id,
+            "name": name,
+            "description": description,
+            "category": category,
+            "price": float(price),
+            "photo_path": photo_path,
+            "restaurant": {"id": restaurant_id, "name": restaurant_name, "pin_code": restaurant_pin},
+            "score": round(-rank, 4)
+        }
+        for dish_id, name, description, category, price, photo_path, restaurant_id, restaurant_name, restaurant_pin, rank in rows
+    ]
@@ -0,0 +1,170 @@
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from .config import WRITE_BATCH_LINGER_MS, WRITE_BATCH_MAX, WRITE_QUEUE_MAX
+from .database import create_batch_engine
+from .profiling import request_profiler
+
+class WriteQueueBusy(Exception):
+    pass
+
+class WriteQueue:
+    # SQLite takes one writer at a time, so writes are funnelled through a single
+    # thread instead of racing for the lock. Handlers submit units - callables
+    # taking a Session - and block until their unit is committed. The writer runs
+    # up to `max_batch` queued units in one transaction (one fsync), lingering up
+    # to `linger_ms` for more to arrive. Each unit gets its own SAVEPOINT: a unit
+    # that raises is rolled back and its caller gets the exception, while the
+    # rest of the batch still commits. Units should return plain values, since
+    # ORM objects are expired once the batch commits.
+
+    def __init__(self, max_batch: int = WRITE_BATCH_MAX, linger_ms: float = WRITE_BATCH_LINGER_MS, max_queue: int = WRITE_QUEUE_MAX, session_factory=None):
+        self.max_batch = max(1, max_batch)
+        self.linger = linger_ms / 1000
+        self.max_queue = max_queue
+        self._session_factory = session_factory
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batches = 0
+        self._failed_batches = 0
+        self._units = 0
+        self._failed = 0
+        self._rejected = 0
+        self._commit_seconds = 0.0
+        self._max_commit_seconds = 0.0
+
+    def _ensure_started(self):
+        # Started on first use so scripts that import the app never open the writer
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    if self._session_factory is None:
+                        self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=create_batch_engine())
+                    self._thread = threading.Thread(target=self._run_writer, name="write-queue", daemon=True)
+                    self._thread.start()
+
+    def submit(self, fn, *args) -> Future:
+        self._ensure_started()
+        future = Future()
+        # The unit runs in the caller's context, so its statements count towards
+        # the request that queued it (see app/metrics.py), and a profiled
+        # request's capture samples the writer while it runs the unit
+        unit = partial(contextvars.copy_context().run, request_profiler.run_anchored, "write_queue", fn)
+        try:
+            self._queue.put_nowait((unit, args, future))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise WriteQueueBusy()
+        return future
+
+    def run(self, fn, *args):
+        # Blocking form for sync routes: returns fn's result or re-raises its error
+        try:
+            future = self.submit(fn, *args)
+        except WriteQueueBusy:
+            raise HTTPException(status_code=503, detail="Server is busy, please retry")
+        return future.result()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Shutdown requested: finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run_writer(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+
+    def _commit(self, batch: list):
+        db = self._session_factory()
+        outcomes = []
+        try:
+            # Take the write lock up front so a busy database fails the whole
+            # batch rather than whichever unit happens to run first
+            db.connection()
+            for fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with db.begin_nested():
+                        outcomes.append((future, fn(db, *args), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+            start = time.perf_counter()
+            db.commit()
+            elapsed = time.perf_counter() - start
+        except Exception as exc:
+            db.rollback()
+            for fn, args, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            with self._lock:
+                self._failed_batches += 1
+                self._failed += len(batch)
+            return
+        finally:
+            db.close()
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        with self._lock:
+            self._batches += 1
+            self._units += len(batch)
+            self._failed += sum(1 for _, _, error in outcomes if error is not None)
+            self._commit_seconds += elapsed
+            self._max_commit_seconds = max(self._max_commit_seconds, elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            committed = self._batches
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "max_batch": self.max_batch,
+                "linger_ms": self.linger * 1000,
+                "batches": self._batches,
+                "failed_batches": self._failed_batches,
+                "units": self._units,
+                "failed_units": self._failed,
+                "rejected": self._rejected,
+                "avg_batch_size": self._units / committed if committed else 0.0,
+                "avg_commit_ms": self._commit_seconds * 1000 / committed if committed else 0.0,
+                "max_commit_ms": self._max_commit_seconds * 1000
+            }
+
+    def shutdown(self, timeout: float = 5):
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+            self._thread = None
+
+# One writer per worker process; SQLite's file lock still serialises writers
+# across processes, with busy_timeout covering the hand-over
+write_queue = WriteQueue()
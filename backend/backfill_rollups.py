@@ -0,0 +1,30 @@
+import argparse
+import time
+from app.database import engine
+from app.models.revenue_rollup import RevenueRollup
+from app.rollups import BACKFILL_CHUNK_SIZE, backfill
+
+# Rebuilds revenue_rollups from order history. Run it once after upgrading an
+# existing database, or whenever the rollups need rebuilding. Orders delivered
+# or cancelled while it runs may be missed, so run it with the app stopped.
+#
+#   cd backend
+#   python backfill_rollups.py [--chunk-size 5000]
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild revenue rollups from order history")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    RevenueRollup.__table__.create(bind=engine, checkfirst=True)
+    start = time.perf_counter()
+
+    def progress(counted: int, last_id: int):
+        print(f"  {counted:,} orders counted (through order #{last_id})")
+
+    print("📊 Rebuilding revenue rollups...")
+    counted = backfill(engine, args.chunk_size, progress=progress)
+    print(f"✅ {counted:,} delivered or cancelled orders rolled up in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
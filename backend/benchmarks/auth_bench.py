@@ -0,0 +1,49 @@
+# Measure per-request authentication overhead: bearer token -> verified user -> role check.
+#
+#   cd backend
+#   python -m benchmarks.auth_bench --requests 20000
+import argparse
+import time
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from app.auth import ALGORITHM, SECRET_KEY, create_access_token, get_current_user, require_role, token_cache
+
+def uncached_chain(credentials, allowed_roles):
+    # What every request paid before: a full HS256 verification
+    payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+    current_user = {"id": int(payload["sub"]), "role": payload["role"]}
+    if current_user["role"] not in allowed_roles:
+        raise RuntimeError("forbidden")
+    return current_user
+
+def cached_chain(credentials, role_checker):
+    return role_checker(get_current_user(credentials))
+
+def run(label: str, fn, requests: int):
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10}{requests:>10}{elapsed * 1e6 / requests:>14.2f}{requests / elapsed:>16,.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Authentication overhead microbenchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100, help="distinct users sending requests")
+    args = parser.parse_args()
+
+    credentials = [
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": str(i), "role": "customer"}))
+        for i in range(args.tokens)
+    ]
+    role_checker = require_role(["customer"])
+    counter = iter(range(10 ** 12))
+
+    print(f"{'mode':<10}{'requests':>10}{'us/request':>14}{'requests/sec':>16}")
+    run("before", lambda: uncached_chain(credentials[next(counter) % args.tokens], ["customer"]), args.requests)
+    token_cache.clear()
+    run("after", lambda: cached_chain(credentials[next(counter) % args.tokens], role_checker), args.requests)
+    print(f"token cache: {token_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
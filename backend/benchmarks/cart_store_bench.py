@@ -0,0 +1,75 @@
+# Compare cart operation throughput across cart store backends.
+#
+#   cd backend
+#   python -m benchmarks.cart_store_bench --users 200 --items 5
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.cart_store import InMemoryCartStore, SQLiteCartStore
+from app.database import create_batch_engine
+from app.write_queue import WriteQueue
+from app.models.cart import CartEntry
+
+def run_workload(store, users: int, items: int, seed: int = 42):
+    rng = random.Random(seed)
+    timings = {}
+
+    start = time.perf_counter()
+    for user_id in range(1, users + 1):
+        for dish_id in range(1, items + 1):
+            store.add(user_id, dish_id, rng.randint(1, 3))
+    timings["add"] = (users * items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for user_id in range(1, users + 1):
+        for dish_id in range(1, items + 1):
+            store.add(user_id, dish_id, 1)
+    timings["update"] = (users * items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for user_id in range(1, users + 1):
+        store.get(user_id)
+    timings["get"] = (users, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for user_id in range(1, users + 1):
+        store.remove(user_id, 1)
+    timings["remove"] = (users, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for user_id in range(1, users + 1):
+        store.clear(user_id)
+    timings["clear"] = (users, time.perf_counter() - start)
+
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Cart store throughput benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--items", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'cart_bench.db')}"
+        engine = create_engine(url)
+        CartEntry.__table__.create(bind=engine)
+        writer = WriteQueue(session_factory=sessionmaker(bind=create_batch_engine(url, "basic")))
+        backends = {
+            "memory": InMemoryCartStore(),
+            "sqlite": SQLiteCartStore(bind=engine, writer=None),
+            "queued": SQLiteCartStore(bind=engine, writer=writer),
+        }
+
+        print(f"{'backend':<10}{'operation':<10}{'ops':>8}{'ops/sec':>14}")
+        for name, store in backends.items():
+            for operation, (ops, elapsed) in run_workload(store, args.users, args.items).items():
+                print(f"{name:<10}{operation:<10}{ops:>8}{ops / elapsed:>14,.0f}")
+        writer.shutdown()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Simulate delivery dispatch to compare assignment balance and latency per policy.
+#
+#   cd backend
+#   python -m benchmarks.dispatch_bench --partners 10000 --pin-codes 200 --orders 100000
+import argparse
+import random
+import statistics
+import time
+from app.dispatch import DISPATCH_POLICIES, DispatchIndex
+
+def percentile(sorted_values, pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def simulate(policy_name: str, args):
+    rng = random.Random(args.seed)
+    pin_codes = [f"{110001 + i}" for i in range(args.pin_codes)]
+    rows = [(partner_id, rng.choice(pin_codes), rng.random() < 0.8, 0) for partner_id in range(1, args.partners + 1)]
+
+    index = DispatchIndex(policy=DISPATCH_POLICIES[policy_name](), max_active_orders=0)
+    index.load_rows(rows)
+
+    # Skewed demand: a few pin codes see most of the orders
+    weights = [1 / (rank + 1) for rank in range(len(pin_codes))]
+    demand = rng.choices(pin_codes, weights=weights, k=args.orders)
+
+    in_flight = []
+    latencies = []
+    unassigned = 0
+    for i, pin_code in enumerate(demand):
+        start = time.perf_counter()
+        partner_id = index.assign(pin_code)
+        latencies.append(time.perf_counter() - start)
+        if partner_id is None:
+            unassigned += 1
+        else:
+            in_flight.append(partner_id)
+        # Deliveries complete at roughly the rate new orders arrive
+        if len(in_flight) > args.in_flight:
+            index.release(in_flight.pop(rng.randrange(len(in_flight))))
+        if i % 1000 == 0:
+            partner_id = rng.randint(1, args.partners)
+            index.set_availability(partner_id, rows[partner_id - 1][1], rng.random() < 0.8)
+
+    loads = [p.active_orders for p in index._partners.values() if p.active_orders or p.available]
+    latencies.sort()
+    return {
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "max_load": max(loads),
+        "load_stdev": statistics.pstdev(loads),
+        "idle_partners": sum(1 for load in loads if load == 0),
+        "unassigned": unassigned,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Delivery dispatch simulation")
+    parser.add_argument("--partners", type=int, default=10000)
+    parser.add_argument("--pin-codes", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--in-flight", type=int, default=5000, help="orders being delivered at any moment")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'policy':<16}{'p50 us':>8}{'p99 us':>8}{'max load':>10}{'stdev':>8}{'idle':>7}{'unassigned':>12}")
+    for policy_name in DISPATCH_POLICIES:
+        r = simulate(policy_name, args)
+        print(f"{policy_name:<16}{r['p50_us']:>8.1f}{r['p99_us']:>8.1f}{r['max_load']:>10}{r['load_stdev']:>8.2f}{r['idle_partners']:>7}{r['unassigned']:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+# Endpoint load test. Virtual users run the critical journeys (login, browse,
+# menu, cart, place order, track, restaurant and delivery status updates)
+# against a seeded scratch database, either in-process through the ASGI app or
+# over HTTP against a uvicorn server launched for the run. Reports throughput
+# and p50/p95/p99 latency per route, and can save the results as JSON and
+# compare them with an earlier run, exiting 1 on a regression.
+#
+#   cd backend
+#   python -m benchmarks.endpoint_bench --concurrency 16 --seconds 20 --output before.json
+#   python -m benchmarks.endpoint_bench --concurrency 16 --seconds 20 --compare before.json
+#   python -m benchmarks.endpoint_bench --server uvicorn --workers 1
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'endpoint_bench.db')}"
+os.environ.setdefault("CART_BACKEND", "memory")
+
+from app.auth import create_access_token, get_password_hash
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models.delivery_partner import DeliveryPartner
+from app.models.dish import Dish
+from app.models.restaurant import Restaurant
+from app.models.user import User
+
+PINS = ["110001", "110002", "110003", "110004", "110005"]
+PASSWORD = "bench-password"
+JOURNEYS = {"customer": 6, "restaurant": 2, "delivery": 2, "login": 1}
+PERCENTILES = (0.5, 0.95, 0.99)
+# Below this p95 (ms), differences between runs are treated as noise, and
+# routes with fewer requests than this in either run are not compared
+NOISE_FLOOR_MS = 1.0
+MIN_COMPARE_REQUESTS = 30
+
+def seed(restaurants: int, customers: int, partners_per_pin: int, dishes: int) -> dict:
+    password_hash = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    restaurant_rows = [
+        Restaurant(name=f"Bench Kitchen {i}", pin_code=PINS[i % len(PINS)], address=f"{i} Bench Road", owner_email=f"owner{i}@bench.com", owner_password_hash=password_hash, status="active")
+        for i in range(restaurants)
+    ]
+    customer_rows = [User(name=f"Customer {i}", email=f"customer{i}@bench.com", password_hash=password_hash, role="customer") for i in range(customers)]
+    partner_rows = [
+        DeliveryPartner(name=f"Partner {pin}-{i}", email=f"partner{pin}-{i}@bench.com", password_hash=password_hash, phone="0", pin_code=pin, availability=True)
+        for pin in PINS for i in range(partners_per_pin)
+    ]
+    db.add_all(restaurant_rows + customer_rows + partner_rows)
+    db.flush()
+    db.add_all([
+        Dish(restaurant_id=r.id, name=f"Dish {i}", description="Bench dish", price=120 + 10 * i, category="Mains", availability=True)
+        for r in restaurant_rows for i in range(dishes)
+    ])
+    db.commit()
+    accounts = {
+        "customer": [(c.id, c.email, PINS[n % len(PINS)]) for n, c in enumerate(customer_rows)],
+        "restaurant": [(r.id, r.owner_email, r.pin_code) for r in restaurant_rows],
+        "delivery_partner": [(p.id, p.email, p.pin_code) for p in partner_rows],
+    }
+    db.close()
+    engine.dispose()
+    return accounts
+
+class InProcessClient:
+    # Calls the ASGI app directly, so the numbers are the app's own cost with
+    # no sockets or HTTP parsing
+    def __init__(self, asgi_app):
+        self.app = asgi_app
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b""):
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+            "headers": [(b"host", b"bench")] + [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+        response = {"status": 0, "body": []}
+        sent = asyncio.Event()
+
+        async def receive():
+            if not sent.is_set():
+                sent.set()
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return response["status"], b"".join(response["body"])
+
+    async def close(self):
+        pass
+
+class HttpClient:
+    # One keep-alive HTTP/1.1 connection per virtual user
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunks.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            data = b"".join(chunk[:-2] for chunk in chunks)
+        else:
+            data = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection") == "close":
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class Stats:
+    def __init__(self):
+        self.recording = False
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, route: str, elapsed: float, ok: bool):
+        if not self.recording:
+            return
+        self.samples.setdefault(route, []).append(elapsed * 1000)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, seconds: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            samples.sort()
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors.get(route, 0),
+                "rps": round(len(samples) / seconds, 2),
+                **{f"p{int(p * 100)}_ms": round(samples[min(len(samples) - 1, int(len(samples) * p))], 3) for p in PERCENTILES},
+            }
+        return routes
+
+class VirtualUser:
+    def __init__(self, index: int, client, stats: Stats, accounts: dict, seed: int):
+        self.client, self.stats, self.accounts = client, stats, accounts
+        self.random = random.Random(f"{seed}-{index}")
+        # Each virtual user acts for its own restaurant and partner, so status
+        # updates do not race each other unless there are more users than accounts
+        self.customer = accounts["customer"][index % len(accounts["customer"])]
+        self.restaurant = accounts["restaurant"][index % len(accounts["restaurant"])]
+        self.partner = accounts["delivery_partner"][index % len(accounts["delivery_partner"])]
+        self.tokens = {
+            role: {"Authorization": "Bearer " + create_access_token({"sub": str(account[0]), "role": role})}
+            for role, account in (("customer", self.customer), ("restaurant", self.restaurant), ("delivery_partner", self.partner))
+        }
+
+    async def call(self, route: str, method: str, path: str, role: str = None, payload=None):
+        headers = dict(self.tokens[role]) if role else {}
+        body = b""
+        if payload is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(payload).encode()
+        start = time.perf_counter()
+        status, data = await self.client.request(method, path, headers, body)
+        ok = 200 <= status < 300
+        self.stats.record(route, time.perf_counter() - start, ok)
+        return json.loads(data) if ok and data else None
+
+    async def login(self):
+        _, email, _ = self.random.choice(self.accounts["customer"])
+        await self.call("POST /auth/login", "POST", "/api/v1/auth/login", payload={"email": email, "password": PASSWORD, "role": "customer"})
+
+    async def customer_journey(self):
+        _, _, pin = self.customer
+        browse = await self.call("GET /customer/restaurants", "GET", "/api/v1/customer/restaurants?" + urlencode({"pin_code": pin, "limit": 10}), "customer")
+        if not browse or not browse["restaurants"]:
+            return
+        restaurant_id = self.random.choice(browse["restaurants"])["id"]
+        menu = await self.call("GET /customer/restaurants/{id}/menu", "GET", f"/api/v1/customer/restaurants/{restaurant_id}/menu", "customer")
+        dishes = [d for d in (menu or {}).get("dishes", []) if d["availability"]]
+        if not dishes:
+            return
+        items = [{"dish_id": d["id"], "quantity": self.random.randint(1, 3)} for d in self.random.sample(dishes, min(2, len(dishes)))]
+        for item in items:
+            await self.call("POST /customer/cart", "POST", "/api/v1/customer/cart", "customer", item)
+        await self.call("GET /customer/cart", "GET", "/api/v1/customer/cart", "customer")
+        order = await self.call("POST /customer/orders", "POST", "/api/v1/customer/orders", "customer", {
+            "restaurant_id": restaurant_id, "items": items, "delivery_address": "1 Bench Road", "delivery_pin_code": pin, "payment_mode": "cash"
+        })
+        if order:
+            await self.call("GET /customer/orders/{id}", "GET", f"/api/v1/customer/orders/{order['order_id']}", "customer")
+        await self.call("GET /customer/orders", "GET", "/api/v1/customer/orders?limit=10", "customer")
+
+    async def restaurant_journey(self):
+        # Moves the newest open order one order along: to preparing, then ready
+        orders = await self.call("GET /restaurant/orders", "GET", "/api/v1/restaurant/orders?status=confirmed&limit=5", "restaurant")
+        if not orders or not orders["orders"]:
+            return
+        order_id = orders["orders"][0]["id"]
+        for status in ("preparing", "ready"):
+            await self.call("PUT /restaurant/orders/{id}/status", "PUT", f"/api/v1/restaurant/orders/{order_id}/status", "restaurant", {"status": status})
+
+    async def delivery_journey(self):
+        orders = await self.call("GET /delivery/orders", "GET", "/api/v1/delivery/orders?limit=5", "delivery_partner")
+        if not orders or not orders["orders"]:
+            return
+        order = orders["orders"][0]
+        for status in (("picked_up", "delivered") if order["status"] == "ready" else ("delivered",)):
+            await self.call("PUT /delivery/orders/{id}/status", "PUT", f"/api/v1/delivery/orders/{order['id']}/status", "delivery_partner", {"status": status})
+
+    async def run(self, journeys: dict, stop_at: float):
+        names, weights = list(journeys), list(journeys.values())
+        while time.perf_counter() < stop_at:
+            name = self.random.choices(names, weights)[0]
+            await getattr(self, name if name == "login" else f"{name}_journey")()
+        await self.client.close()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_uvicorn(port: int, workers: int) -> subprocess.Popen:
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=backend, env=os.environ.copy()
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5) as sock:
+                sock.sendall(b"GET /health HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+                if sock.recv(64).startswith(b"HTTP/1.1 200"):
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+async def run_load(make_client, accounts: dict, journeys: dict, concurrency: int, warmup: float, seconds: float, seed: int) -> Stats:
+    stats = Stats()
+    start = time.perf_counter()
+    users = [VirtualUser(i, make_client(), stats, accounts, seed) for i in range(concurrency)]
+    tasks = [asyncio.create_task(user.run(journeys, start + warmup + seconds)) for user in users]
+    await asyncio.sleep(warmup)
+    stats.recording = True
+    await asyncio.gather(*tasks)
+    return stats
+
+def parse_journeys(value: str) -> dict:
+    journeys = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"unknown journey '{name}', expected one of {', '.join(JOURNEYS)}")
+        journeys[name] = float(weight) if weight else JOURNEYS[name]
+    return journeys
+
+def compare(routes: dict, baseline_path: str, threshold: float) -> list:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["routes"]
+    regressions = []
+    for route, result in routes.items():
+        before = baseline.get(route)
+        if not before or min(before["requests"], result["requests"]) < MIN_COMPARE_REQUESTS:
+            continue
+        if result["p95_ms"] > max(before["p95_ms"] * (1 + threshold), NOISE_FLOOR_MS):
+            regressions.append(f"{route}: p95 {before['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+        if result["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{route}: throughput {before['rps']:.1f}/s -> {result['rps']:.1f}/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint load test with per-route latency percentiles")
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual users")
+    parser.add_argument("--seconds", type=float, default=10, help="measured duration")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds run before measuring starts")
+    parser.add_argument("--journeys", type=parse_journeys, default=dict(JOURNEYS), help="e.g. customer=6,restaurant=2,delivery=2,login=1")
+    parser.add_argument("--restaurants", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--partners-per-pin", type=int, default=4)
+    parser.add_argument("--dishes", type=int, default=10, help="dishes per restaurant")
+    parser.add_argument("--seed", type=int, default=1, help="seeds each virtual user's choices, so runs repeat the same journeys")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier JSON results; exit 1 if a route regressed")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 increase or throughput drop, as a fraction")
+    args = parser.parse_args()
+
+    accounts = seed(args.restaurants, args.customers, args.partners_per_pin, args.dishes)
+    server = None
+    if args.server == "uvicorn":
+        port = free_port()
+        server = start_uvicorn(port, args.workers)
+        make_client = lambda: HttpClient("127.0.0.1", port)
+    else:
+        asgi = InProcessClient(app)
+        make_client = lambda: asgi
+
+    async def run():
+        if server is None:
+            await app.router.startup()
+        try:
+            return await run_load(make_client, accounts, args.journeys, args.concurrency, args.warmup, args.seconds, args.seed)
+        finally:
+            if server is None:
+                await app.router.shutdown()
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    routes = stats.summary(args.seconds)
+    total = sum(r["requests"] for r in routes.values())
+    print(f"{args.server}, {args.concurrency} virtual users, {args.seconds:g}s measured after {args.warmup:g}s warmup: {total:,} requests, {total / args.seconds:,.1f}/s\n")
+    print(f"{'route':<38}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for route, r in routes.items():
+        print(f"{route:<38}{r['requests']:>9,}{r['rps']:>9.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['errors']:>8}")
+
+    if args.output:
+        result = {
+            "run": {
+                "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "server": args.server, "workers": args.workers if server else None, "concurrency": args.concurrency,
+                "seconds": args.seconds, "warmup": args.warmup, "journeys": args.journeys,
+                "db_profile": os.getenv("DB_PROFILE", "production"), "requests": total,
+            },
+            "routes": routes,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(routes, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare} (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"    {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Menu onboarding: one add_dish call per dish versus one bulk CSV import,
+# then a re-import of the same file (all updates) and a streaming export.
+#
+#   cd backend
+#   python -m benchmarks.menu_import_bench --dishes 400
+import argparse
+import io
+import os
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'menu_bench.db')}"
+os.environ.setdefault("CART_BACKEND", "memory")
+
+from app.database import Base, SessionLocal, engine
+from app.menu_io import export_menu, import_menu
+from app.migrations import run_migrations
+from app.models.complaint import Complaint
+from app.models.delivery_partner import DeliveryPartner
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.routes.restaurant_routes import DishCreate, add_dish
+from app.write_queue import write_queue
+
+def add_restaurant(name: str) -> int:
+    db = SessionLocal()
+    restaurant = Restaurant(name=name, pin_code="110001", address="x", owner_email=f"{name}@r.com", owner_password_hash="x", status="active")
+    db.add(restaurant)
+    db.commit()
+    restaurant_id = restaurant.id
+    db.close()
+    return restaurant_id
+
+def menu_csv(dishes: int) -> bytes:
+    lines = ["name,description,price,category,availability"]
+    lines += [f"Dish {i},House special number {i},{100 + i % 400},Category {i % 12},true" for i in range(dishes)]
+    return ("\n".join(lines) + "\n").encode()
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk menu import benchmark")
+    parser.add_argument("--dishes", type=int, default=400)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    one_by_one = add_restaurant("single")
+    db = SessionLocal()
+    start = time.perf_counter()
+    for i in range(args.dishes):
+        add_dish(DishCreate(name=f"Dish {i}", description=f"House special number {i}", price=100 + i % 400, category=f"Category {i % 12}"), current_user={"id": one_by_one, "role": "restaurant"}, db=db)
+    single = time.perf_counter() - start
+    db.close()
+
+    bulk = add_restaurant("bulk")
+    body = menu_csv(args.dishes)
+    print(f"{'operation':<26}{'dishes':>8}{'seconds':>10}{'dishes/sec':>13}")
+    print(f"{'POST /dishes per dish':<26}{args.dishes:>8}{single:>10.3f}{args.dishes / single:>13,.0f}")
+    for label in ("bulk import (inserts)", "bulk import (updates)"):
+        start = time.perf_counter()
+        report = import_menu(io.BytesIO(body), "csv", bulk, write=write_queue.run)
+        elapsed = time.perf_counter() - start
+        assert report["failed"] == 0, report["errors"]
+        print(f"{label:<26}{args.dishes:>8}{elapsed:>10.3f}{args.dishes / elapsed:>13,.0f}")
+
+    start = time.perf_counter()
+    size = sum(len(part) for part in export_menu(bulk, "csv"))
+    elapsed = time.perf_counter() - start
+    print(f"{'streaming export (csv)':<26}{args.dishes:>8}{elapsed:>10.3f}{args.dishes / elapsed:>13,.0f}   {size:,} bytes")
+
+    write_queue.shutdown()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Compare mixed read/write throughput of the "basic" and "production" database
+# profiles. Reader threads page through order history on the read engine while
+# writer threads place orders on the write engine, as GET and POST routes do.
+#
+#   cd backend
+#   python -m benchmarks.mixed_load_bench --readers 8 --writers 2 --seconds 5
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_engines, DB_PROFILES
+from app.models.delivery_partner import DeliveryPartner
+from app.models.restaurant import Restaurant
+from app.models.dish import Dish
+from app.models.order import Order, OrderItem
+from app.models.user import User
+
+USERS = 200
+DISHES = 20
+SEED_ORDERS = 5000
+
+def build_database(url: str):
+    engine, _ = create_engines(url, "basic")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    restaurant = Restaurant(name="Bench Kitchen", pin_code="110001", address="1 Bench Road", owner_email="bench@restaurant.com", owner_password_hash="x", restaurant_fees=3.0, status="active")
+    db.add(restaurant)
+    db.add_all([User(name=f"User {i}", email=f"user{i}@customer.com", password_hash="x", role="customer") for i in range(USERS)])
+    db.flush()
+    db.add_all([Dish(restaurant_id=restaurant.id, name=f"Dish {i}", price=100 + i, availability=True) for i in range(DISHES)])
+    db.flush()
+    for i in range(SEED_ORDERS):
+        _add_order(db, restaurant.id, random.randint(1, USERS))
+    db.commit()
+    db.close()
+    engine.dispose()
+
+def _add_order(db, restaurant_id: int, user_id: int):
+    order = Order(user_id=user_id, restaurant_id=restaurant_id, total_amount=300, platform_fees=15, restaurant_fees=9, final_amount=324, delivery_address="1 Bench Road", delivery_pin_code="110001", payment_mode="cash", status="confirmed")
+    db.add(order)
+    db.flush()
+    db.add_all([OrderItem(order_id=order.id, dish_id=dish_id, dish_name=f"Dish {dish_id}", quantity=1, price=100) for dish_id in range(1, 4)])
+
+def run_profile(url: str, profile: str, readers: int, writers: int, seconds: float) -> dict:
+    write_engine, read_engine = create_engines(url, profile)
+    WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    stop = threading.Event()
+    lock = threading.Lock()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    latencies = {"reads": [], "writes": []}
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            db = ReadSession()
+            try:
+                db.query(Order).filter(Order.user_id == random.randint(1, USERS)).order_by(Order.order_date.desc(), Order.id.desc()).limit(20).all()
+                kind = "reads"
+            except OperationalError:
+                kind = None
+            finally:
+                db.close()
+            _record(kind, time.perf_counter() - start)
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            db = WriteSession()
+            try:
+                _add_order(db, 1, random.randint(1, USERS))
+                db.commit()
+                kind = "writes"
+            except OperationalError:
+                db.rollback()
+                kind = None
+            finally:
+                db.close()
+            _record(kind, time.perf_counter() - start)
+
+    def _record(kind, elapsed):
+        with lock:
+            if kind is None:
+                counts["errors"] += 1
+            else:
+                counts[kind] += 1
+                latencies[kind].append(elapsed)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    result = {"profile": profile, "errors": counts["errors"]}
+    for kind in ("reads", "writes"):
+        samples = sorted(latencies[kind])
+        result[kind] = counts[kind] / seconds
+        result[f"{kind}_p95"] = samples[int(len(samples) * 0.95)] * 1000 if samples else 0.0
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed read/write load benchmark per database profile")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per profile, {SEED_ORDERS} seeded orders")
+    print(f"{'profile':<12}{'reads/sec':>12}{'p95 ms':>9}{'writes/sec':>12}{'p95 ms':>9}{'errors':>8}")
+    for profile in DB_PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'mixed_bench.db')}"
+            build_database(url)
+            r = run_profile(url, profile, args.readers, args.writers, args.seconds)
+        print(f"{r['profile']:<12}{r['reads']:>12,.0f}{r['reads_p95']:>9.2f}{r['writes']:>12,.0f}{r['writes_p95']:>9.2f}{r['errors']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Order export memory and latency: the streaming export (app/order_export.py)
+# versus loading the same orders and items with ORM .all() calls. Reports time
+# to the first chunk, total time and peak Python memory for each.
+#
+#   cd backend
+#   python -m benchmarks.order_export_bench --orders 100000
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'export_bench.db')}"
+os.environ.setdefault("CART_BACKEND", "memory")
+
+from sqlalchemy import insert
+from app.database import Base, ReadSessionLocal, engine
+from app.migrations import run_migrations
+from app.models.complaint import Complaint
+from app.models.delivery_partner import DeliveryPartner
+from app.models.dish import Dish
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.order_export import export_orders
+
+RESTAURANTS = 50
+SEED_CHUNK = 10000
+
+def seed(orders: int, items_per_order: int):
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    placed = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Restaurant), [
+            {"name": f"R{i}", "pin_code": "110001", "address": "x", "owner_email": f"r{i}@r.com", "owner_password_hash": "x", "status": "active"}
+            for i in range(RESTAURANTS)
+        ])
+        conn.execute(insert(User), [{"name": "U", "email": "u@c.com", "password_hash": "x", "role": "customer"}])
+    for first in range(0, orders, SEED_CHUNK):
+        ids = range(first + 1, min(first + SEED_CHUNK, orders) + 1)
+        with engine.begin() as conn:
+            conn.execute(insert(Order), [
+                {"id": i, "user_id": 1, "restaurant_id": i % RESTAURANTS + 1, "total_amount": 400, "restaurant_fees": 12, "platform_fees": 20,
+                 "delivery_charges": 40, "discount_amount": 0, "final_amount": 472, "payment_mode": "card", "status": "delivered",
+                 "delivery_address": "x", "delivery_pin_code": "110001", "order_date": placed + timedelta(seconds=i * 13)}
+                for i in ids
+            ])
+            conn.execute(insert(OrderItem), [
+                {"order_id": i, "dish_id": n + 1, "dish_name": f"Dish {n}", "quantity": 2, "price": 200 / items_per_order}
+                for i in ids for n in range(items_per_order)
+            ])
+
+def streaming(fmt: str):
+    # Timed to the first chunk holding orders, not the CSV header line
+    first_chunk, size = None, 0
+    for index, chunk in enumerate(export_orders(fmt)):
+        if first_chunk is None and (fmt != "csv" or index > 0):
+            first_chunk = time.perf_counter()
+        size += len(chunk)
+    return first_chunk, size
+
+def load_all(fmt: str):
+    # What an endpoint built on .all() would hold before writing its first byte
+    db = ReadSessionLocal()
+    orders = db.query(Order).order_by(Order.order_date, Order.id).all()
+    items = db.query(OrderItem).all()
+    first_chunk = time.perf_counter()
+    by_order = {}
+    for item in items:
+        by_order.setdefault(item.order_id, []).append(item)
+    size = sum(len(str(order.id)) + len(by_order.get(order.id, [])) for order in orders)
+    db.close()
+    return first_chunk, size
+
+def measure(label: str, export, fmt: str):
+    # Timed untraced, then run again under tracemalloc (which slows it several
+    # times over) for the memory peak
+    start = time.perf_counter()
+    first_chunk, size = export(fmt)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    export(fmt)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<22}{fmt:>7}{first_chunk - start:>14.3f}{elapsed:>10.2f}{peak / 1024 / 1024:>13.1f}   {size:,} chars")
+
+def main():
+    parser = argparse.ArgumentParser(description="Order export benchmark")
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--items", type=int, default=2, help="items per order")
+    parser.add_argument("--skip-all", action="store_true", help="skip the .all() comparison (it needs memory in proportion to --orders)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.orders, args.items)
+    print(f"seeded {args.orders:,} orders, {args.orders * args.items:,} items in {time.perf_counter() - start:.1f}s\n")
+    print(f"{'export':<22}{'format':>7}{'first chunk s':>14}{'total s':>10}{'peak MiB':>13}")
+    measure("streaming", streaming, "csv")
+    measure("streaming", streaming, "ndjson")
+    if not args.skip_all:
+        measure("ORM .all()", load_all, "-")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
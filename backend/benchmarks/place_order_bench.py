@@ -0,0 +1,113 @@
+# Measure place_order throughput (orders/sec) for different cart sizes, then
+# with concurrent callers with and without group commit.
+#
+#   cd backend
+#   python -m benchmarks.place_order_bench --orders 200 --sizes 1 10 50 --threads 8
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+# Point the app at a scratch database before it is imported, and keep cart
+# clearing in-process so the benchmark never touches the app database
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'order_bench.db')}"
+os.environ.setdefault("CART_BACKEND", "memory")
+
+from app.database import Base, SessionLocal, engine
+from app.models.restaurant import Restaurant
+from app.models.dish import Dish
+from app.models.delivery_partner import DeliveryPartner
+from app.models.platform_fee import PlatformFee
+from app.models.user import User
+from app.routes.customer import CartItem, OrderCreate, place_order
+from app.write_queue import write_queue
+
+MAX_ITEMS = 50
+
+def build_database():
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    db.add(User(name="Bench User", email="bench@customer.com", password_hash="x", role="customer"))
+    db.add(PlatformFee(fee_type="Service Fee", fee_value=5.0, is_percentage=True, is_active=True))
+    db.add(DeliveryPartner(name="Bench Rider", email="rider@delivery.com", password_hash="x", phone="0", pin_code="110001", availability=True))
+    restaurant = Restaurant(name="Bench Kitchen", pin_code="110001", address="1 Bench Road", owner_email="bench@restaurant.com", owner_password_hash="x", restaurant_fees=3.0, status="active")
+    db.add(restaurant)
+    db.flush()
+    for i in range(MAX_ITEMS):
+        db.add(Dish(restaurant_id=restaurant.id, name=f"Dish {i}", price=100 + i, availability=True))
+    db.commit()
+    dish_ids = [d.id for d in db.query(Dish).order_by(Dish.id)]
+    restaurant_id = restaurant.id
+    db.close()
+    return restaurant_id, dish_ids
+
+def order_for(restaurant_id: int, dish_ids: list) -> OrderCreate:
+    return OrderCreate(
+        restaurant_id=restaurant_id,
+        items=[CartItem(dish_id=dish_id, quantity=2) for dish_id in dish_ids],
+        delivery_address="1 Bench Road",
+        delivery_pin_code="110001",
+        payment_mode="cash"
+    )
+
+def run_concurrent(order_data: OrderCreate, orders: int, threads: int) -> float:
+    current_user = {"id": 1, "role": "customer"}
+
+    def worker(count: int):
+        db = SessionLocal()
+        for _ in range(count):
+            place_order(order_data, current_user=current_user, db=db)
+        db.close()
+
+    workers = [threading.Thread(target=worker, args=(orders // threads,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="place_order throughput benchmark")
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    restaurant_id, dish_ids = build_database()
+    current_user = {"id": 1, "role": "customer"}
+
+    print(f"{'items':>6}{'orders':>8}{'orders/sec':>14}{'ms/order':>10}")
+    for size in args.sizes:
+        order_data = order_for(restaurant_id, dish_ids[:size])
+        db = SessionLocal()
+        start = time.perf_counter()
+        for _ in range(args.orders):
+            place_order(order_data, current_user=current_user, db=db)
+        elapsed = time.perf_counter() - start
+        db.close()
+        print(f"{size:>6}{args.orders:>8}{args.orders / elapsed:>14,.1f}{elapsed * 1000 / args.orders:>10.2f}")
+
+    # Same load from concurrent callers: one commit per order versus group commit
+    print(f"\n{args.threads} threads, 3 items per order")
+    print(f"{'max_batch':>10}{'orders/sec':>14}{'avg batch':>11}{'avg commit ms':>15}")
+    order_data = order_for(restaurant_id, dish_ids[:3])
+    for max_batch in (1, write_queue.max_batch):
+        write_queue.max_batch = max_batch
+        before = write_queue.stats()
+        elapsed = run_concurrent(order_data, args.orders, args.threads)
+        after = write_queue.stats()
+        batches = after["batches"] - before["batches"]
+        units = after["units"] - before["units"]
+        commit_ms = after["avg_commit_ms"] * after["batches"] - before["avg_commit_ms"] * before["batches"]
+        placed = args.orders // args.threads * args.threads
+        print(f"{max_batch:>10}{placed / elapsed:>14,.1f}{units / batches:>11.1f}{commit_ms / batches:>15.2f}")
+
+    write_queue.shutdown()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
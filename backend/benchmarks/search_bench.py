@@ -0,0 +1,102 @@
+# Dish search latency against a generated catalogue: full words, short
+# prefixes (autocomplete) and pin-code scoped queries.
+#
+#   cd backend
+#   python -m benchmarks.search_bench --dishes 200000 --queries 200
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'search_bench.db')}"
+os.environ.setdefault("CART_BACKEND", "memory")
+
+from sqlalchemy import text
+from app.database import Base, SessionLocal, engine
+from app.migrations import run_migrations
+from app.models.complaint import Complaint
+from app.models.delivery_partner import DeliveryPartner
+from app.models.dish import Dish
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.search import search_dishes
+
+ADJECTIVES = ["spicy", "crispy", "smoky", "creamy", "tandoori", "garlic", "classic", "loaded", "grilled", "masala"]
+BASES = ["paneer", "chicken", "mushroom", "veggie", "lamb", "prawn", "tofu", "egg", "fish", "corn"]
+DISHES = ["pizza", "burger", "biryani", "wrap", "noodles", "curry", "tacos", "salad", "sandwich", "dosa", "momos", "pasta"]
+CATEGORIES = ["Mains", "Starters", "Snacks", "Combos", "Specials"]
+PIN_CODES = [f"1100{i:02d}" for i in range(50)]
+
+WORKLOADS = {
+    "word": lambda rng: rng.choice(DISHES),
+    "two words": lambda rng: f"{rng.choice(BASES)} {rng.choice(DISHES)}",
+    "prefix": lambda rng: rng.choice(DISHES)[:rng.randint(2, 4)],
+    "phrase + prefix": lambda rng: f"{rng.choice(ADJECTIVES)} {rng.choice(BASES)[:3]}",
+}
+
+def build_database(dishes: int, restaurants: int):
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(Restaurant.__table__.insert(), [
+            {"name": f"Kitchen {i}", "pin_code": PIN_CODES[i % len(PIN_CODES)], "address": "x", "owner_email": f"k{i}@r.com", "owner_password_hash": "x", "status": "active"}
+            for i in range(restaurants)
+        ])
+        # The insert trigger indexes every row as it lands, as it would in production
+        batch = []
+        for i in range(dishes):
+            batch.append({
+                "restaurant_id": i % restaurants + 1,
+                "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(BASES).title()} {rng.choice(DISHES).title()}",
+                "description": f"{rng.choice(ADJECTIVES)} {rng.choice(BASES)} with house sauce",
+                "category": rng.choice(CATEGORIES),
+                "price": rng.randint(80, 600),
+                "availability": rng.random() > 0.1,
+            })
+            if len(batch) == 10000:
+                conn.execute(Dish.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Dish.__table__.insert(), batch)
+        conn.execute(text("INSERT INTO dish_search (dish_search) VALUES ('optimize')"))
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Dish search latency benchmark")
+    parser.add_argument("--dishes", type=int, default=200000)
+    parser.add_argument("--restaurants", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rank-window", type=int, default=0, help="rank only the newest N matches (SEARCH_RANK_WINDOW); 0 ranks every match")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build_database(args.dishes, args.restaurants)
+    print(f"indexed {args.dishes:,} dishes in {time.perf_counter() - start:.1f}s\n")
+
+    db = SessionLocal()
+    rng = random.Random(11)
+    print(f"{'workload':<18}{'scope':<8}{'avg hits':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, make_query in WORKLOADS.items():
+        for scoped in (False, True):
+            timings, hits = [], 0
+            for _ in range(args.queries):
+                query = make_query(rng)
+                pin_code = rng.choice(PIN_CODES) if scoped else None
+                started = time.perf_counter()
+                hits += len(search_dishes(db, query, pin_code, args.limit, args.rank_window))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            scope = "pin" if scoped else "all"
+            print(f"{name:<18}{scope:<8}{hits / args.queries:>9.1f}{percentile(timings, 0.5):>9.2f}{percentile(timings, 0.95):>9.2f}{percentile(timings, 0.99):>9.2f}")
+    db.close()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
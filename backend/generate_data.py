@@ -0,0 +1,353 @@
+import argparse
+import bisect
+import csv
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.config import PIN_CODES_FILE
+from app.database import Base, engine
+from app.migrations import run_migrations
+from app.models.delivery_partner import DeliveryPartner
+from app.models.dish import Dish
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.auth import get_password_hash
+from app.rollups import rebuild_in_database
+from seed_data import seed_database
+
+# Builds a production-sized dataset on top of the seed_data.py fixtures, for
+# load tests and query-plan work. The same --seed and sizes always produce the
+# same rows. Restaurants, customers and partners are spread over pin codes with
+# a Zipf skew, and so are orders over restaurants; order times follow lunch and
+# dinner peaks and grow over the period. Point DATABASE_URL at a new file:
+#
+#   cd backend
+#   DATABASE_URL=sqlite:///./scale.db python generate_data.py --preset full
+#
+# Rows go in through driver-level executemany in large transactions, with
+# journaling and fsync off and the secondary indexes and search triggers
+# dropped; they are rebuilt once at the end. Every generated account shares
+# one password hash (password: scale123).
+
+PRESETS = {
+    "small": {"restaurants": 1000, "dishes": 50000, "users": 10000, "partners": 500, "orders": 200000},
+    "medium": {"restaurants": 10000, "dishes": 500000, "users": 100000, "partners": 5000, "orders": 2000000},
+    "full": {"restaurants": 100000, "dishes": 5000000, "users": 1000000, "partners": 50000, "orders": 20000000},
+}
+PASSWORD = "scale123"
+PIN_SKEW = 0.7
+RESTAURANT_SKEW = 0.8
+# Relative orders per hour of the local day, with lunch and dinner peaks.
+# Order times are stored in UTC, five and a half hours behind Delhi.
+HOUR_WEIGHTS = [1, 0.5, 0.3, 0.2, 0.2, 0.3, 1, 2, 3, 3, 4, 7, 10, 9, 6, 4, 4, 5, 7, 10, 11, 9, 5, 2]
+LOCAL_UTC_OFFSET = timedelta(hours=5, minutes=30)
+ITEMS_PER_ORDER = ([1, 2, 3, 4, 5], [30, 35, 20, 10, 5])
+QUANTITIES = ([1, 2, 3], [75, 20, 5])
+CATEGORIES = ["Starters", "Main Course", "Breads", "Rice", "Desserts", "Beverages", "Pizza", "Burgers", "Sushi", "Salads"]
+DISH_WORDS = [
+    "Paneer", "Chicken", "Veg", "Butter", "Masala", "Tandoori", "Garlic", "Spicy", "Classic", "Cheese",
+    "Mushroom", "Egg", "Mutton", "Fish", "Prawn", "Smoky", "Crispy", "Honey", "Lemon", "Pepper"
+]
+DISH_NAMES = [
+    "Tikka", "Biryani", "Curry", "Naan", "Pizza", "Burger", "Wrap", "Noodles", "Fried Rice", "Salad",
+    "Soup", "Roll", "Kebab", "Pasta", "Sandwich", "Momos", "Dosa", "Thali", "Shake", "Brownie"
+]
+IN_FLIGHT = ["pending", "confirmed", "preparing", "ready", "picked_up"]
+PAYMENT_MODES = ["cash", "card", "upi"]
+BULK_TABLES = ["restaurants", "dishes", "users", "delivery_partners", "orders", "order_items"]
+ORDER_COLUMNS = [
+    "id", "user_id", "restaurant_id", "delivery_partner_id", "total_amount", "restaurant_fees", "platform_fees",
+    "delivery_charges", "discount_amount", "final_amount", "payment_mode", "status", "delivery_address",
+    "delivery_pin_code", "order_date", "delivered_at"
+]
+ITEM_COLUMNS = ["id", "order_id", "dish_id", "dish_name", "quantity", "price"]
+
+def zipf_cum_weights(count: int, skew: float, rng: random.Random) -> list:
+    # Popularity ranks are shuffled so they do not follow the ids
+    weights = [1 / (rank + 1) ** skew for rank in range(count)]
+    rng.shuffle(weights)
+    return cumulative(weights)
+
+def split(total: int, cum_weights: list, minimum: int = 0) -> list:
+    # Shares of `total` in proportion to the weights, at least `minimum` each.
+    # Rounding the running total spreads the remainders evenly.
+    remaining = total - minimum * len(cum_weights)
+    shares, previous = [], 0
+    for cum in cum_weights:
+        running = round(remaining * cum / cum_weights[-1])
+        shares.append(minimum + running - previous)
+        previous = running
+    return shares
+
+def block_starts(first_id: int, counts: list) -> list:
+    starts = []
+    for count in counts:
+        starts.append(first_id)
+        first_id += count
+    return starts
+
+def cumulative(weights: list) -> list:
+    cum, total = [], 0
+    for weight in weights:
+        total += weight
+        cum.append(total)
+    return cum
+
+def pick(rng: random.Random, cum_weights: list, values: list):
+    return values[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+# Dish names, prices and fee rates are functions of the id, so order items can
+# be priced without keeping millions of dishes in memory
+def dish_price(dish_id: int) -> float:
+    return float(79 + (dish_id * 7919) % 420)
+
+def dish_name(dish_id: int, restaurant_index: int) -> str:
+    return f"{DISH_WORDS[(dish_id * 31) % len(DISH_WORDS)]} {DISH_NAMES[(dish_id * 17 + restaurant_index) % len(DISH_NAMES)]}"
+
+def restaurant_rate(restaurant_index: int) -> float:
+    return 2.0 + (restaurant_index % 5) * 0.5
+
+def load_pin_codes(count: int) -> list:
+    with open(PIN_CODES_FILE, newline="") as f:
+        pins = [row["pin_code"] for row in csv.DictReader(f)]
+    # Beyond the mapped pin codes, made-up ones keep the counts realistic
+    pins = pins[:count]
+    pins += [str(110100 + i) for i in range(count - len(pins))]
+    return pins
+
+class Loader:
+    def __init__(self, conn, batch_size: int):
+        self.conn, self.batch_size = conn, batch_size
+
+    def insert(self, table: str, columns: list, rows):
+        # rows may be any iterable; it is written batch_size rows per executemany
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        batch, written = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                written += self.flush(sql, batch)
+                batch = []
+        return written + self.flush(sql, batch)
+
+    def flush(self, sql: str, batch: list) -> int:
+        if batch:
+            self.conn.exec_driver_sql(sql, batch)
+            self.conn.commit()
+        return len(batch)
+
+def next_id(conn, table: str) -> int:
+    return conn.exec_driver_sql(f"SELECT coalesce(max(id), 0) + 1 FROM {table}").scalar()
+
+def drop_secondary_indexes(conn) -> list:
+    # Returns the CREATE statements so they can be replayed after the load.
+    # Indexes behind UNIQUE constraints have no SQL and stay in place.
+    placeholders = ", ".join(f"'{t}'" for t in BULK_TABLES)
+    saved = conn.exec_driver_sql(
+        f"SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({placeholders})"
+    ).all()
+    for kind, name, _ in saved:
+        conn.exec_driver_sql(f"DROP {kind.upper()} {name}")
+    conn.commit()
+    return [sql for _, _, sql in saved]
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - start
+    rate = f", {rows / elapsed:,.0f}/s" if rows else ""
+    print(f"✅ {label}: {rows:,} rows in {elapsed:.1f}s{rate}" if rows is not None else f"✅ {label} in {elapsed:.1f}s")
+
+def generate(sizes: dict, days: int, pin_count: int, seed: int, batch_size: int, end: datetime, skip_rollups: bool):
+    rng = random.Random(seed)
+    pins = load_pin_codes(pin_count)
+    pin_cum = zipf_cum_weights(len(pins), PIN_SKEW, rng)
+    restaurants_per_pin = split(sizes["restaurants"], pin_cum, minimum=1)
+    users_per_pin = split(sizes["users"], pin_cum, minimum=1)
+    partners_per_pin = split(sizes["partners"], pin_cum, minimum=1)
+    password_hash = get_password_hash(PASSWORD)
+
+    with engine.connect() as conn:
+        for pragma in ("journal_mode = OFF", "synchronous = OFF", "locking_mode = EXCLUSIVE", "temp_store = MEMORY", "cache_size = -524288"):
+            conn.exec_driver_sql(f"PRAGMA {pragma}")
+        saved_sql = drop_secondary_indexes(conn)
+        loader = Loader(conn, batch_size)
+
+        # Ids are grouped by pin code, so "customers in pin p" is an id range
+        restaurant_start, user_start, partner_start = next_id(conn, "restaurants"), next_id(conn, "users"), next_id(conn, "delivery_partners")
+        restaurant_pin = [p for p, count in enumerate(restaurants_per_pin) for _ in range(count)]
+        user_starts = block_starts(user_start, users_per_pin)
+        partner_starts = block_starts(partner_start, partners_per_pin)
+        created = end - timedelta(days=days + 30)
+        created_at = created.strftime("%Y-%m-%d %H:%M:%S")
+
+        timed("restaurants", lambda: loader.insert(Restaurant.__tablename__, ["id", "name", "pin_code", "address", "phone", "status", "owner_name", "owner_email", "owner_password_hash", "restaurant_fees", "created_at"], (
+            (restaurant_start + i, f"{rng.choice(DISH_WORDS)} {rng.choice(DISH_NAMES)} House {i}", pins[p], f"{i} Market Road", f"9{i:09d}",
+             "active" if i % 50 else "inactive", f"Owner {i}", f"owner{i}@scale.example", password_hash, restaurant_rate(i), created_at)
+            for i, p in enumerate(restaurant_pin)
+        )))
+        timed("users", lambda: loader.insert(User.__tablename__, ["id", "name", "email", "password_hash", "phone", "role", "address", "pin_code", "created_at"], (
+            (user_start + i, f"Customer {i}", f"customer{i}@scale.example", password_hash, f"8{i:09d}", "customer", f"{i} Residency Lane", pins[p], created_at)
+            for p, count in enumerate(users_per_pin) for i in range(user_starts[p] - user_start, user_starts[p] - user_start + count)
+        )))
+        timed("delivery partners", lambda: loader.insert(DeliveryPartner.__tablename__, ["id", "name", "email", "password_hash", "phone", "pin_code", "availability", "created_at"], (
+            (partner_start + i, f"Partner {i}", f"partner{i}@scale.example", password_hash, f"7{i:09d}", pins[p], i % 10 != 0, created_at)
+            for p, count in enumerate(partners_per_pin) for i in range(partner_starts[p] - partner_start, partner_starts[p] - partner_start + count)
+        )))
+
+        # Menu sizes vary around the average; each restaurant's dishes are an id range
+        dish_start = next_id(conn, "dishes")
+        average = sizes["dishes"] / sizes["restaurants"]
+        dishes_per_restaurant = [max(1, int(rng.uniform(0.4, 1.6) * average)) for _ in restaurant_pin]
+        dishes_per_restaurant[-1] += max(0, sizes["dishes"] - sum(dishes_per_restaurant))
+        dish_starts = block_starts(dish_start, dishes_per_restaurant)
+
+        def dish_rows():
+            dish_id = dish_start
+            for r, count in enumerate(dishes_per_restaurant):
+                for n in range(count):
+                    name = dish_name(dish_id, r)
+                    yield (dish_id, restaurant_start + r, name, f"{name}, made fresh", dish_price(dish_id), None, n % 25 != 0, CATEGORIES[(dish_id * 7) % len(CATEGORIES)], created_at)
+                    dish_id += 1
+
+        timed("dishes", lambda: loader.insert(Dish.__tablename__, ["id", "restaurant_id", "name", "description", "price", "photo_path", "availability", "category", "created_at"], dish_rows()))
+
+        order_start, item_start = next_id(conn, "orders"), next_id(conn, "order_items")
+        restaurant_cum = zipf_cum_weights(len(restaurant_pin), RESTAURANT_SKEW, rng)
+        # Orders are shared out over every hour of the period, weighted by time
+        # of day and growing towards the end, then placed within their hour
+        first_hour = end - timedelta(days=days)
+        hours = days * 24
+        slot_cum, total = [], 0.0
+        for slot in range(hours):
+            total += (0.5 + slot / hours) * HOUR_WEIGHTS[(first_hour + timedelta(hours=slot) + LOCAL_UTC_OFFSET).hour]
+            slot_cum.append(total)
+        orders_per_slot = split(sizes["orders"], slot_cum)
+        in_flight_after = hours - 2
+        # "YYYY-MM-DD HH:" per hour of the period (and the hour after it, for
+        # deliveries that finish then), so timestamps are built without strftime
+        hour_prefixes = [(first_hour + timedelta(hours=slot)).strftime("%Y-%m-%d %H:") for slot in range(hours + 2)]
+        items_cum, quantities_cum = cumulative(ITEMS_PER_ORDER[1]), cumulative(QUANTITIES[1])
+        items = []
+        counts = {"items": 0}
+
+        def stamp(slot: int, seconds: int) -> str:
+            slot += seconds // 3600
+            seconds %= 3600
+            return f"{hour_prefixes[slot]}{seconds // 60:02d}:{seconds % 60:02d}"
+
+        def order_rows():
+            # rng.random() scaled to an int is several times cheaper than
+            # randrange, which matters at tens of millions of rows
+            order_id, item_id = order_start, item_start
+            uniform = rng.random
+            for slot, count in enumerate(orders_per_slot):
+                offsets = sorted(int(uniform() * 3600) for _ in range(count))
+                restaurants = rng.choices(range(len(restaurant_pin)), cum_weights=restaurant_cum, k=count)
+                for offset, r in zip(offsets, restaurants):
+                    p = restaurant_pin[r]
+                    total = 0.0
+                    for _ in range(pick(rng, items_cum, ITEMS_PER_ORDER[0])):
+                        dish_id = dish_starts[r] + int(uniform() * dishes_per_restaurant[r])
+                        quantity = pick(rng, quantities_cum, QUANTITIES[0])
+                        price = dish_price(dish_id)
+                        total += price * quantity
+                        items.append((item_id, order_id, dish_id, dish_name(dish_id, r), quantity, price))
+                        item_id += 1
+                    if slot >= in_flight_after:
+                        status = rng.choice(IN_FLIGHT)
+                    else:
+                        status = "cancelled" if uniform() < 0.06 else "delivered"
+                    restaurant_fees = round(total * restaurant_rate(r) / 100, 2)
+                    platform_fees = round(total * 0.05, 2)
+                    discount = round(min(total * 0.2, 100.0), 2) if total >= 300 and uniform() < 0.15 else 0.0
+                    partner = None if status == "pending" else partner_starts[p] + int(uniform() * partners_per_pin[p])
+                    delivered_at = stamp(slot, offset + 1500 + int(uniform() * 1800)) if status == "delivered" else None
+                    yield (
+                        order_id, user_starts[p] + int(uniform() * users_per_pin[p]), restaurant_start + r, partner, total, restaurant_fees,
+                        platform_fees, 40.0, discount, round(total + restaurant_fees + platform_fees + 40.0 - discount, 2),
+                        PAYMENT_MODES[int(uniform() * 3)], status, f"{1 + int(uniform() * 499)} Residency Lane", pins[p],
+                        stamp(slot, offset), delivered_at
+                    )
+                    order_id += 1
+                    # Items are written as they fill a batch, between order batches
+                    if len(items) >= batch_size:
+                        counts["items"] += loader.insert(OrderItem.__tablename__, ITEM_COLUMNS, items)
+                        items.clear()
+
+        timed("orders", lambda: loader.insert(Order.__tablename__, ORDER_COLUMNS, order_rows()))
+        counts["items"] += loader.insert(OrderItem.__tablename__, ITEM_COLUMNS, items)
+        print(f"   with {counts['items']:,} order items")
+
+        def rebuild():
+            for sql in saved_sql:
+                conn.exec_driver_sql(sql)
+            conn.commit()
+
+        timed(f"{len(saved_sql)} indexes and triggers rebuilt", rebuild)
+
+        def index_dishes():
+            conn.exec_driver_sql(
+                "INSERT INTO dish_search (rowid, name, description, category, restaurant_name, pin_code, restaurant_id) "
+                "SELECT d.id, d.name, coalesce(d.description, ''), coalesce(d.category, ''), r.name, r.pin_code, r.id "
+                "FROM dishes d JOIN restaurants r ON r.id = d.restaurant_id WHERE d.id >= ?", (dish_start,)
+            )
+            conn.commit()
+
+        timed("dish search index", index_dishes)
+        def analyze():
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+
+        timed("ANALYZE", analyze)
+        for pragma in ("locking_mode = NORMAL", "synchronous = NORMAL", "journal_mode = WAL"):
+            conn.exec_driver_sql(f"PRAGMA {pragma}")
+
+    if not skip_rollups:
+        timed("revenue rollups", lambda: rebuild_in_database(engine))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset on top of the seed_data.py fixtures")
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    for name in PRESETS["small"]:
+        parser.add_argument(f"--{name}", type=int, help=f"override the preset's {name} count")
+    parser.add_argument("--days", type=int, default=365, help="days of order history")
+    parser.add_argument("--end", help="end of the history, UTC (ISO 8601); defaults to the current hour")
+    parser.add_argument("--pin-codes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=100000, help="rows per executemany and commit")
+    parser.add_argument("--skip-rollups", action="store_true", help="leave revenue rollups for backfill_rollups.py")
+    args = parser.parse_args()
+
+    # Everything is checked before the app is imported: importing it creates
+    # and migrates the database at DATABASE_URL
+    sizes = {name: getattr(args, name) or value for name, value in PRESETS[args.preset].items()}
+    if any(count < 0 for count in sizes.values()):
+        parser.error("counts cannot be negative")
+    if args.pin_codes < 1 or args.days < 1 or args.batch_size < 1:
+        parser.error("--pin-codes, --days and --batch-size must be at least 1")
+    if sizes["restaurants"] < args.pin_codes or sizes["users"] < args.pin_codes or sizes["partners"] < args.pin_codes:
+        parser.error("restaurants, users and partners must each be at least --pin-codes")
+    try:
+        end = datetime.fromisoformat(args.end) if args.end else datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    except ValueError:
+        parser.error(f"--end is not an ISO 8601 date: {args.end}")
+
+    import app.main  # noqa: F401  registers every model before create_all
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT count(*) FROM orders")).scalar() or conn.execute(text("SELECT count(*) FROM restaurants")).scalar():
+            parser.error("the database already has data; point DATABASE_URL at a new file")
+
+    start = time.perf_counter()
+    seed_database()
+    engine.dispose()
+    print(f"\n📈 Generating {', '.join(f'{v:,} {k}' for k, v in sizes.items())} over {args.pin_codes} pin codes and {args.days} days (seed {args.seed})...")
+    generate(sizes, args.days, args.pin_codes, args.seed, args.batch_size, end, args.skip_rollups)
+    print(f"\n🎉 Done in {time.perf_counter() - start:.0f}s. Generated accounts use the password '{PASSWORD}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# A scratch database, set before the app is imported so its engines use it
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'test.db')}"
+os.environ.setdefault("CART_BACKEND", "memory")
+
+import pytest
+from sqlalchemy import event
+import app.main  # creates and migrates the schema
+from app.database import Base, SessionLocal, engine
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+@contextmanager
+def count_statements():
+    # Counts SQL statements run on the writer engine inside the block
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,28 @@
+import pytest
+from app.cart_store import CartStore, InMemoryCartStore, SQLiteCartStore
+
+def test_store_missing_a_method_cannot_be_created():
+    class NoClear(CartStore):
+        def get(self, user_id):
+            return {}
+
+        def add(self, user_id, dish_id, quantity):
+            return quantity
+
+        def remove(self, user_id, dish_id):
+            return False
+
+    with pytest.raises(TypeError, match="clear"):
+        NoClear()
+
+@pytest.mark.parametrize("store", [InMemoryCartStore, SQLiteCartStore])
+def test_backends_implement_the_interface(db, store):
+    cart = store()
+    assert cart.add(1, 10, 2) == 2
+    assert cart.add(1, 10, -1) == 1
+    assert cart.add(1, 11, -1) is None
+    assert cart.get(1) == {10: 1}
+    assert cart.remove(1, 10) is True
+    cart.add(1, 12, 1)
+    cart.clear(1)
+    assert cart.get(1) == {}
@@ -0,0 +1,28 @@
+import pytest
+from app.dispatch import DispatchIndex, FirstAvailablePolicy, LeastLoadedPolicy
+
+def make_index(policy, max_active_orders: int) -> DispatchIndex:
+    index = DispatchIndex(policy=policy, max_active_orders=max_active_orders)
+    # (partner_id, pin_code, available, active_orders)
+    index.load_rows([(1, "110001", True, 0), (2, "110001", True, 0), (3, "110001", True, 0), (4, "110002", True, 0)])
+    return index
+
+def test_first_available_skips_partners_at_the_cap():
+    index = make_index(FirstAvailablePolicy(), max_active_orders=2)
+    assert [index.assign("110001") for _ in range(7)] == [1, 1, 2, 2, 3, 3, None]
+    # Releasing the first partner makes it first in line again
+    index.release(1)
+    assert index.assign("110001") == 1
+    assert index.assign("110001") is None
+    assert index.stats()["active_orders"] == 6
+
+@pytest.mark.parametrize("policy", [FirstAvailablePolicy, LeastLoadedPolicy])
+def test_cap_stops_assignment_once_every_partner_is_full(policy):
+    index = make_index(policy(), max_active_orders=1)
+    assert sorted(index.assign("110001") for _ in range(3)) == [1, 2, 3]
+    assert index.assign("110001") is None
+    assert index.assign("110002") == 4
+
+def test_least_loaded_spreads_orders_without_a_cap():
+    index = make_index(LeastLoadedPolicy(), max_active_orders=0)
+    assert [index.assign("110001") for _ in range(6)] == [1, 2, 3, 1, 2, 3]
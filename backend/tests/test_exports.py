@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.config import EXPORT_MAX_CONCURRENT
+from app.database import export_engine, read_engine
+from app.exports import ExportLimiter
+
+def rows(count: int):
+    for i in range(count):
+        yield f"{i}\n"
+
+def serve(response, disconnect: bool = False) -> bytes:
+    # Runs the response as the server would; with `disconnect` the client goes
+    # away before the first chunk
+    body = []
+
+    async def receive():
+        if disconnect:
+            return {"type": "http.disconnect"}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        body.append(message.get("body", b""))
+
+    asyncio.run(response({"type": "http"}, receive, send))
+    return b"".join(body)
+
+def test_exports_past_the_limit_get_503_until_a_slot_frees():
+    limiter = ExportLimiter(max_concurrent=2)
+    first = limiter.stream(rows(3), "text/csv", "a.csv")
+    second = limiter.stream(rows(3), "text/csv", "b.csv")
+    with pytest.raises(HTTPException) as busy:
+        limiter.stream(rows(3), "text/csv", "c.csv")
+    assert busy.value.status_code == 503
+
+    assert serve(first) == b"0\n1\n2\n"
+    third = limiter.stream(rows(1), "text/csv", "c.csv")
+    assert limiter.stats() == {"active": 2, "max_concurrent": 2, "completed": 1, "rejected": 1}
+    serve(second)
+    serve(third)
+    assert limiter.stats()["active"] == 0
+
+def test_slot_is_freed_when_the_client_disconnects():
+    limiter = ExportLimiter(max_concurrent=1)
+    serve(limiter.stream(rows(1000), "text/csv", "a.csv"), disconnect=True)
+    assert limiter.stats()["active"] == 0
+    limiter.stream(rows(1), "text/csv", "b.csv")
+
+def test_exports_have_their_own_pool():
+    assert export_engine is not read_engine
+    assert export_engine.pool.size() == EXPORT_MAX_CONCURRENT
@@ -0,0 +1,47 @@
+from app.database import engine
+from app.fees import FeeSnapshotCache, fees_at_version, record_fee_change
+from app.migrations import _initial_restaurant_rates
+from app.models.fee_snapshot import FeeSnapshot
+from app.models.platform_fee import PlatformFee
+from app.models.restaurant import Restaurant
+
+def seed_restaurants(db, rates):
+    restaurants = [
+        Restaurant(name=f"Restaurant {i}", pin_code="110001", address="x", owner_email=f"r{i}@test.com", owner_password_hash="x", status="active", restaurant_fees=rate)
+        for i, rate in enumerate(rates)
+    ]
+    db.add_all(restaurants)
+    db.add(PlatformFee(fee_type="platform", fee_value=5, is_percentage=True, is_active=True))
+    db.commit()
+    return [restaurant.id for restaurant in restaurants]
+
+def test_initial_snapshot_keeps_original_rates_after_a_change(db):
+    first, second = seed_restaurants(db, [3, 7])
+    initial = FeeSnapshotCache().rebuild(db).version
+
+    restaurant = db.get(Restaurant, first)
+    restaurant.restaurant_fees = 12
+    record_fee_change(db, "restaurant_fee_updated", restaurant=restaurant)
+    db.commit()
+    changed = FeeSnapshotCache().rebuild(db).version
+
+    before = fees_at_version(db, initial)
+    assert dict(before.restaurant_rates) == {first: 3.0, second: 7.0}
+    assert before.platform_fees(100) == 5.0
+    assert dict(fees_at_version(db, changed).restaurant_rates) == {first: 12.0, second: 7.0}
+
+def test_migration_records_rates_missing_from_a_platform_only_snapshot(db):
+    first, second = seed_restaurants(db, [3, 7])
+    # What the first snapshot used to hold: the platform fee alone
+    record_fee_change(db, "initial")
+    db.commit()
+    old = db.query(FeeSnapshot.version).scalar()
+
+    with engine.begin() as conn:
+        _initial_restaurant_rates(conn)
+        _initial_restaurant_rates(conn)
+
+    assert db.query(FeeSnapshot).filter(FeeSnapshot.restaurant_id.isnot(None)).count() == 2
+    fees = fees_at_version(db, old)
+    assert dict(fees.restaurant_rates) == {first: 3.0, second: 7.0}
+    assert round(fees.restaurant_fees(second, 100), 2) == 7.0
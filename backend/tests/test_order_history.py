@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import pytest
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.routes.customer import get_order_history
+from conftest import count_statements
+
+def seed_orders(db, count: int, items_per_order: int = 3) -> int:
+    user = User(name="Customer", email="customer@test.com", password_hash="x", role="customer")
+    restaurants = [
+        Restaurant(name=f"Restaurant {i}", pin_code="110001", address="x", owner_email=f"r{i}@test.com", owner_password_hash="x", status="active")
+        for i in range(3)
+    ]
+    db.add_all([user, *restaurants])
+    db.flush()
+    placed = datetime(2026, 1, 1)
+    for i in range(count):
+        order = Order(
+            user_id=user.id, restaurant_id=restaurants[i % len(restaurants)].id, total_amount=300, restaurant_fees=9,
+            platform_fees=15, delivery_charges=40, discount_amount=0, final_amount=364, payment_mode="cash",
+            status="delivered", delivery_address="x", delivery_pin_code="110001", order_date=placed + timedelta(minutes=i)
+        )
+        db.add(order)
+        db.flush()
+        db.add_all([OrderItem(order_id=order.id, dish_id=n + 1, dish_name=f"Dish {n}", quantity=1, price=100) for n in range(items_per_order)])
+    db.commit()
+    return user.id
+
+@pytest.mark.parametrize("orders", [1, 5, 40])
+def test_order_history_query_count_is_fixed(db, orders):
+    user_id = seed_orders(db, orders)
+    db.expire_all()
+
+    with count_statements() as statements:
+        page = get_order_history(limit=20, cursor=None, current_user={"id": user_id}, db=db)
+
+    # One query for the page of orders with their restaurant names, one for all of their items
+    assert len(statements) == 2, statements
+    assert len(page["orders"]) == min(orders, 20)
+    assert all(len(order["items"]) == 3 for order in page["orders"])
+    assert all(order["restaurant_name"].startswith("Restaurant") for order in page["orders"])
+
+def test_order_history_next_page_query_count_is_fixed(db):
+    user_id = seed_orders(db, 30)
+    first = get_order_history(limit=10, cursor=None, current_user={"id": user_id}, db=db)
+    db.expire_all()
+
+    with count_statements() as statements:
+        second = get_order_history(limit=10, cursor=first["next_cursor"], current_user={"id": user_id}, db=db)
+
+    assert len(statements) == 2, statements
+    assert len(second["orders"]) == 10
+    assert {o["id"] for o in first["orders"]}.isdisjoint(o["id"] for o in second["orders"])
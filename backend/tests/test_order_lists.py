@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from app.models.delivery_partner import DeliveryPartner
+from app.models.dish import Dish
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.routes.delivery import get_assigned_orders
+from app.routes.restaurant_routes import get_restaurant_dishes, get_restaurant_orders
+from conftest import count_statements
+
+def seed_orders(db, count: int, items_per_order: int = 3):
+    user = User(name="Customer", email="customer@test.com", password_hash="x", role="customer")
+    restaurants = [
+        Restaurant(name=f"Restaurant {i}", pin_code="110001", address="x", phone="999", owner_email=f"r{i}@test.com", owner_password_hash="x", status="active")
+        for i in range(2)
+    ]
+    partner = DeliveryPartner(name="Partner", email="partner@test.com", password_hash="x", phone="999", pin_code="110001")
+    db.add_all([user, partner, *restaurants])
+    db.flush()
+    placed = datetime(2026, 1, 1)
+    for i in range(count):
+        order = Order(
+            user_id=user.id, restaurant_id=restaurants[i % 2].id,
+            delivery_partner_id=partner.id, total_amount=300, restaurant_fees=9, platform_fees=15, delivery_charges=40,
+            discount_amount=0, final_amount=364, payment_mode="cash", status="ready", delivery_address="x",
+            delivery_pin_code="110001", order_date=placed + timedelta(minutes=i)
+        )
+        db.add(order)
+        db.flush()
+        db.add_all([OrderItem(order_id=order.id, dish_id=n + 1, dish_name=f"Dish {n}", quantity=1, price=100) for n in range(items_per_order)])
+    db.commit()
+    return restaurants[0].id, partner.id
+
+@pytest.mark.parametrize("orders", [1, 10, 80])
+def test_restaurant_orders_query_count_is_fixed(db, orders):
+    restaurant_id, _ = seed_orders(db, orders)
+    db.expire_all()
+
+    with count_statements() as statements:
+        page = get_restaurant_orders(status=None, limit=20, cursor=None, current_user={"id": restaurant_id}, db=db)
+
+    # One query for the page of orders, one for all of their items
+    assert len(statements) == 2, statements
+    assert len(page["orders"]) == min((orders + 1) // 2, 20)
+    assert all(len(order["items"]) == 3 for order in page["orders"])
+
+@pytest.mark.parametrize("orders", [1, 10, 40])
+def test_assigned_orders_query_count_is_fixed(db, orders):
+    _, partner_id = seed_orders(db, orders)
+    db.expire_all()
+
+    with count_statements() as statements:
+        page = get_assigned_orders(status=None, limit=20, cursor=None, current_user={"id": partner_id}, db=db)
+
+    # One query for the page of orders with their restaurants, one for all of their items
+    assert len(statements) == 2, statements
+    assert len(page["orders"]) == min(orders, 20)
+    assert all(len(order["items"]) == 3 for order in page["orders"])
+    assert all(order["restaurant"]["name"].startswith("Restaurant") for order in page["orders"])
+
+def test_assigned_orders_next_page_query_count_is_fixed(db):
+    _, partner_id = seed_orders(db, 30)
+    first = get_assigned_orders(status=None, limit=10, cursor=None, current_user={"id": partner_id}, db=db)
+    db.expire_all()
+
+    with count_statements() as statements:
+        second = get_assigned_orders(status=None, limit=10, cursor=first["next_cursor"], current_user={"id": partner_id}, db=db)
+
+    assert len(statements) == 2, statements
+    assert len(second["orders"]) == 10
+    assert {o["id"] for o in first["orders"]}.isdisjoint(o["id"] for o in second["orders"])
+
+def walk(fetch, limit: int, pages: int = 100) -> list:
+    # Every id a list returns, following next_cursor to the end
+    ids, cursor = [], None
+    for _ in range(pages):
+        page = fetch(limit, cursor)
+        ids += [row["id"] for row in page[next(key for key in page if key != "next_cursor")]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+    raise AssertionError(f"no last page after {pages} pages: {ids}")
+
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_ascending_list_follows_whole_second_timestamps(db, limit):
+    restaurant = Restaurant(name="Restaurant", pin_code="110001", address="x", owner_email="r@test.com", owner_password_hash="x", status="active")
+    db.add(restaurant)
+    db.flush()
+    # Python datetimes are stored as "...:SS.000000"; CURRENT_TIMESTAMP-style rows
+    # as "...:SS". Both land on the same second, and several rows tie on each.
+    placed = datetime(2026, 1, 1)
+    db.add_all([Dish(restaurant_id=restaurant.id, name=f"Dish {i}", price=100, created_at=placed + timedelta(seconds=i // 3)) for i in range(6)])
+    db.flush()
+    for i in range(3):
+        db.execute(text("INSERT INTO dishes (restaurant_id, name, price, created_at) VALUES (:r, :name, 100, '2026-01-01 00:00:01')"), {"r": restaurant.id, "name": f"Default {i}"})
+    db.commit()
+    expected = [dish.id for dish in db.query(Dish).order_by(Dish.created_at, Dish.id)]
+
+    ids = walk(lambda limit, cursor: get_restaurant_dishes(limit=limit, cursor=cursor, current_user={"id": restaurant.id}, db=db), limit)
+
+    assert ids == expected
+
+@pytest.mark.parametrize("limit", [1, 2, 7])
+def test_descending_list_keeps_rows_that_tie_on_the_timestamp(db, limit):
+    restaurant_id, _ = seed_orders(db, 6)
+    # Whole seconds, with every order of restaurant 0 on one of two instants,
+    # plus one order with no date at all
+    for n, order in enumerate(db.query(Order).filter(Order.restaurant_id == restaurant_id).order_by(Order.id)):
+        order.order_date = datetime(2026, 1, 1, 12) if n < 2 else datetime(2026, 1, 1, 11)
+    db.add(Order(
+        user_id=1, restaurant_id=restaurant_id, total_amount=300, restaurant_fees=9, platform_fees=15, delivery_charges=40,
+        discount_amount=0, final_amount=364, payment_mode="cash", status="ready", delivery_address="x",
+        delivery_pin_code="110001", order_date=None
+    ))
+    db.commit()
+    expected = [order.id for order in db.query(Order).filter(Order.restaurant_id == restaurant_id).order_by(Order.order_date.desc(), Order.id.desc())]
+
+    ids = walk(lambda limit, cursor: get_restaurant_orders(status=None, limit=limit, cursor=cursor, current_user={"id": restaurant_id}, db=db), limit)
+
+    assert len(expected) == 4
+    assert ids == expected
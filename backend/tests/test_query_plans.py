@@ -0,0 +1,121 @@
+# Query-plan regression tests for the hot read routes. Each route handler runs
+# against a seeded scratch database, every SELECT it issues is captured, and
+# SQLite's EXPLAIN QUERY PLAN must not contain a full table scan. Run this after
+# changing a hot query or an index.
+from datetime import datetime
+import pytest
+from sqlalchemy import event, text
+from app.database import Base, SessionLocal, engine, export_engine, read_engine
+from app.models.complaint import Complaint
+from app.models.delivery_partner import DeliveryPartner
+from app.models.dish import Dish
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.order_export import export_orders
+from app.rollups import backfill
+from app.routes import admin, customer, delivery, restaurant_routes, support
+
+RESTAURANTS = 100
+USERS = 200
+PARTNERS = 50
+ORDERS = 2000
+
+CUSTOMER = {"id": 1, "role": "customer"}
+RESTAURANT = {"id": 1, "role": "restaurant"}
+
+def second_page(route, **kwargs):
+    # First page, then the page after it, so the keyset cursor filter is covered
+    first = route(**kwargs)
+    if first["next_cursor"]:
+        route(cursor=first["next_cursor"], **kwargs)
+
+HOT_ROUTES = {
+    "GET /customer/restaurants?pin_code": lambda db: customer.browse_restaurants(pin_code="110001", nearby=1, limit=5, cursor=None, current_user=CUSTOMER, db=db),
+    "GET /customer/restaurants?nearby": lambda db: second_page(customer.browse_restaurants, pin_code="110001", nearby=5, limit=3, current_user=CUSTOMER, db=db),
+    "GET /customer/orders": lambda db: second_page(customer.get_order_history, limit=3, current_user=CUSTOMER, db=db),
+    "GET /customer/orders/{id}": lambda db: customer.track_order(order_id=1, current_user=CUSTOMER, db=db),
+    "GET /customer/complaints": lambda db: second_page(customer.get_complaints, limit=1, current_user=CUSTOMER, db=db),
+    "GET /restaurant/dishes": lambda db: second_page(restaurant_routes.get_restaurant_dishes, limit=2, current_user=RESTAURANT, db=db),
+    "GET /restaurant/orders": lambda db: second_page(restaurant_routes.get_restaurant_orders, status=None, limit=20, current_user=RESTAURANT, db=db),
+    "GET /restaurant/orders?status": lambda db: second_page(restaurant_routes.get_restaurant_orders, status="pending", limit=10, current_user=RESTAURANT, db=db),
+    "GET /delivery/orders": lambda db: second_page(delivery.get_assigned_orders, status=None, limit=2, current_user={"id": 4, "role": "delivery_partner"}, db=db),
+    "GET /delivery/orders?status": lambda db: second_page(delivery.get_assigned_orders, status="delivered", limit=5, current_user={"id": 6, "role": "delivery_partner"}, db=db),
+    "GET /support/complaints": lambda db: second_page(support.get_all_complaints, status=None, order_id=None, created_from=None, created_to=None, limit=20, db=db),
+    "GET /support/complaints?status": lambda db: second_page(support.get_all_complaints, status="open", order_id=None, created_from=None, created_to=None, limit=20, db=db),
+    "GET /support/complaints?dates": lambda db: second_page(support.get_all_complaints, status="in_progress", order_id=None, created_from="2000-01-01", created_to="2999-01-01", limit=20, db=db),
+    "GET /support/complaints?order_id": lambda db: second_page(support.get_all_complaints, status=None, order_id=11, created_from=None, created_to=None, limit=20, db=db),
+    "GET /support/complaints/summary": lambda db: support.get_complaint_summary(db=db),
+    "GET /support/orders/{id}": lambda db: support.get_order_details(order_id=1, db=db),
+    "GET /admin/revenue?restaurant_id": lambda db: admin.get_revenue(granularity="hour", restaurant_id=1, pin_code=None, start=None, end=None, db=db),
+    "GET /admin/revenue/summary": lambda db: admin.get_revenue_summary(db=db),
+    "GET /admin/orders/export": lambda db: list(export_orders("csv", batch_size=500)),
+    "GET /admin/orders/export?ndjson": lambda db: list(export_orders("ndjson", restaurant_id=1, batch_size=5)),
+    "GET /admin/orders/export?dates": lambda db: list(export_orders("csv", start=datetime(2000, 1, 1), end=datetime(2999, 1, 1), status="delivered")),
+}
+
+@pytest.fixture(scope="module")
+def seeded_db():
+    db = SessionLocal()
+    db.add_all([Restaurant(name=f"R{i}", pin_code=f"1100{i % 25 + 1:02d}", address="x", owner_email=f"r{i}@r.com", owner_password_hash="x", status="active") for i in range(RESTAURANTS)])
+    db.add_all([User(name=f"U{i}", email=f"u{i}@c.com", password_hash="x", role="customer") for i in range(USERS)])
+    db.add_all([DeliveryPartner(name=f"P{i}", email=f"p{i}@d.com", password_hash="x", phone="0", pin_code=f"1100{i % 5:02d}", availability=i % 3 != 0) for i in range(PARTNERS)])
+    db.flush()
+    db.add_all([Dish(restaurant_id=r + 1, name=f"D{r}-{i}", price=100, availability=True) for r in range(RESTAURANTS) for i in range(5)])
+    statuses = ["pending", "confirmed", "preparing", "ready", "picked_up", "delivered", "delivered", "delivered"]
+    orders = [
+        Order(user_id=i % USERS + 1, restaurant_id=i % RESTAURANTS + 1, delivery_partner_id=i % PARTNERS + 1, total_amount=100, final_amount=140, delivery_address="x", delivery_pin_code="110001", status=statuses[i % len(statuses)])
+        for i in range(ORDERS)
+    ]
+    db.add_all(orders)
+    db.flush()
+    db.add_all([OrderItem(order_id=o.id, dish_id=1, dish_name="D", quantity=1, price=100) for o in orders for _ in range(2)])
+    db.add_all([Complaint(order_id=o.id, user_id=o.user_id, description="late", status=("open", "in_progress", "resolved", "closed")[i % 4]) for i, o in enumerate(orders[::10])])
+    db.commit()
+    backfill(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    try:
+        yield db
+    finally:
+        db.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+            conn.execute(text("ANALYZE"))
+
+def explain(statement: str, parameters) -> list:
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+def is_full_scan(detail: str) -> bool:
+    # "SCAN t" reads every row; "SCAN t USING [COVERING] INDEX ..." walks an index
+    # in order and stops at the LIMIT, which is how keyset pages are read
+    return detail.startswith("SCAN ") and " USING " not in detail
+
+@pytest.mark.parametrize("route", HOT_ROUTES)
+def test_hot_route_has_no_full_table_scan(seeded_db, route):
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    # The streaming exports read on their own session from the export pool
+    engines = {engine, read_engine, export_engine}
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", capture)
+    try:
+        HOT_ROUTES[route](seeded_db)
+    finally:
+        for bind in engines:
+            event.remove(bind, "before_cursor_execute", capture)
+
+    assert captured
+    # Identical statements only need checking once
+    scans = {}
+    for statement, parameters in dict(captured).items():
+        details = [detail for detail in explain(statement, parameters) if is_full_scan(detail)]
+        if details:
+            scans[" ".join(statement.split())] = details
+    assert not scans, scans
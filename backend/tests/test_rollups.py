@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app.database import SessionLocal, engine
+from app.models.delivery_partner import DeliveryPartner
+from app.models.order import Order
+from app.models.restaurant import Restaurant
+from app.models.user import User
+from app.rollups import GRANULARITIES, backfill, rebuild_in_database, revenue_series
+from app.routes.delivery import DeliveryStatusUpdate, update_delivery_status
+from app.routes.restaurant_routes import OrderStatusUpdate, update_order_status
+
+START = datetime(2026, 3, 1, 9)
+PIN_CODES = ["110001", "110002"]
+
+def seed_orders(db) -> tuple:
+    user = User(name="Customer", email="customer@test.com", password_hash="x", role="customer")
+    restaurants = [
+        Restaurant(name=f"Restaurant {i}", pin_code=PIN_CODES[i], address="x", owner_email=f"r{i}@test.com", owner_password_hash="x", status="active")
+        for i in range(2)
+    ]
+    partner = DeliveryPartner(name="Partner", email="partner@test.com", password_hash="x", phone="999", pin_code="110001")
+    db.add_all([user, partner, *restaurants])
+    db.flush()
+    # Spread over hours on two days, with uneven amounts; every fourth order
+    # waits in the kitchen, the rest are ready for pickup
+    orders = [
+        Order(
+            user_id=user.id, restaurant_id=restaurants[i % 2].id, delivery_partner_id=partner.id,
+            total_amount=100 + i * 17.25, restaurant_fees=3.1 + i, platform_fees=5.55, delivery_charges=40,
+            discount_amount=i % 3 * 10.5, final_amount=148.65 + i * 18.1, payment_mode="cash",
+            status="preparing" if i % 4 == 0 else "ready", delivery_address="x", delivery_pin_code=PIN_CODES[i // 2 % 2],
+            order_date=START + timedelta(minutes=47 * i, seconds=i % 2 * 0.25)
+        )
+        for i in range(24)
+    ]
+    db.add_all(orders)
+    db.commit()
+    return [restaurant.id for restaurant in restaurants], partner.id, [(order.id, order.restaurant_id, order.status) for order in orders]
+
+def every_series(restaurant_ids: list) -> dict:
+    db = SessionLocal()
+    try:
+        end = START + timedelta(days=2)
+        series = {}
+        for granularity in GRANULARITIES:
+            keys = [("all", ""), *[("restaurant", str(i)) for i in restaurant_ids], *[("pin_code", code) for code in PIN_CODES]]
+            for dimension, key in keys:
+                series[granularity, dimension, key] = revenue_series(db, granularity, dimension, key, START, end)
+        return series
+    finally:
+        db.close()
+
+def test_incremental_rollups_match_backfill_and_rebuild(db):
+    restaurant_ids, partner_id, orders = seed_orders(db)
+    for n, (order_id, restaurant_id, status) in enumerate(orders):
+        if status == "preparing":
+            update_order_status(order_id, OrderStatusUpdate(status="cancelled"), current_user={"id": restaurant_id})
+            # A cancelled order can never be delivered, or counted twice
+            with pytest.raises(HTTPException):
+                update_delivery_status(order_id, DeliveryStatusUpdate(status="delivered"), current_user={"id": partner_id})
+        elif n % 4 == 1:
+            update_delivery_status(order_id, DeliveryStatusUpdate(status="picked_up"), current_user={"id": partner_id})
+            update_delivery_status(order_id, DeliveryStatusUpdate(status="delivered"), current_user={"id": partner_id})
+        elif n % 4 == 2:
+            update_delivery_status(order_id, DeliveryStatusUpdate(status="delivered"), current_user={"id": partner_id})
+        # The rest stay picked up, with no outcome yet
+        else:
+            update_delivery_status(order_id, DeliveryStatusUpdate(status="picked_up"), current_user={"id": partner_id})
+
+    incremental = every_series(restaurant_ids)
+    assert incremental["day", "all", ""]["totals"]["delivered_orders"] == 12
+    assert incremental["day", "all", ""]["totals"]["cancelled_orders"] == 6
+    assert len(incremental["hour", "all", ""]["buckets"]) > len(incremental["day", "all", ""]["buckets"]) > 1
+    assert all(incremental["day", "restaurant", str(i)]["buckets"] for i in restaurant_ids)
+
+    assert backfill(engine, chunk_size=5) == 18
+    assert every_series(restaurant_ids) == incremental
+
+    rebuild_in_database(engine)
+    assert every_series(restaurant_ids) == incremental
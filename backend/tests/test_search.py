@@ -0,0 +1,37 @@
+from app.models.dish import Dish
+from app.models.restaurant import Restaurant
+from app.search import search_dishes
+
+def seed_menu(db, newer_matches: int, unavailable: int):
+    restaurant = Restaurant(name="Spice Route", pin_code="110001", address="x", owner_email="spice@test.com", owner_password_hash="x", status="active")
+    db.add(restaurant)
+    db.flush()
+    # The oldest dish is the best match; many newer dishes only mention the word
+    db.add(Dish(restaurant_id=restaurant.id, name="Paneer Tikka", description="", price=250, availability=True))
+    db.flush()
+    db.add_all([
+        Dish(restaurant_id=restaurant.id, name=f"Thali {i}", description="with a side of paneer and rice and lentils", price=300, availability=True)
+        for i in range(newer_matches)
+    ])
+    db.add_all([
+        Dish(restaurant_id=restaurant.id, name=f"Paneer Special {i}", description="", price=280, availability=False)
+        for i in range(unavailable)
+    ])
+    db.commit()
+
+def test_oldest_exact_name_match_ranks_first(db):
+    seed_menu(db, newer_matches=60, unavailable=0)
+    results = search_dishes(db, "paneer", limit=5)
+    assert results[0]["name"] == "Paneer Tikka"
+
+def test_rank_window_falls_back_when_the_page_is_short(db):
+    seed_menu(db, newer_matches=0, unavailable=30)
+    # The newest matches are all unavailable, so a window of 10 finds nothing
+    results = search_dishes(db, "paneer", limit=5, rank_window=10)
+    assert [r["name"] for r in results] == ["Paneer Tikka"]
+
+def test_unavailable_dishes_do_not_shorten_the_page(db):
+    seed_menu(db, newer_matches=10, unavailable=200)
+    results = search_dishes(db, "paneer", limit=10)
+    assert len(results) == 10
+    assert all("Special" not in r["name"] for r in results)
@@ -0,0 +1,35 @@
+from datetime import datetime
+import pytest
+from app.models.complaint import Complaint
+from app.routes.support import get_all_complaints
+
+CREATED = [
+    datetime(2024, 1, 4, 23, 59, 59),
+    datetime(2024, 1, 5, 0, 0),
+    datetime(2024, 1, 5, 13, 30),
+    datetime(2024, 1, 5, 23, 59, 59, 500000),
+    datetime(2024, 1, 6, 0, 0),
+]
+
+@pytest.fixture
+def complaints(db):
+    rows = [Complaint(order_id=i + 1, user_id=1, description="late", status="open", created_at=created) for i, created in enumerate(CREATED)]
+    db.add_all(rows)
+    db.commit()
+    return {created: row.id for created, row in zip(CREATED, rows)}
+
+def created(db, created_from=None, created_to=None) -> list:
+    page = get_all_complaints(status=None, order_id=None, created_from=created_from, created_to=created_to, limit=20, cursor=None, db=db)
+    return sorted(c["created_at"] for c in page["complaints"])
+
+def test_bare_end_date_includes_the_whole_day(db, complaints):
+    assert created(db, "2024-01-05", "2024-01-05") == [
+        "2024-01-05T00:00:00", "2024-01-05T13:30:00", "2024-01-05T23:59:59.500000"
+    ]
+    assert len(created(db, created_to="2024-01-05")) == 4
+
+def test_end_timestamp_is_exclusive(db, complaints):
+    assert created(db, "2024-01-05T00:00:00", "2024-01-05T13:30:00") == ["2024-01-05T00:00:00"]
+    assert created(db, created_from="2024-01-05T23:59:59.5") == ["2024-01-05T23:59:59.500000", "2024-01-06T00:00:00"]
+    # Offsets are converted to UTC first: this is 13:30 UTC
+    assert created(db, created_to="2024-01-05T19:00:00+05:30") == ["2024-01-04T23:59:59", "2024-01-05T00:00:00"]
@@ -64,6 +64,7 @@ CREATE TABLE IF NOT EXISTS orders (
     delivery_pin_code VARCHAR(10) NOT NULL,
     order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     delivered_at TIMESTAMP,
+    fee_snapshot_version INTEGER,
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (restaurant_id) REFERENCES restaurants(id),
     FOREIGN KEY (delivery_partner_id) REFERENCES users(id)
@@ -148,6 +149,54 @@ CREATE TABLE IF NOT EXISTS admins (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Cart Items Table (one row per cart line)
+CREATE TABLE IF NOT EXISTS cart_items (
+    user_id INTEGER NOT NULL,
+    dish_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (user_id, dish_id)
+) WITHOUT ROWID;
+
+-- Fee Snapshots Table (one row per fee configuration change)
+CREATE TABLE IF NOT EXISTS fee_snapshots (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    reason VARCHAR(100) NOT NULL,
+    platform_fee_id INTEGER,
+    platform_fee_value DECIMAL(10, 2),
+    platform_fee_is_percentage BOOLEAN DEFAULT 0,
+    restaurant_id INTEGER,
+    restaurant_fee_rate DECIMAL(10, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Hourly and daily revenue totals (see backend/app/rollups.py). dimension is
+-- "all", "restaurant" or "pin_code"; bucket is "YYYY-MM-DD HH:00" or "YYYY-MM-DD"
+CREATE TABLE IF NOT EXISTS revenue_rollups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    granularity VARCHAR(5) NOT NULL,
+    dimension VARCHAR(10) NOT NULL,
+    dimension_key VARCHAR(20) NOT NULL,
+    bucket VARCHAR(16) NOT NULL,
+    delivered_orders INTEGER NOT NULL DEFAULT 0,
+    cancelled_orders INTEGER NOT NULL DEFAULT 0,
+    gross_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    restaurant_fees DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    platform_fees DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    delivery_charges DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    discount_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    final_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    cancelled_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_revenue_rollups_series UNIQUE (granularity, dimension, dimension_key, bucket)
+);
+
+-- Applied schema migrations (see backend/app/migrations.py)
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Indexes for Performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
@@ -160,3 +209,50 @@ CREATE INDEX IF NOT EXISTS idx_delivery_partners_pin_code ON delivery_partners(p
 CREATE INDEX IF NOT EXISTS idx_delivery_partners_availability ON delivery_partners(availability);
 CREATE INDEX IF NOT EXISTS idx_complaints_order_id ON complaints(order_id);
 CREATE INDEX IF NOT EXISTS idx_offers_code ON offers(code);
+
+-- Hot query indexes (migration 2)
+CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items(order_id);
+CREATE INDEX IF NOT EXISTS ix_orders_restaurant_status_date ON orders(restaurant_id, status, order_date);
+CREATE INDEX IF NOT EXISTS ix_orders_partner_status_date ON orders(delivery_partner_id, status, order_date);
+CREATE INDEX IF NOT EXISTS ix_orders_user_date ON orders(user_id, order_date);
+CREATE INDEX IF NOT EXISTS ix_delivery_partners_pin_availability ON delivery_partners(pin_code, availability);
+CREATE INDEX IF NOT EXISTS ix_complaints_user_date ON complaints(user_id, created_at);
+
+-- Support complaint queue (migration 4)
+CREATE INDEX IF NOT EXISTS ix_complaints_status_date ON complaints(status, created_at);
+CREATE INDEX IF NOT EXISTS ix_complaints_created_at ON complaints(created_at);
+
+-- Bulk menu import lookups (migration 5)
+CREATE INDEX IF NOT EXISTS ix_dishes_restaurant_name ON dishes(restaurant_id, name);
+
+-- Order export by date (migration 6)
+CREATE INDEX IF NOT EXISTS ix_orders_order_date ON orders(order_date);
+CREATE INDEX IF NOT EXISTS ix_orders_restaurant_date ON orders(restaurant_id, order_date);
+
+-- Dish full-text search (migration 3); rowid is the dish id
+CREATE VIRTUAL TABLE IF NOT EXISTS dish_search USING fts5(
+    name, description, category, restaurant_name, pin_code, restaurant_id UNINDEXED,
+    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+);
+INSERT INTO dish_search (dish_search, rank) VALUES ('rank', 'bm25(10.0, 2.0, 4.0, 5.0, 0.0, 0.0)');
+
+CREATE TRIGGER IF NOT EXISTS dishes_search_insert AFTER INSERT ON dishes BEGIN
+    INSERT INTO dish_search (rowid, name, description, category, restaurant_name, pin_code, restaurant_id)
+    SELECT new.id, new.name, coalesce(new.description, ''), coalesce(new.category, ''), r.name, r.pin_code, r.id
+    FROM restaurants r WHERE r.id = new.restaurant_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dishes_search_update AFTER UPDATE OF name, description, category, restaurant_id ON dishes BEGIN
+    DELETE FROM dish_search WHERE rowid = old.id;
+    INSERT INTO dish_search (rowid, name, description, category, restaurant_name, pin_code, restaurant_id)
+    SELECT new.id, new.name, coalesce(new.description, ''), coalesce(new.category, ''), r.name, r.pin_code, r.id
+    FROM restaurants r WHERE r.id = new.restaurant_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dishes_search_delete AFTER DELETE ON dishes BEGIN
+    DELETE FROM dish_search WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS restaurants_search_update AFTER UPDATE OF name, pin_code ON restaurants BEGIN
+    UPDATE dish_search SET restaurant_name = new.name, pin_code = new.pin_code WHERE restaurant_id = new.id;
+END;
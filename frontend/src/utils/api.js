@@ -17,6 +17,23 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// List endpoints return one page and a next_cursor (see Pagination in
+// docs/API_ENDPOINTS.md). This follows the cursor to the last page and
+// resolves to a response whose data[key] holds every row.
+const PAGE_SIZE = 100;
+
+const getAllPages = async (url, key, params = {}) => {
+  const rows = [];
+  let cursor;
+  let response;
+  do {
+    response = await api.get(url, { params: { ...params, limit: PAGE_SIZE, cursor } });
+    rows.push(...response.data[key]);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return { ...response, data: { ...response.data, [key]: rows } };
+};
+
 export const authAPI = {
   login: (email, password, role) => 
     api.post('/auth/login', { email, password, role }),
@@ -33,7 +50,7 @@ export const authAPI = {
 
 export const customerAPI = {
   getRestaurants: (pinCode) => 
-    api.get('/customer/restaurants', { params: { pin_code: pinCode } }),
+    getAllPages('/customer/restaurants', 'restaurants', { pin_code: pinCode }),
   
   getMenu: (restaurantId) => 
     api.get(`/customer/restaurants/${restaurantId}/menu`),
@@ -58,7 +75,7 @@ export const customerAPI = {
     api.post('/customer/orders', orderData),
   
   getOrders: () => 
-    api.get('/customer/orders'),
+    getAllPages('/customer/orders', 'orders'),
   
   trackOrder: (orderId) => 
     api.get(`/customer/orders/${orderId}`),
@@ -67,7 +84,7 @@ export const customerAPI = {
     api.post('/customer/complaints', { order_id: orderId, description }),
   
   getComplaints: () => 
-    api.get('/customer/complaints'),
+    getAllPages('/customer/complaints', 'complaints'),
 };
 
 export const restaurantAPI = {
@@ -75,7 +92,7 @@ export const restaurantAPI = {
     api.post('/restaurant/dishes', dishData),
   
   getDishes: () => 
-    api.get('/restaurant/dishes'),
+    getAllPages('/restaurant/dishes', 'dishes'),
   
   updateDish: (dishId, dishData) => 
     api.put(`/restaurant/dishes/${dishId}`, dishData),
@@ -87,7 +104,7 @@ export const restaurantAPI = {
     api.put('/restaurant/status', { status }),
   
   getOrders: (status) => 
-    api.get('/restaurant/orders', { params: { status } }),
+    getAllPages('/restaurant/orders', 'orders', { status }),
   
   createOffer: (offerData) => 
     api.post('/restaurant/offers', offerData),
@@ -101,7 +118,7 @@ export const deliveryAPI = {
     api.put('/delivery/availability', { availability }),
   
   getOrders: (status) => 
-    api.get('/delivery/orders', { params: { status } }),
+    getAllPages('/delivery/orders', 'orders', { status }),
   
   updateOrderStatus: (orderId, status) => 
     api.put(`/delivery/orders/${orderId}/status`, { status }),
@@ -112,7 +129,7 @@ export const adminAPI = {
     api.post('/admin/restaurants', restaurantData),
   
   getRestaurants: () => 
-    api.get('/admin/restaurants'),
+    getAllPages('/admin/restaurants', 'restaurants'),
   
   updateRestaurant: (restaurantId, updateData) => 
     api.put(`/admin/restaurants/${restaurantId}`, updateData),
@@ -121,18 +138,18 @@ export const adminAPI = {
     api.post('/admin/platform-fees', feeData),
   
   getPlatformFees: () => 
-    api.get('/admin/platform-fees'),
+    getAllPages('/admin/platform-fees', 'fees'),
   
   createOffer: (offerData) => 
     api.post('/admin/offers', offerData),
   
   getOffers: () => 
-    api.get('/admin/offers'),
+    getAllPages('/admin/offers', 'offers'),
 };
 
 export const supportAPI = {
   getComplaints: (status) => 
-    api.get('/support/complaints', { params: { status } }),
+    getAllPages('/support/complaints', 'complaints', { status }),
   
   updateComplaint: (complaintId, updateData) => 
     api.put(`/support/complaints/${complaintId}`, updateData),